@@ -0,0 +1,51 @@
+"""
+Benchmarks NeuralNetPredictor fit and predict throughput with bfloat16 autocast against float32, along with the
+difference in validation mean absolute error.
+Run with: python -m benchmarks.bench_bfloat16
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+
+
+def main():  # pylint: disable=too-many-locals
+    """
+    Reports fit and predict rows per second and validation MAE for each precision.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--hidden-size", type=int, default=4096)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=2048)
+    args = parser.parse_args()
+
+    columns = [f"f{i}" for i in range(args.features)]
+    X = pd.DataFrame(np.random.rand(args.rows, args.features), columns=columns)
+    y = pd.Series(np.sin(X.values).sum(axis=1), name="label")
+    n_train = int(args.rows * 0.8)
+    X_train, y_train, X_val, y_val = X.iloc[:n_train], y.iloc[:n_train], X.iloc[n_train:], y.iloc[n_train:]
+
+    print(f"{'precision':>10} {'fit rows/s':>12} {'predict rows/s':>15} {'val mae':>10}")
+    maes = {}
+    for precision in ["float32", "bfloat16"]:
+        predictor = NeuralNetPredictor({"hidden_sizes": [args.hidden_size], "epochs": args.epochs,
+                                        "batch_size": args.batch_size, "precision": precision})
+        start = time.perf_counter()
+        predictor.fit(X_train, y_train)
+        fit_rate = n_train * args.epochs / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        y_pred = predictor.predict(X_val).values
+        predict_rate = len(X_val) / (time.perf_counter() - start)
+        maes[precision] = np.mean(np.abs(y_pred - y_val.values.reshape(y_pred.shape)))
+        print(f"{precision:>10} {fit_rate:>12.0f} {predict_rate:>15.0f} {maes[precision]:>10.5f}")
+    print(f"bfloat16 - float32 val mae: {maes['bfloat16'] - maes['float32']:+.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmarks chunked parallel SKLearnPredictor predictions on a large frame against predicting the whole frame at once.
+Reports the predict time and the peak memory allocated during predict, traced with tracemalloc, which numpy reports
+its arrays to.
+Run with: python -m benchmarks.bench_chunked_predict
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+from prsdk.predictors.sklearn_predictors.random_forest_predictor import RandomForestPredictor
+
+
+def measure(predictor, df: pd.DataFrame) -> tuple[float, float]:
+    """
+    Times a call of predict then repeats it under tracemalloc to get its peak allocated memory.
+    :return: the predict time in seconds and peak memory in MiB.
+    """
+    start = time.perf_counter()
+    predictor.predict(df)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    predictor.predict(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def main():
+    """
+    Fits a linear regression and a random forest then predicts on a large frame unchunked and with each number of
+    workers.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=65_536)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--backend", type=str, default="threading")
+    args = parser.parse_args()
+
+    columns = [f"f{i}" for i in range(args.features)]
+    train_df = pd.DataFrame(np.random.rand(10_000, args.features), columns=columns)
+    train_y = pd.Series(np.sin(train_df.values).sum(axis=1), name="label")
+    df = pd.DataFrame(np.random.rand(args.rows, args.features), columns=columns)
+    print(f"input frame: {df.memory_usage().sum() / 2 ** 20:.1f} MiB")
+
+    predictors = {
+        "linear": LinearRegressionPredictor({}),
+        "forest": RandomForestPredictor({"n_estimators": 20, "max_depth": 10, "n_jobs": 1})
+    }
+    print(f"{'model':>8} {'workers':>10} {'seconds':>10} {'rows/s':>12} {'peak MiB':>10}")
+    for name, predictor in predictors.items():
+        predictor.fit(train_df, train_y)
+        elapsed, peak = measure(predictor, df)
+        print(f"{name:>8} {'unchunked':>10} {elapsed:>10.3f} {args.rows / elapsed:>12.0f} {peak:>10.1f}")
+        for n_workers in args.workers:
+            predictor.set_chunking(args.chunk_size, n_workers, args.backend)
+            elapsed, peak = measure(predictor, df)
+            print(f"{name:>8} {n_workers:>10} {elapsed:>10.3f} {args.rows / elapsed:>12.0f} {peak:>10.1f}")
+        predictor.set_chunking(None)
+
+
+if __name__ == "__main__":
+    main()
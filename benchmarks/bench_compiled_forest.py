@@ -0,0 +1,97 @@
+"""
+Benchmarks RandomForestPredictor inference with the compiled forest against sklearn's per-tree predict, then loading
+the saved forest by unpickling model.joblib against memory-mapping the compiled forest.bin in fresh subprocesses.
+Run with: python -m benchmarks.bench_compiled_forest
+"""
+import argparse
+import copy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_flat_weights import memory_mib
+from prsdk.persistence.serializers.sklearn_serializer import SKLearnSerializer
+from prsdk.predictors.sklearn_predictors.random_forest_predictor import RandomForestPredictor
+
+
+def run(save_dir: Path, inference_only: bool):
+    """
+    Loads the saved forest then prints the load time and memory growth.
+    """
+    before = memory_mib()
+    start = time.perf_counter()
+    predictor = SKLearnSerializer().load(save_dir, inference_only=inference_only)
+    elapsed = time.perf_counter() - start
+    after = memory_mib()
+    del predictor
+    mode = "forest.bin" if inference_only else "joblib"
+    rss = after["Rss"] - before["Rss"]
+    anon = after["Anonymous"] - before["Anonymous"]
+    print(f"{mode:>12} {elapsed * 1000:>10.1f} {rss:>10.1f} {anon:>10.1f}")
+
+
+def main():  # pylint: disable=too-many-locals
+    """
+    Reports the median predict time of sklearn and the compiled forest for each batch size, then the load cost of
+    each saved artifact.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=12)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000, 200_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--run", nargs=2, metavar=("SAVE_DIR", "INFERENCE_ONLY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(Path(args.run[0]), args.run[1] == "1")
+        return
+
+    columns = [f"f{i}" for i in range(args.features)]
+    X = pd.DataFrame(np.random.rand(args.rows, args.features), columns=columns)
+    sklearn_predictor = RandomForestPredictor({"n_estimators": args.n_estimators, "max_depth": args.max_depth,
+                                               "n_jobs": -1})
+    sklearn_predictor.fit(X, pd.Series(np.sin(X.values).sum(axis=1), name="label"))
+    compiled = copy.deepcopy(sklearn_predictor)
+    compiled.compile_forest()
+    predictors = {"sklearn": sklearn_predictor, "compiled": compiled}
+
+    print(f"{'rows':>8} {'mode':>8} {'p50 ms':>10} {'rows/s':>12}")
+    for size in args.sizes:
+        df = pd.DataFrame(np.random.rand(size, args.features), columns=columns)
+        outputs = []
+        for name, predictor in predictors.items():
+            outputs.append(predictor.predict(df))
+            repeats = max(min(args.repeats, args.repeats * 10_000 // size), 1)
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                predictor.predict(df)
+                times.append(time.perf_counter() - start)
+            p50 = np.percentile(times, 50)
+            print(f"{size:>8} {name:>8} {p50 * 1000:>10.3f} {size / p50:>12.0f}")
+        assert outputs[0].equals(outputs[1]), "Compiled forest predictions differ from sklearn"
+
+    save_dir = Path(tempfile.mkdtemp())
+    try:
+        SKLearnSerializer().save(compiled, save_dir)
+        for file in ["model.joblib", "forest.bin"]:
+            print(f"{file} size: {(save_dir / file).stat().st_size / 2 ** 20:.1f} MiB")
+        print(f"{'load':>12} {'load ms':>10} {'RSS MiB':>10} {'anon MiB':>10}")
+        for inference_only in ["0", "1"]:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_compiled_forest", "--run", str(save_dir),
+                            inference_only], check=True)
+    finally:
+        shutil.rmtree(save_dir)
+
+
+if __name__ == "__main__":
+    main()
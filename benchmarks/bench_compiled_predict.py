@@ -0,0 +1,64 @@
+"""
+Benchmarks NeuralNetPredictor inference with traced and scripted models against eager mode, as well as the
+cold-start time of loading a saved model with and without rebuilding it from its config.
+Run with: python -m benchmarks.bench_compiled_predict
+"""
+import argparse
+import copy
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_predict_latency import latencies
+from prsdk.persistence.serializers.neural_network_serializer import NeuralNetSerializer
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+
+
+def main():  # pylint: disable=too-many-locals
+    """
+    Reports p50/p99 latency for eager, traced and scripted models then the time to load each saved artifact.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--hidden-sizes", type=int, nargs="+", default=[4096])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 256, 4096])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    columns = [f"f{i}" for i in range(args.features)]
+    train_df = pd.DataFrame(np.random.rand(1000, args.features), columns=columns)
+    eager = NeuralNetPredictor({"hidden_sizes": args.hidden_sizes, "epochs": 1})
+    eager.fit(train_df, pd.Series(np.random.rand(1000), name="label"))
+    predictors = {"eager": eager}
+    for method in ["trace", "script"]:
+        predictors[method] = copy.deepcopy(eager)
+        predictors[method].compile_model(method)
+
+    print(f"{'rows':>8} {'mode':>8} {'p50 ms':>10} {'p99 ms':>10}")
+    for size in args.sizes:
+        df = pd.DataFrame(np.random.rand(size, args.features), columns=columns)
+        for name, predictor in predictors.items():
+            times = latencies(predictor.predict, df, args.repeats)
+            print(f"{size:>8} {name:>8} {np.percentile(times, 50):>10.3f} {np.percentile(times, 99):>10.3f}")
+
+    serializer = NeuralNetSerializer()
+    save_dir = Path(tempfile.mkdtemp())
+    try:
+        serializer.save(predictors["trace"], save_dir)
+        for name, inference_only in [("rebuild from config", False), ("inference only", True)]:
+            times = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                serializer.load(save_dir, inference_only=inference_only).predict(df.iloc[:1])
+                times.append((time.perf_counter() - start) * 1000)
+            print(f"load + first predict, {name}: p50 {np.percentile(times, 50):.3f} ms")
+    finally:
+        shutil.rmtree(save_dir)
+
+
+if __name__ == "__main__":
+    main()
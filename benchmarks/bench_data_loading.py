@@ -0,0 +1,55 @@
+"""
+Benchmarks the throughput of TorchBatchLoader against the per-row DataLoader path it replaced in
+NeuralNetPredictor.fit and predict.
+Run with: python -m benchmarks.bench_data_loading
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, RandomSampler
+
+from prsdk.data.torch_data import TorchBatchLoader, TorchDataset
+
+
+def samples_per_sec(loader, n_samples: int, epochs: int) -> float:
+    """
+    Iterates over the loader for a number of epochs and returns the number of samples loaded per second.
+    """
+    start = time.perf_counter()
+    for _ in range(epochs):
+        for X, _ in loader:
+            X.sum()
+    return n_samples * epochs / (time.perf_counter() - start)
+
+
+def main():
+    """
+    Compares the DataLoader and TorchBatchLoader for sequential and sampled epochs.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=2048)
+    parser.add_argument("--train-pct", type=float, default=1)
+    parser.add_argument("--epochs", type=int, default=2)
+    args = parser.parse_args()
+
+    ds = TorchDataset(np.random.rand(args.rows, args.features), np.random.rand(args.rows))
+    num_samples = int(len(ds) * args.train_pct)
+    loaders = {
+        "dataloader sequential": (DataLoader(ds, args.batch_size, shuffle=False), len(ds)),
+        "batchloader sequential": (TorchBatchLoader(ds, args.batch_size), len(ds)),
+        "dataloader sampled": (DataLoader(ds, args.batch_size, sampler=RandomSampler(ds, num_samples=num_samples)),
+                               num_samples),
+        "batchloader sampled": (TorchBatchLoader(ds, args.batch_size, shuffle=True, num_samples=num_samples),
+                                num_samples)
+    }
+    torch.set_num_threads(1)
+    for name, (loader, n_samples) in loaders.items():
+        print(f"{name:>24}: {samples_per_sec(loader, n_samples, args.epochs):,.0f} samples/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmarks how NeuralNetPredictor.fit scales with the number of data-parallel worker processes.
+The workers split each batch between them, so every run takes the same optimization steps over the same batch size.
+Run with: python -m benchmarks.bench_data_parallel
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+
+
+def main():
+    """
+    Fits the same data with each number of workers and reports the wall-clock time, throughput and speedup.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--hidden-size", type=int, default=4096)
+    parser.add_argument("--batch-size", type=int, default=2048)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    X = pd.DataFrame(np.random.rand(args.rows, args.features), columns=[f"f{i}" for i in range(args.features)])
+    y = pd.Series(X.sum(axis=1), name="label")
+    print(f"{'workers':>8} {'time s':>10} {'samples/sec':>14} {'speedup':>8}")
+    baseline = None
+    for n_workers in args.workers:
+        predictor = NeuralNetPredictor({"hidden_sizes": [args.hidden_size], "epochs": args.epochs,
+                                        "batch_size": args.batch_size, "data_parallel_workers": n_workers})
+        start = time.perf_counter()
+        predictor.fit(X, y)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{n_workers:>8} {elapsed:>10.2f} {args.rows * args.epochs / elapsed:>14,.0f} {baseline / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
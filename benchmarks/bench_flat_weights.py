@@ -0,0 +1,85 @@
+"""
+Benchmarks loading a NeuralNetPredictor saved with the torch/joblib weight format against the flat memory-mapped
+format. Each load happens in a fresh subprocess, which reports the load time and how much its memory grew.
+Anonymous memory is private to the process, whereas file-backed pages of memory-mapped weights are shared through the
+OS page cache between all processes serving the same model.
+Run with: python -m benchmarks.bench_flat_weights
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prsdk.persistence.serializers.neural_network_serializer import NeuralNetSerializer
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+
+
+def memory_mib() -> dict:
+    """
+    Reads the process' resident and anonymous memory in MiB from /proc/self/smaps_rollup (Linux only).
+    """
+    usage = {}
+    with open("/proc/self/smaps_rollup", "r", encoding="utf-8") as file:
+        for line in file:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Anonymous"):
+                usage[key] = int(value.split()[0]) / 1024
+    return usage
+
+
+def run(save_dir: Path, features: int):
+    """
+    Loads the saved model, predicts once to touch every weight, then prints the load time and memory growth.
+    """
+    df = pd.DataFrame(np.random.rand(1, features), columns=[f"f{i}" for i in range(features)])
+    before = memory_mib()
+    start = time.perf_counter()
+    predictor = NeuralNetSerializer().load(save_dir)
+    elapsed = time.perf_counter() - start
+    predictor.predict(df)
+    after = memory_mib()
+    rss = after["Rss"] - before["Rss"]
+    anon = after["Anonymous"] - before["Anonymous"]
+    print(f"{save_dir.name:>6} {elapsed * 1000:>10.1f} {rss:>10.1f} {anon:>10.1f} {rss - anon:>12.1f}")
+
+
+def main():
+    """
+    Saves the same model in both formats then loads each in a subprocess.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--hidden-sizes", type=int, nargs="+", default=[4096, 4096])
+    parser.add_argument("--run", nargs=2, metavar=("SAVE_DIR", "FEATURES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(Path(args.run[0]), int(args.run[1]))
+        return
+
+    X = pd.DataFrame(np.random.rand(100, args.features), columns=[f"f{i}" for i in range(args.features)])
+    predictor = NeuralNetPredictor({"hidden_sizes": args.hidden_sizes, "epochs": 1})
+    predictor.fit(X, pd.Series(X.sum(axis=1), name="label"))
+    n_params = sum(param.numel() for param in predictor.model.parameters())
+    print(f"weights: {n_params * 4 / 2 ** 20:.1f} MiB")
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        for weight_format in ["torch", "flat"]:
+            NeuralNetSerializer(weight_format=weight_format).save(predictor, root / weight_format)
+        print(f"{'format':>6} {'load ms':>10} {'RSS MiB':>10} {'anon MiB':>10} {'shared MiB':>12}")
+        for weight_format in ["torch", "flat"]:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_flat_weights", "--run", str(root / weight_format),
+                            str(args.features)], check=True)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
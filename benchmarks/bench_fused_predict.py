@@ -0,0 +1,44 @@
+"""
+Benchmarks NeuralNetPredictor.predict with the scaler folded into the network against the unfused model.
+Run with: python -m benchmarks.bench_fused_predict
+"""
+import argparse
+import copy
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_predict_latency import latencies
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+
+
+def main():
+    """
+    Reports p50/p99 latency and the max absolute difference between the unfused and fused predictions.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--hidden-size", type=int, default=4096)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 256, 4096, 32768])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    columns = [f"f{i}" for i in range(args.features)]
+    train_df = pd.DataFrame(np.random.rand(1000, args.features) * 100, columns=columns)
+    unfused = NeuralNetPredictor({"hidden_sizes": [args.hidden_size], "epochs": 1})
+    unfused.fit(train_df, pd.Series(np.random.rand(1000), name="label"))
+    fused = copy.deepcopy(unfused)
+    fused.fuse_scaler()
+
+    print(f"{'rows':>8} {'mode':>8} {'p50 ms':>10} {'p99 ms':>10}")
+    for size in args.sizes:
+        df = pd.DataFrame(np.random.rand(size, args.features) * 100, columns=columns)
+        for name, predictor in [("unfused", unfused), ("fused", fused)]:
+            times = latencies(predictor.predict, df, args.repeats)
+            print(f"{size:>8} {name:>8} {np.percentile(times, 50):>10.3f} {np.percentile(times, 99):>10.3f}")
+        max_diff = np.abs(unfused.predict(df).values - fused.predict(df).values).max()
+        print(f"{size:>8} max abs diff {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
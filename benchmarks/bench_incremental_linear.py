@@ -0,0 +1,70 @@
+"""
+Benchmarks refreshing an incremental LinearRegressionPredictor with a new day of data against refitting a batch
+LinearRegressionPredictor on all of the data so far, and merging precomputed statistics from workers.
+Run with: python -m benchmarks.bench_incremental_linear
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+from prsdk.predictors.sklearn_predictors.linear_statistics import LinearStatistics
+
+
+def make_day(rng: np.random.Generator, rows: int, columns: list[str]) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Creates a day of random data with a noisy linear label.
+    """
+    X = pd.DataFrame(rng.random((rows, len(columns))), columns=columns)
+    y = pd.Series(X.to_numpy() @ np.arange(len(columns)) + rng.normal(0, 0.1, rows), name="label")
+    return X, y
+
+
+def main():  # pylint: disable=too-many-locals
+    """
+    Fits both predictors on the history then times adding one more day to each and compares their coefficients.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--features", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    columns = [f"f{i}" for i in range(args.features)]
+    days = [make_day(rng, args.rows, columns) for _ in range(args.days + 1)]
+    history_x = pd.concat([X for X, _ in days[:-1]], ignore_index=True)
+    history_y = pd.concat([y for _, y in days[:-1]], ignore_index=True)
+    new_x, new_y = days[-1]
+
+    incremental = LinearRegressionPredictor({"incremental": True})
+    incremental.fit(history_x, history_y)
+    start = time.perf_counter()
+    incremental.partial_fit(new_x, new_y)
+    refresh_time = time.perf_counter() - start
+
+    worker_stats = LinearStatistics.from_data(incremental.ingest(new_x), new_y.to_numpy())
+    start = time.perf_counter()
+    incremental.merge(worker_stats)
+    merge_time = time.perf_counter() - start
+
+    batch = LinearRegressionPredictor({})
+    start = time.perf_counter()
+    batch.fit(pd.concat([history_x, new_x], ignore_index=True), pd.concat([history_y, new_y], ignore_index=True))
+    refit_time = time.perf_counter() - start
+
+    check = LinearRegressionPredictor({"incremental": True})
+    check.fit(history_x, history_y)
+    check.partial_fit(new_x, new_y)
+    max_diff = np.abs(check.model.coef_ - batch.model.coef_).max()
+    print(f"history: {args.days} days x {args.rows} rows x {args.features} features")
+    print(f"full batch refit:            {refit_time * 1000:>10.1f} ms")
+    print(f"partial_fit with new day:    {refresh_time * 1000:>10.1f} ms")
+    print(f"merge precomputed stats:     {merge_time * 1000:>10.3f} ms")
+    print(f"max coefficient difference:  {max_diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmarks evaluating a population of NeuralNetPrescriptors with the batched PopulationEvaluator against prescribing
+and predicting with each candidate one at a time.
+Run with: python -m benchmarks.bench_population_eval
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+from prsdk.prescriptors.neural_network.neural_net_prescriptor import NeuralNetPrescriptor
+from prsdk.prescriptors.population_evaluator import PopulationEvaluator
+
+
+def main():  # pylint: disable=too-many-locals
+    """
+    Reports the time to evaluate the whole population sequentially and batched.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--context", type=int, default=10)
+    parser.add_argument("--actions", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--population", type=int, default=200)
+    parser.add_argument("--hidden-size", type=int, default=16)
+    args = parser.parse_args()
+
+    context = [f"c{i}" for i in range(args.context)]
+    actions = [f"a{i}" for i in range(args.actions)]
+    train_df = pd.DataFrame(np.random.rand(10000, len(context) + len(actions)), columns=context + actions)
+    linear = LinearRegressionPredictor({})
+    linear.fit(train_df, pd.Series(train_df.sum(axis=1), name="total"))
+    neural_net = NeuralNetPredictor({"hidden_sizes": [64], "epochs": 1})
+    neural_net.fit(train_df, pd.Series(np.sin(train_df.values).sum(axis=1), name="sin"))
+    predictors = [linear, neural_net]
+
+    context_df = pd.DataFrame(np.random.rand(args.rows, len(context)), columns=context)
+    population = [NeuralNetPrescriptor(context, actions, args.hidden_size) for _ in range(args.population)]
+
+    start = time.perf_counter()
+    for candidate in population:
+        context_actions_df = candidate.prescribe(context_df)
+        _ = [predictor.predict(context_actions_df).mean() for predictor in predictors]
+    sequential = time.perf_counter() - start
+
+    evaluator = PopulationEvaluator(context, actions, predictors)
+    start = time.perf_counter()
+    evaluator.evaluate(population, context_df)
+    batched = time.perf_counter() - start
+    print(f"sequential: {sequential:.3f}s, batched: {batched:.3f}s, speedup: {sequential / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmarks the latency of NeuralNetPredictor.predict against the previous DataLoader-based inference path
+at several frame sizes.
+Run with: python -m benchmarks.bench_predict_latency
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader
+
+from prsdk.data.torch_data import TorchDataset
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+
+
+def dataloader_predict(predictor: NeuralNetPredictor, context_actions_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The previous inference path: dummy labels, a DataLoader, a list of outputs, then a concatenation.
+    """
+    X_test_scaled = predictor.scaler.transform(context_actions_df[predictor.features])
+    test_ds = TorchDataset(X_test_scaled, np.zeros(len(X_test_scaled)), device=predictor.device)
+    test_dl = DataLoader(test_ds, predictor.batch_size, shuffle=False)
+    pred_list = []
+    with torch.no_grad():
+        predictor.model.eval()
+        for X, _ in test_dl:
+            pred_list.append(predictor.model(X.to(predictor.device)))
+    y_pred = torch.concatenate(pred_list, dim=0).cpu().numpy()
+    return pd.DataFrame(y_pred, index=context_actions_df.index, columns=[predictor.label])
+
+
+def latencies(predict_fn, df: pd.DataFrame, repeats: int) -> np.ndarray:
+    """
+    Times repeated calls of predict_fn on df in milliseconds after a warmup call.
+    """
+    predict_fn(df)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_fn(df)
+        times.append((time.perf_counter() - start) * 1000)
+    return np.array(times)
+
+
+def main():
+    """
+    Reports p50/p99 latency of both inference paths for each frame size.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--hidden-size", type=int, default=4096)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 16, 256, 4096, 32768])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    columns = [f"f{i}" for i in range(args.features)]
+    train_df = pd.DataFrame(np.random.rand(1000, args.features), columns=columns)
+    predictor = NeuralNetPredictor({"hidden_sizes": [args.hidden_size], "epochs": 1})
+    predictor.fit(train_df, pd.Series(np.random.rand(1000), name="label"))
+
+    print(f"{'rows':>8} {'path':>12} {'p50 ms':>10} {'p99 ms':>10}")
+    for size in args.sizes:
+        df = pd.DataFrame(np.random.rand(size, args.features), columns=columns)
+        for name, predict_fn in [("dataloader", lambda df: dataloader_predict(predictor, df)),
+                                 ("preallocated", predictor.predict)]:
+            times = latencies(predict_fn, df, args.repeats)
+            print(f"{size:>8} {name:>12} {np.percentile(times, 50):>10.3f} {np.percentile(times, 99):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmarks NeuralNetPredictor inference with a dynamically int8 quantized model against the float model, along with
+the drift in predictions on a held-out frame and the size of the saved inference artifacts.
+Run with: python -m benchmarks.bench_quantized_predict
+"""
+import argparse
+import copy
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_predict_latency import latencies
+from prsdk.persistence.serializers.neural_network_serializer import NeuralNetSerializer
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+
+
+def main():
+    """
+    Reports drift, p50/p99 latency and inference artifact size for the float and quantized models.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--hidden-size", type=int, default=4096)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 256, 4096])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    columns = [f"f{i}" for i in range(args.features)]
+    X = pd.DataFrame(np.random.rand(10000, args.features), columns=columns)
+    y = pd.Series(np.sin(X.values).sum(axis=1), name="label")
+    float_model = NeuralNetPredictor({"hidden_sizes": [args.hidden_size], "epochs": 3})
+    float_model.fit(X.iloc[:8000], y.iloc[:8000])
+    quantized = copy.deepcopy(float_model)
+    drift = quantized.quantize(X.iloc[8000:], y.iloc[8000:])
+    print(", ".join(f"{key}: {value:.5f}" for key, value in drift.items()))
+
+    print(f"{'rows':>8} {'mode':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for size in args.sizes:
+        df = pd.DataFrame(np.random.rand(size, args.features), columns=columns)
+        for name, predictor in [("float", float_model), ("quantized", quantized)]:
+            times = latencies(predictor.predict, df, args.repeats)
+            print(f"{size:>8} {name:>10} {np.percentile(times, 50):>10.3f} {np.percentile(times, 99):>10.3f}")
+
+    serializer = NeuralNetSerializer()
+    for name, predictor in [("float", float_model), ("quantized", quantized)]:
+        save_dir = Path(tempfile.mkdtemp())
+        try:
+            predictor.compile_model()
+            serializer.save(predictor, save_dir)
+            print(f"{name} inference.pt: {(save_dir / 'inference.pt').stat().st_size / 2 ** 20:.2f} MiB")
+        finally:
+            shutil.rmtree(save_dir)
+
+
+if __name__ == "__main__":
+    main()
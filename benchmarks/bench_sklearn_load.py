@@ -0,0 +1,79 @@
+"""
+Benchmarks loading a RandomForestPredictor saved uncompressed, uncompressed with memory-mapped loading, and
+compressed. Reports the file size, and for each load in a fresh subprocess the load time and how much its memory grew.
+Anonymous memory is private to the process, whereas file-backed pages are shared through the OS page cache.
+Run with: python -m benchmarks.bench_sklearn_load
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_flat_weights import memory_mib
+from prsdk.persistence.serializers.sklearn_serializer import SKLearnSerializer
+from prsdk.predictors.sklearn_predictors.random_forest_predictor import RandomForestPredictor
+
+MODES = {
+    "raw": ("raw", None),
+    "mmap": ("raw", "r"),
+    "zlib3": ("zlib3", None)
+}
+
+
+def run(root: Path, mode: str):
+    """
+    Loads the saved model in the given mode then prints the load time and memory growth.
+    """
+    save_name, mmap_mode = MODES[mode]
+    before = memory_mib()
+    start = time.perf_counter()
+    predictor = SKLearnSerializer(mmap_mode=mmap_mode).load(root / save_name)
+    elapsed = time.perf_counter() - start
+    after = memory_mib()
+    del predictor
+    rss = after["Rss"] - before["Rss"]
+    anon = after["Anonymous"] - before["Anonymous"]
+    print(f"{mode:>6} {elapsed * 1000:>10.1f} {rss:>10.1f} {anon:>10.1f} {rss - anon:>12.1f}")
+
+
+def main():
+    """
+    Saves a forest uncompressed and compressed then loads it in each mode in a subprocess.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--n-estimators", type=int, default=50)
+    parser.add_argument("--run", nargs=2, metavar=("ROOT", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(Path(args.run[0]), args.run[1])
+        return
+
+    X = pd.DataFrame(np.random.rand(args.rows, args.features), columns=[f"f{i}" for i in range(args.features)])
+    predictor = RandomForestPredictor({"n_estimators": args.n_estimators, "n_jobs": -1})
+    predictor.fit(X, pd.Series(np.sin(X.values).sum(axis=1), name="label"))
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        SKLearnSerializer().save(predictor, root / "raw")
+        SKLearnSerializer(compress=3).save(predictor, root / "zlib3")
+        for save_name in ["raw", "zlib3"]:
+            print(f"{save_name} size: {(root / save_name / 'model.joblib').stat().st_size / 2 ** 20:.1f} MiB")
+        print(f"{'mode':>6} {'load ms':>10} {'RSS MiB':>10} {'anon MiB':>10} {'shared MiB':>12}")
+        for mode in MODES:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_sklearn_load", "--run", str(root), mode],
+                           check=True)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmarks the peak RSS and time of fitting predictors on a full in-memory DataFrame against streaming the same data
+from .npy shards with fit_stream. Each run happens in a fresh subprocess so their peak RSS is measured separately.
+Run with: python -m benchmarks.bench_streaming_fit
+"""
+import argparse
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prsdk.data.chunked import ChunkSource
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+
+
+def write_shards(shard_dir: Path, n_shards: int, rows: int, features: int):
+    """
+    Writes random structured .npy shards with a label column.
+    """
+    for i in range(n_shards):
+        X = np.random.rand(rows, features)
+        chunk = pd.DataFrame(X, columns=[f"f{j}" for j in range(features)])
+        chunk["label"] = X.sum(axis=1)
+        np.save(shard_dir / f"shard_{i:04d}.npy", chunk.to_records(index=False))
+
+
+def run(model: str, mode: str, shard_dir: Path):
+    """
+    Fits the model either on all the shards concatenated in memory or streamed, then prints the time and peak RSS.
+    """
+    source = ChunkSource(shard_dir)
+    if model == "nn":
+        predictor = NeuralNetPredictor({"hidden_sizes": [256], "epochs": 1})
+    else:
+        predictor = LinearRegressionPredictor({})
+    start = time.perf_counter()
+    if mode == "memory":
+        data = pd.concat(list(source), ignore_index=True)
+        predictor.fit(data.drop(columns="label"), data["label"])
+    else:
+        predictor.fit_stream(source, "label")
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{model:>4} {mode:>8} {elapsed:>10.2f} {peak_rss:>14.1f}")
+
+
+def main():
+    """
+    Writes the shards then runs each model in each mode in a subprocess.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--run", nargs=3, metavar=("MODEL", "MODE", "SHARD_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.run[0], args.run[1], Path(args.run[2]))
+        return
+
+    shard_dir = Path(tempfile.mkdtemp())
+    try:
+        write_shards(shard_dir, args.shards, args.rows, args.features)
+        data_mib = args.shards * args.rows * (args.features + 1) * 8 / 2 ** 20
+        print(f"data size: {data_mib:.1f} MiB")
+        print(f"{'model':>4} {'mode':>8} {'time s':>10} {'peak RSS MiB':>14}")
+        for model in ["nn", "lr"]:
+            for mode in ["memory", "stream"]:
+                subprocess.run([sys.executable, "-m", "benchmarks.bench_streaming_fit", "--run", model, mode,
+                                str(shard_dir)], check=True)
+    finally:
+        shutil.rmtree(shard_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Benchmark suite tracking the fit, predict and serialization performance of the predictors across data sizes.
+Every case runs in a fresh subprocess so that its peak RSS is measured on its own. Results are written as JSON and can
+be compared against a stored baseline to flag regressions.
+Run with:
+    python -m benchmarks.bench_suite --output results.json
+    python -m benchmarks.bench_suite --output new.json --compare results.json
+"""
+import argparse
+import json
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MODELS = ["nn", "lr", "rf"]
+SIZES = {
+    "quick": [(1000, 10), (10000, 10)],
+    "full": [(1000, 10), (10000, 10), (100000, 10), (100000, 100)]
+}
+# Whether larger values of each metric are better, used to decide which direction is a regression
+HIGHER_IS_BETTER = {
+    "fit_rows_per_s": True,
+    "predict_rows_per_s": True,
+    "predict_1_p50_ms": False,
+    "predict_1_p99_ms": False,
+    "save_s": False,
+    "load_s": False,
+    "peak_rss_mib": False
+}
+
+
+def make_data(rows: int, features: int, seed: int = 0) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Generates a synthetic regression dataset with a nonlinear label.
+    """
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.random((rows, features)), columns=[f"f{i}" for i in range(features)])
+    y = pd.Series(np.sin(X.values).sum(axis=1) + 0.1 * rng.standard_normal(rows), name="label")
+    return X, y
+
+
+def make_predictor(model: str):
+    """
+    Creates the predictor and serializer to benchmark for a model name.
+    """
+    # pylint: disable=import-outside-toplevel
+    if model == "nn":
+        from prsdk.persistence.serializers.neural_network_serializer import NeuralNetSerializer
+        from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+        return NeuralNetPredictor({"hidden_sizes": [64], "epochs": 1, "batch_size": 256}), NeuralNetSerializer()
+    from prsdk.persistence.serializers.sklearn_serializer import SKLearnSerializer
+    if model == "lr":
+        from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+        return LinearRegressionPredictor({}), SKLearnSerializer()
+    from prsdk.predictors.sklearn_predictors.random_forest_predictor import RandomForestPredictor
+    return RandomForestPredictor({"n_estimators": 20, "max_depth": 10, "n_jobs": -1}), SKLearnSerializer()
+
+
+def run_case(model: str, rows: int, features: int, repeats: int) -> dict:
+    """
+    Fits, predicts with, saves and loads a predictor, measuring each step.
+    """
+    X, y = make_data(rows, features)
+    predictor, serializer = make_predictor(model)
+    metrics = {}
+
+    start = time.perf_counter()
+    predictor.fit(X, y)
+    metrics["fit_rows_per_s"] = rows / (time.perf_counter() - start)
+
+    predictor.predict(X)
+    start = time.perf_counter()
+    predictor.predict(X)
+    metrics["predict_rows_per_s"] = rows / (time.perf_counter() - start)
+    # Timed inline rather than with bench_predict_latency.latencies, which would import torch into every case
+    row = X.iloc[:1]
+    predictor.predict(row)
+    single = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictor.predict(row)
+        single.append((time.perf_counter() - start) * 1000)
+    metrics["predict_1_p50_ms"] = float(np.percentile(single, 50))
+    metrics["predict_1_p99_ms"] = float(np.percentile(single, 99))
+
+    save_dir = Path(tempfile.mkdtemp())
+    try:
+        start = time.perf_counter()
+        serializer.save(predictor, save_dir)
+        metrics["save_s"] = time.perf_counter() - start
+        start = time.perf_counter()
+        serializer.load(save_dir)
+        metrics["load_s"] = time.perf_counter() - start
+    finally:
+        shutil.rmtree(save_dir)
+
+    metrics["peak_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"case": f"{model}-{rows}x{features}", "model": model, "rows": rows, "features": features,
+            "metrics": metrics}
+
+
+def environment() -> dict:
+    """
+    Versions of the dependencies the results depend on.
+    """
+    # pylint: disable=import-outside-toplevel
+    import sklearn
+    import torch
+    return {"python": platform.python_version(), "platform": platform.platform(), "numpy": np.__version__,
+            "pandas": pd.__version__, "sklearn": sklearn.__version__, "torch": torch.__version__}
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """
+    Compares results against a baseline case by case.
+    :param results: the new results.
+    :param baseline: the stored baseline results.
+    :param threshold: relative change in the worse direction that counts as a regression, e.g. 0.1 for 10%.
+    :return: a description of each regression.
+    """
+    baseline_cases = {result["case"]: result["metrics"] for result in baseline}
+    regressions = []
+    for result in results:
+        old_metrics = baseline_cases.get(result["case"])
+        if old_metrics is None:
+            continue
+        for metric, new in result["metrics"].items():
+            old = old_metrics.get(metric)
+            if old is None or old == 0:
+                continue
+            change = (new - old) / old
+            if HIGHER_IS_BETTER[metric]:
+                change = -change
+            if change > threshold:
+                regressions.append(f"{result['case']} {metric}: {old:.4g} -> {new:.4g} ({change:+.1%} worse)")
+    return regressions
+
+
+def main():
+    """
+    Runs every case in a subprocess, prints a table, writes the results and optionally compares them to a baseline.
+    Exits with status 1 if any regressions are found.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preset", choices=list(SIZES), default="quick")
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=MODELS)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--output", type=Path, help="path to write the results JSON to")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--run", nargs=3, metavar=("MODEL", "ROWS", "FEATURES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_case(args.run[0], int(args.run[1]), int(args.run[2]), args.repeats)))
+        return
+
+    results = []
+    header = ["case"] + list(HIGHER_IS_BETTER)
+    print(" ".join(f"{name:>18}" for name in header))
+    for model in args.models:
+        for rows, features in SIZES[args.preset]:
+            output = subprocess.run([sys.executable, "-m", "benchmarks.bench_suite", "--repeats", str(args.repeats),
+                                     "--run", model, str(rows), str(features)],
+                                    check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            values = [f"{result['metrics'][name]:>18.4g}" for name in HIGHER_IS_BETTER]
+            print(f"{result['case']:>18} " + " ".join(values))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"environment": environment(), "results": results}, file, indent=4)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Re-iterable sources of DataFrame chunks, used to fit predictors on data that doesn't fit in memory.
+"""
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+
+class ChunkSource:
+    """
+    Source of DataFrame chunks that starts over from the first chunk every time it is iterated over, so it can be
+    passed over once per epoch. Only one chunk is loaded at a time.
+    The source can be:
+        - a directory of .parquet or .npy shards, read in sorted order.
+        - a list of .parquet or .npy shard paths.
+        - a function returning an iterator of DataFrames.
+    Parquet shards are read with pandas and require pyarrow or fastparquet to be installed.
+    .npy shards must contain structured arrays whose field names are the column names. They are memory-mapped so that
+    only the columns used are read.
+    :param source: the directory, list of shards, or function to get chunks from.
+    :param columns: optional list of columns to load, which avoids reading unused columns of Parquet shards.
+    """
+    def __init__(self, source: str | Path | list[str | Path] | Callable[[], Iterable[pd.DataFrame]],
+                 columns: list[str] = None):
+        self.columns = columns
+        self.fn = None
+        self.shards = None
+        if callable(source):
+            self.fn = source
+        elif isinstance(source, (str, Path)):
+            source = Path(source)
+            if not source.is_dir():
+                raise FileNotFoundError(f"Path {source} does not exist or is not a directory.")
+            self.shards = sorted(path for path in source.iterdir() if path.suffix in (".parquet", ".npy"))
+            if not self.shards:
+                raise FileNotFoundError(f"No .parquet or .npy shards found in {source}.")
+        else:
+            self.shards = [Path(path) for path in source]
+
+    def read_shard(self, path: Path) -> pd.DataFrame:
+        """
+        Reads a single shard into a DataFrame.
+        :param path: path to the .parquet or .npy shard.
+        :return: DataFrame of the shard's (selected) columns.
+        """
+        if path.suffix == ".parquet":
+            return pd.read_parquet(path, columns=self.columns)
+        if path.suffix == ".npy":
+            records = np.load(path, mmap_mode="r")
+            if records.dtype.names is None:
+                raise ValueError(f"{path} does not contain a structured array.")
+            columns = self.columns if self.columns else records.dtype.names
+            return pd.DataFrame({column: np.asarray(records[column]) for column in columns})
+        raise ValueError(f"Unsupported shard format {path.suffix}.")
+
+    def count_rows(self) -> int | None:
+        """
+        Counts the rows of all the shards from their metadata, without reading their data.
+        :return: the total number of rows, or None if they can't be counted without reading the chunks, i.e. for
+            callable sources or Parquet shards when pyarrow isn't installed.
+        """
+        if self.fn is not None:
+            return None
+        n_rows = 0
+        for path in self.shards:
+            if path.suffix == ".parquet":
+                try:
+                    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+                except ImportError:
+                    return None
+                n_rows += pq.ParquetFile(path).metadata.num_rows
+            elif path.suffix == ".npy":
+                n_rows += len(np.load(path, mmap_mode="r"))
+            else:
+                raise ValueError(f"Unsupported shard format {path.suffix}.")
+        return n_rows
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        if self.fn is not None:
+            for chunk in self.fn():
+                yield chunk if self.columns is None else chunk[self.columns]
+        else:
+            for path in self.shards:
+                yield self.read_shard(path)
@@ -0,0 +1,71 @@
+"""
+Ingestion of the feature columns of a DataFrame into a contiguous numpy array for the predictors to consume.
+Used instead of context_actions_df[features] so that predicting doesn't build a new DataFrame on every call.
+"""
+import numpy as np
+import pandas as pd
+
+
+class FeatureIngestor:
+    """
+    Extracts a fixed list of feature columns from DataFrames into a single C-contiguous array.
+    The positions of the features are resolved once per input schema and cached, so repeated calls on frames with the
+    same columns skip the label lookup. The columns and positions are cached together as a single tuple that is read
+    and replaced in one step, so threads sharing an ingestor across schemas never pair one schema's columns with
+    another's positions. The output is always a fresh array that is safe to modify in place.
+    Depending on the frame we:
+        - gather the features straight out of the frame's underlying array if all of its columns share a dtype. If
+          pandas stores such a frame in several blocks, e.g. after columns were added to it one at a time, getting its
+          underlying array copies the whole frame first. Frames can be consolidated once with df.copy() to avoid this.
+        - copy each numeric feature column into a preallocated output array if the dtypes are mixed.
+        - fall back to pandas' own conversion for anything else (e.g. object or nullable extension dtypes).
+    :param features: list of feature columns to extract.
+    :param dtype: dtype of the output array.
+    """
+    def __init__(self, features: list[str], dtype=np.float32):
+        self.features = list(features)
+        self.dtype = np.dtype(dtype)
+        # (columns, positions) of the last schema seen
+        self.cache = None
+
+    def get_positions(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Gets the positions of the features in the columns of df, only resolving them when the columns change.
+        :param df: DataFrame to look up the features in.
+        :return: array of integer positions of the features.
+        """
+        columns = df.columns
+        cache = self.cache
+        if cache is not None and (columns is cache[0] or columns.equals(cache[0])):
+            return cache[1]
+        positions = columns.get_indexer(self.features)
+        if (positions < 0).any():
+            missing = [feature for feature, pos in zip(self.features, positions) if pos < 0]
+            raise KeyError(f"{missing} not in columns")
+        self.cache = (columns, positions)
+        return positions
+
+    def __call__(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Extracts the features from df.
+        :param df: DataFrame containing at least the features.
+        :return: C-contiguous array of shape (len(df), len(features)) with the ingestor's dtype.
+        """
+        positions = self.get_positions(df)
+        dtypes = df.dtypes.to_numpy()
+        if not all(isinstance(dtype, np.dtype) and dtype.kind in "biuf" for dtype in dtypes[positions]):
+            return np.ascontiguousarray(df.iloc[:, positions].to_numpy(dtype=self.dtype))
+
+        if all(dtype == dtypes[0] for dtype in dtypes):
+            # A homogeneous frame is backed by a single array we can view without copying
+            values = df.to_numpy(copy=False)
+            if values.dtype == self.dtype:
+                return np.take(values, positions, axis=1)
+            columns = (values[:, pos] for pos in positions)
+        else:
+            columns = (df.iloc[:, pos].to_numpy(copy=False) for pos in positions)
+
+        out = np.empty((len(df), len(positions)), dtype=self.dtype)
+        for i, column in enumerate(columns):
+            out[:, i] = column
+        return out
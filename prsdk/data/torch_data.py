@@ -3,6 +3,8 @@ A simple custom PyTorch dataset is created here. This is used to keep our
 datasets standard between models. It is used in both Torch prescription
 and Neural Network training.
 """
+import math
+
 import numpy as np
 import torch
 from torch.utils.data.dataset import Dataset
@@ -11,17 +13,104 @@ from torch.utils.data.dataset import Dataset
 class TorchDataset(Dataset):
     """
     Simple custom torch dataset.
+    By default the given arrays are copied. With copy=False the dataset shares memory with arrays that are already
+    float32 and on the device (unless they are read-only), so any changes made to them are seen by the dataset and
+    vice versa. Only pass copy=False for arrays the caller owns and won't modify, like a freshly scaled copy.
     :param X: data
     :param y: labels
+    :param device: device to put the tensors on.
+    :param copy: whether to copy the arrays rather than sharing memory with them where possible.
     """
-    def __init__(self, X: np.ndarray, y: np.ndarray, device="cpu"):
+    def __init__(self, X: np.ndarray, y: np.ndarray, device="cpu", copy: bool = True):
         super().__init__()
-        self.X = torch.tensor(X, dtype=torch.float32, device=device)
-        self.y = torch.tensor(y, device=device)
+        self.X = self.to_tensor(X, copy, dtype=torch.float32, device=device)
+        self.y = self.to_tensor(y, copy, device=device)
         assert len(self.X) == len(self.y), "X and y must have the same length"
 
+    @staticmethod
+    def to_tensor(arr: np.ndarray, copy: bool = True, **kwargs) -> torch.Tensor:
+        """
+        Converts an array to a tensor, without copying where possible if copy is False. Torch doesn't support
+        read-only tensors so we always have to copy read-only arrays.
+        """
+        if copy or (isinstance(arr, np.ndarray) and not arr.flags.writeable):
+            return torch.tensor(arr, **kwargs)
+        return torch.as_tensor(arr, **kwargs)
+
     def __len__(self):
         return len(self.X)
 
     def __getitem__(self, idx: int) -> tuple:
         return self.X[idx], self.y[idx]
+
+
+class TorchBatchLoader:
+    """
+    Batch-native replacement for a DataLoader over a TorchDataset.
+    Rather than indexing the dataset row by row and collating the results, the indices are sampled once per epoch
+    and each batch is sliced straight out of the stored tensors.
+    :param dataset: TorchDataset to load batches from.
+    :param batch_size: number of samples per batch.
+    :param shuffle: whether to randomly sample the indices every epoch.
+    :param num_samples: number of samples to draw per epoch (defaults to the length of the dataset). Like torch's
+        RandomSampler, values larger than the dataset draw multiple permutations.
+    :param generator: optional torch generator used for shuffling.
+    :param num_replicas: number of data-parallel processes to split each epoch's samples between. Like torch's
+        DistributedSampler, each replica gets an equal share and the remainder is dropped. When shuffling, every
+        replica's generator must be seeded the same so that they split the same permutation.
+    :param rank: which of the replicas this loader is for.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, dataset: TorchDataset, batch_size: int = 1, shuffle: bool = False, num_samples: int = None,
+                 generator: torch.Generator = None, num_replicas: int = 1, rank: int = 0):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.num_samples = len(dataset) if num_samples is None else num_samples
+        self.generator = generator
+        self.num_replicas = num_replicas
+        self.rank = rank
+        if self.num_samples <= 0:
+            raise ValueError(f"num_samples should be a positive integer value, but got num_samples={num_samples}")
+        if not shuffle and self.num_samples > len(dataset):
+            raise ValueError("num_samples can only exceed the length of the dataset when shuffling.")
+        if self.num_samples < num_replicas:
+            raise ValueError("num_samples must be at least the number of replicas.")
+    # pylint: enable=too-many-arguments
+
+    @property
+    def replica_samples(self) -> int:
+        """
+        Number of samples this replica loads per epoch.
+        """
+        return self.num_samples // self.num_replicas
+
+    def __len__(self):
+        return math.ceil(self.replica_samples / self.batch_size)
+
+    def _sample_indices(self) -> torch.Tensor:
+        """
+        Samples the indices for a single epoch without replacement, drawing full permutations until we have enough.
+        """
+        n = len(self.dataset)
+        perms = [torch.randperm(n, generator=self.generator) for _ in range(self.num_samples // n)]
+        if self.num_samples % n:
+            perms.append(torch.randperm(n, generator=self.generator)[:self.num_samples % n])
+        return torch.cat(perms).to(self.dataset.X.device)
+
+    def __iter__(self):
+        X, y = self.dataset.X, self.dataset.y
+        if not self.shuffle and self.num_replicas == 1:
+            for start in range(0, self.num_samples, self.batch_size):
+                end = min(start + self.batch_size, self.num_samples)
+                yield X[start:end], y[start:end]
+        else:
+            if self.shuffle:
+                indices = self._sample_indices()
+            else:
+                indices = torch.arange(self.num_samples, device=X.device)
+            if self.num_replicas > 1:
+                indices = indices[self.rank:self.replica_samples * self.num_replicas:self.num_replicas]
+            for start in range(0, self.replica_samples, self.batch_size):
+                batch_idx = indices[start:start + self.batch_size]
+                yield X[batch_idx], y[batch_idx]
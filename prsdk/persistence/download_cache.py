@@ -0,0 +1,251 @@
+"""
+Managed local cache of model snapshots downloaded from HuggingFace.
+"""
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from filelock import FileLock, Timeout
+from huggingface_hub import HfApi
+
+from prsdk.persistence.manifest import MANIFEST_NAME, verify_manifest
+
+COMMIT_HASH = re.compile(r"^[0-9a-f]{40}$")
+# Hidden file marking a snapshot whose download finished, left out of manifests like other hidden files
+COMPLETE_MARKER = ".complete"
+TEMP_PREFIX = ".tmp-"
+
+
+def dir_size(path: Path) -> int:
+    """
+    Total size in bytes of the files in a directory.
+    """
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def is_downloaded(path: Path, check_hashes: bool = False) -> bool:
+    """
+    Checks whether a directory holds a finished download from download_snapshot: it has to have been marked complete
+    and, if it has a manifest, match it.
+    :param path: the snapshot directory.
+    :param check_hashes: whether to hash the files against the manifest, or only check their sizes.
+    """
+    if not (path / COMPLETE_MARKER).exists():
+        return False
+    return not (path / MANIFEST_NAME).exists() or verify_manifest(path, check_hashes=check_hashes)
+
+
+def download_snapshot(api: HfApi, repo_id: str, target: Path, **hf_args):
+    """
+    Downloads a snapshot of a repo into a temporary directory next to target, verifies it against its manifest if it
+    has one, marks it complete and renames it into place. A half-finished download is therefore never found at target.
+    Anything already at target is deleted, so callers must only pass a target that doesn't exist or that they own,
+    like a snapshot previously downloaded by this function.
+    The temporary directory is named .tmp-<target name>-<random suffix> so that orphaned ones can be traced back to
+    the snapshot they were downloading.
+    :param api: HfApi client to download with.
+    :param repo_id: id of the repo.
+    :param target: directory to put the snapshot in.
+    :param hf_args: other arguments to pass to snapshot_download, like the revision and token.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_dir = Path(tempfile.mkdtemp(dir=target.parent, prefix=f"{TEMP_PREFIX}{target.name}-"))
+    try:
+        api.snapshot_download(repo_id=repo_id, **{**hf_args, "local_dir": temp_dir})
+        # HuggingFace keeps download metadata in the local dir which we don't need
+        shutil.rmtree(temp_dir / ".cache", ignore_errors=True)
+        if (temp_dir / MANIFEST_NAME).exists() and not verify_manifest(temp_dir):
+            revision = hf_args.get("revision") or "main"
+            raise IOError(f"Downloaded snapshot of {repo_id}@{revision} does not match its manifest.")
+        (temp_dir / COMPLETE_MARKER).touch()
+        if target.exists():
+            shutil.rmtree(target)
+        try:
+            os.rename(temp_dir, target)
+        except OSError:
+            # Without a lock another process may have renamed its download into place first
+            if not is_downloaded(target):
+                raise
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class DownloadCache:
+    """
+    Caches snapshots of HuggingFace repos on disk, one directory per repo and commit:
+        root/<org>--<name>/snapshots/<commit hash>/
+    alongside the repo's refs/ and locks/ directories.
+    Revisions are pinned: branches and tags are resolved to a commit hash whose snapshot never changes once
+    downloaded. The last resolution of each branch or tag is kept under refs/ so that cached snapshots can still be
+    found when the Hub can't be reached.
+    Snapshots are downloaded with download_snapshot into a temporary directory which is only renamed into place once
+    complete and, if the repo has a manifest.json (see HuggingFacePersistor.persist), once every file matches it. A
+    half-finished download is therefore never mistaken for a cached snapshot.
+    Processes fetching the same snapshot coordinate through a file lock so that only one of them downloads it. Use
+    checkout rather than fetch to keep holding the lock while loading the snapshot.
+    After every fetch, least recently fetched snapshots are evicted until the cache, including downloads in progress,
+    fits in max_bytes and snapshots not fetched within max_age seconds are removed. Snapshots locked by another
+    process, i.e. being downloaded or loaded, are skipped. Temporary directories left behind by processes that died
+    mid-download are removed.
+    :param root: directory to cache snapshots in.
+    :param max_bytes: maximum total size of the cached snapshots, or None for no limit.
+    :param max_age: seconds since a snapshot was last fetched after which it is evicted, or None for no limit.
+    :param verify_hits: whether to re-hash cached snapshots against their manifest on every fetch. Otherwise only
+        their file sizes are checked.
+    :param api: HfApi client used to resolve revisions and download snapshots (defaults to a new HfApi).
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, root: str | Path = "~/.cache/huggingface/project-resilience-cache", max_bytes: int = None,
+                 max_age: float = None, verify_hits: bool = False, api: HfApi = None):
+        self.root = Path(root).expanduser()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.verify_hits = verify_hits
+        self.api = api if api is not None else HfApi()
+    # pylint: enable=too-many-arguments
+
+    def repo_dir(self, repo_id: str) -> Path:
+        """
+        Directory holding a repo's snapshots and refs.
+        """
+        return self.root / repo_id.replace("/", "--")
+
+    def resolve(self, repo_id: str, revision: str = None, token: str = None) -> str:
+        """
+        Resolves a revision to a commit hash. Commit hashes are returned as is. Branches and tags are looked up on the
+        Hub, falling back to their last recorded resolution if the Hub can't be reached.
+        :param repo_id: id of the repo.
+        :param revision: commit hash, branch or tag (defaults to main).
+        :param token: optional HuggingFace token.
+        :return: the commit hash.
+        """
+        revision = revision or "main"
+        if COMMIT_HASH.match(revision):
+            return revision
+        ref_path = self.repo_dir(repo_id) / "refs" / revision
+        try:
+            commit = self.api.model_info(repo_id, revision=revision, token=token).sha
+        except OSError:
+            # Connection errors and the Hub's HTTP errors are all OSErrors
+            if ref_path.exists():
+                return ref_path.read_text(encoding="utf-8").strip()
+            raise
+        ref_path.parent.mkdir(parents=True, exist_ok=True)
+        ref_path.write_text(commit, encoding="utf-8")
+        return commit
+
+    def is_complete(self, snapshot: Path, check_hashes: bool) -> bool:
+        """
+        Checks whether a snapshot directory is complete. Snapshots without a manifest are trusted since they were
+        renamed into place after downloading.
+        """
+        if not snapshot.is_dir():
+            return False
+        if not (snapshot / MANIFEST_NAME).exists():
+            return True
+        return verify_manifest(snapshot, check_hashes=check_hashes)
+
+    @staticmethod
+    def lock_path(snapshot: Path) -> Path:
+        """
+        Path of the file lock guarding a snapshot, kept in the repo's locks directory.
+        """
+        lock_dir = snapshot.parent.parent / "locks"
+        lock_dir.mkdir(parents=True, exist_ok=True)
+        return lock_dir / f"{snapshot.name}.lock"
+
+    def fetch(self, repo_id: str, revision: str = None, token: str = None) -> Path:
+        """
+        Gets the local snapshot of a repo at a revision, downloading it if it isn't cached or is incomplete.
+        The snapshot's lock is released on return, so another process may evict it before it is used. Use checkout to
+        load it safely.
+        :param repo_id: id of the repo.
+        :param revision: commit hash, branch or tag (defaults to main).
+        :param token: optional HuggingFace token.
+        :return: path to the snapshot directory.
+        """
+        with self.checkout(repo_id, revision, token) as snapshot:
+            return snapshot
+
+    @contextmanager
+    def checkout(self, repo_id: str, revision: str = None, token: str = None) -> Iterator[Path]:
+        """
+        Fetches a snapshot like fetch and keeps holding its lock until the with block exits, so that other processes
+        can't evict or replace it while it is being loaded. Other processes fetching the same snapshot wait in the
+        meantime.
+        :param repo_id: id of the repo.
+        :param revision: commit hash, branch or tag (defaults to main).
+        :param token: optional HuggingFace token.
+        :return: context manager giving the path to the snapshot directory.
+        """
+        commit = self.resolve(repo_id, revision, token)
+        snapshots_dir = self.repo_dir(repo_id) / "snapshots"
+        snapshots_dir.mkdir(parents=True, exist_ok=True)
+        snapshot = snapshots_dir / commit
+        with FileLock(self.lock_path(snapshot)):
+            if not self.is_complete(snapshot, self.verify_hits):
+                download_snapshot(self.api, repo_id, snapshot, revision=commit, token=token)
+            # The snapshot's modification time records when it was last fetched
+            os.utime(snapshot)
+            self.evict(keep=snapshot)
+            yield snapshot
+
+    def snapshots(self) -> list[tuple[Path, float, int]]:
+        """
+        Lists the cached snapshots with when they were last fetched and their size in bytes.
+        """
+        listed = []
+        for snapshot in self.root.glob("*/snapshots/*"):
+            if snapshot.is_dir() and not snapshot.name.startswith("."):
+                listed.append((snapshot, snapshot.stat().st_mtime, dir_size(snapshot)))
+        return listed
+
+    def clean_temp_dirs(self, keep: Path = None) -> int:
+        """
+        Removes the temporary directories of downloads that aren't in progress anymore, i.e. whose snapshot isn't
+        locked, which are left behind when a process dies mid-download.
+        :param keep: snapshot whose lock is held by the caller, so that its temporary directories are orphaned.
+        :return: the total size in bytes of the temporary directories of downloads in progress.
+        """
+        in_progress = 0
+        for temp_dir in self.root.glob(f"*/snapshots/{TEMP_PREFIX}*"):
+            snapshot = temp_dir.parent / temp_dir.name[len(TEMP_PREFIX):].rsplit("-", 1)[0]
+            if snapshot == keep:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                continue
+            try:
+                with FileLock(self.lock_path(snapshot), timeout=0):
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+            except Timeout:
+                in_progress += dir_size(temp_dir)
+        return in_progress
+
+    def evict(self, keep: Path = None):
+        """
+        Removes orphaned temporary directories, snapshots older than max_age and then the least recently fetched
+        snapshots until the cache, including downloads in progress, fits in max_bytes. Snapshots locked by another
+        process and the keep snapshot are never removed.
+        :param keep: snapshot to keep regardless of the limits, whose lock must be held by the caller.
+        """
+        in_progress = self.clean_temp_dirs(keep)
+        if self.max_bytes is None and self.max_age is None:
+            return
+        listed = sorted(self.snapshots(), key=lambda item: item[1])
+        total = in_progress + sum(size for _, _, size in listed)
+        now = time.time()
+        for snapshot, last_fetched, size in listed:
+            expired = self.max_age is not None and now - last_fetched > self.max_age
+            over_size = self.max_bytes is not None and total > self.max_bytes
+            if snapshot == keep or not (expired or over_size):
+                continue
+            try:
+                with FileLock(self.lock_path(snapshot), timeout=0):
+                    shutil.rmtree(snapshot)
+            except Timeout:
+                continue
+            total -= size
@@ -0,0 +1,81 @@
+"""
+Content-hash manifests of saved model directories, used to only upload the files that changed and to verify that
+downloaded snapshots are complete.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+MANIFEST_NAME = "manifest.json"
+
+
+def hash_file(path: Path, block_size: int = 2 ** 20) -> str:
+    """
+    Computes the SHA-256 hex digest of a file, reading it in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while block := file.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_manifest(path: Path, files: list[str] = None) -> dict[str, dict]:
+    """
+    Hashes the files of a model directory. By default every file is hashed, skipping the manifest itself and hidden
+    files like HuggingFace's download metadata.
+    :param path: the model directory.
+    :param files: optional list of the only files to hash, relative to the directory in posix form, e.g. the files a
+        serializer saved. Other files left in the directory are then ignored.
+    :return: dictionary of each file's path relative to the directory, in posix form, to its sha256 and size.
+    """
+    if files is not None:
+        return {file: {"sha256": hash_file(path / file), "size": (path / file).stat().st_size}
+                for file in sorted(set(files)) if file != MANIFEST_NAME}
+    manifest = {}
+    for file in sorted(path.rglob("*")):
+        rel_path = file.relative_to(path)
+        if not file.is_file() or rel_path.as_posix() == MANIFEST_NAME or \
+                any(part.startswith(".") for part in rel_path.parts):
+            continue
+        manifest[rel_path.as_posix()] = {"sha256": hash_file(file), "size": file.stat().st_size}
+    return manifest
+
+
+def write_manifest(path: Path, files: list[str] = None) -> dict[str, dict]:
+    """
+    Builds the manifest of a model directory and writes it to manifest.json inside it.
+    :param path: the model directory.
+    :param files: optional list of the only files to include, see build_manifest.
+    :return: the manifest.
+    """
+    manifest = build_manifest(path, files)
+    with open(path / MANIFEST_NAME, "w", encoding="utf-8") as file:
+        json.dump({"files": manifest}, file, indent=4)
+    return manifest
+
+
+def read_manifest(manifest_path: Path) -> dict[str, dict]:
+    """
+    Reads the files section of a manifest.json.
+    """
+    with open(manifest_path, "r", encoding="utf-8") as file:
+        return json.load(file)["files"]
+
+
+def verify_manifest(path: Path, check_hashes: bool = True) -> bool:
+    """
+    Checks that every file listed in a model directory's manifest exists with the listed size and hash.
+    :param path: the model directory.
+    :param check_hashes: whether to hash the files, or only check their sizes.
+    :return: False if the manifest is missing or any file doesn't match it.
+    """
+    if not (path / MANIFEST_NAME).exists():
+        return False
+    for rel_path, info in read_manifest(path / MANIFEST_NAME).items():
+        file = path / rel_path
+        if not file.is_file() or file.stat().st_size != info["size"]:
+            return False
+        if check_hashes and hash_file(file) != info["sha256"]:
+            return False
+    return True
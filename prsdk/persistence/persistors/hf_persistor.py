@@ -1,17 +1,43 @@
 """
 Persistor for models to and from HuggingFace repo.
 """
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from huggingface_hub import HfApi, snapshot_download
+from huggingface_hub import CommitOperationAdd, CommitOperationDelete, HfApi
+from huggingface_hub.utils import EntryNotFoundError, RepositoryNotFoundError, RevisionNotFoundError
 
+from prsdk.persistence.download_cache import COMPLETE_MARKER, DownloadCache, download_snapshot, is_downloaded
+from prsdk.persistence.manifest import MANIFEST_NAME, read_manifest, write_manifest
 from prsdk.persistence.persistors.persistor import Persistor
+from prsdk.persistence.registry import ModelRegistry, snapshot_fingerprint
+from prsdk.persistence.serializers.serializer import Serializer
 
 
 class HuggingFacePersistor(Persistor):
     """
     Persists models to and from HuggingFace repo.
+    Loaded models can be cached in a ModelRegistry, keyed by repo id, revision and serializer, so that loading the
+    same model again in the process returns the already loaded model. Pass PROCESS_REGISTRY from
+    prsdk.persistence.registry to share models between all the persistors in a process. Models served from the
+    registry are shared, so they shouldn't be modified.
+    Uploads are incremental: a manifest of the hashes of the files the serializer saved is uploaded alongside them,
+    and only files whose hashes differ from the repo's manifest are uploaded. Other files in the save directory, like
+    ones left over from an earlier save, are neither listed nor uploaded.
+    Downloads can be managed by a DownloadCache, which pins revisions, verifies snapshots and bounds the size of the
+    cache.
+    :param serializer: serializer used to save and load models.
+    :param registry: optional registry to cache loaded models in.
+    :param api: HfApi client to upload and download with (defaults to a new HfApi).
+    :param cache: optional DownloadCache to download models through.
     """
+    def __init__(self, serializer: Serializer, registry: ModelRegistry = None, api: HfApi = None,
+                 cache: DownloadCache = None):
+        super().__init__(serializer)
+        self.registry = registry
+        self.api = api if api is not None else HfApi()
+        self.cache = cache
+
     def write_readme(self, model_path: str):
         """
         Writes readme to model save path to upload.
@@ -21,51 +47,111 @@ class HuggingFacePersistor(Persistor):
         with open(model_path / "README.md", "w", encoding="utf-8") as file:
             file.write("This is a demo model created for Project Resilience")
 
-    def persist(self, model, model_path: Path, repo_id: str, **persistence_args):
+    def remote_manifest(self, repo_id: str, token: str = None) -> dict[str, dict]:
+        """
+        Downloads the manifest of the files last persisted to a repo.
+        :return: the manifest, or an empty dictionary if the repo has none.
+        """
+        try:
+            manifest_path = self.api.hf_hub_download(repo_id=repo_id, filename=MANIFEST_NAME, repo_type="model",
+                                                     token=token)
+        except (EntryNotFoundError, RepositoryNotFoundError, RevisionNotFoundError):
+            return {}
+        return read_manifest(Path(manifest_path))
+
+    def persist(self, model, model_path: Path, repo_id: str, **persistence_args) -> list[str]:
         """
         Serializes the model to a local path using the file_serializer,
-        then uploads the model to a HuggingFace repo.
+        then uploads the files that changed since it was last persisted to a HuggingFace repo.
+        Files listed in the repo's previous manifest that are no longer saved are deleted from the repo.
+        :return: list of the files uploaded, empty if nothing changed.
         """
+        model_path = Path(model_path)
         # Save model and write readme
-        self.serializer.save(model, model_path)
+        saved_files = self.serializer.save(model, model_path)
         self.write_readme(model_path)
+        # Serializers that don't report their files fall back to everything in the directory
+        manifest = write_manifest(model_path, None if saved_files is None else saved_files + ["README.md"])
 
         # Get token if it exists
         token = persistence_args.get("token", None)
 
-        api = HfApi()
         # Create repo if it doesn't exist
-        api.create_repo(
+        self.api.create_repo(
             repo_id=repo_id,
             repo_type="model",
             exist_ok=True,
             token=token
         )
 
-        # Upload model to repo
-        api.upload_folder(
-            folder_path=model_path,
+        remote = self.remote_manifest(repo_id, token)
+        changed = [file for file, info in manifest.items() if remote.get(file) != info]
+        deleted = [file for file in remote if file not in manifest]
+        if not changed and not deleted:
+            return []
+
+        operations = [CommitOperationAdd(path_in_repo=file, path_or_fileobj=model_path / file)
+                      for file in changed + [MANIFEST_NAME]]
+        operations += [CommitOperationDelete(path_in_repo=file) for file in deleted]
+        self.api.create_commit(
             repo_id=repo_id,
+            operations=operations,
+            commit_message=f"Update {', '.join(changed + deleted)}",
             repo_type="model",
             token=token
         )
+        return changed
+
+    def persist_many(self, models: list[tuple], max_workers: int = 4, **persistence_args) -> list[list[str]]:
+        """
+        Persists several models concurrently with a bounded pool of threads.
+        :param models: list of (model, model_path, repo_id) tuples to pass to persist.
+        :param max_workers: maximum number of models to serialize and upload at once.
+        :param persistence_args: additional arguments to pass to persist for every model.
+        :return: the files uploaded for each model, in the same order as models.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self.persist, model, model_path, repo_id, **persistence_args)
+                       for model, model_path, repo_id in models]
+            return [future.result() for future in futures]
 
     def from_pretrained(self, path_or_url: str, **hf_args):
         """
         Loads a model from a HuggingFace repo pointed to by path_or_url.
         Defaults to downloading to the HuggingFace cache directory. If you want to download to a different directory,
-        pass the local_dir argument in hf_args.
+        pass the local_dir argument in hf_args. If local_dir doesn't exist, the snapshot is downloaded next to it and
+        only renamed into place once complete and matching its manifest. A local_dir downloaded that way is downloaded
+        again if its files no longer match the manifest. Any other existing local_dir, e.g. filled in by hand, is
+        loaded as is and never modified.
+        If the persistor has a DownloadCache, the model is fetched through it instead, at the revision in hf_args, and
+        loaded while holding the snapshot's lock so that other processes can't evict it in the meantime.
         :param path_or_url: path to the model or url to the huggingface repo.
         :param hf_args: arguments to pass to the snapshot_download function from huggingface.
         """
         path = Path(path_or_url)
         if path.exists() and path.is_dir():
-            return self.serializer.load(path)
+            return self.load_local(path_or_url, path, hf_args.get("revision"))
+        if self.cache is not None:
+            with self.cache.checkout(path_or_url, hf_args.get("revision"), hf_args.get("token")) as local_dir:
+                return self.load_local(path_or_url, local_dir, hf_args.get("revision"))
 
         url_path = path_or_url.replace("/", "--")
-        local_dir = hf_args.get("local_dir", f"~/.cache/huggingface/project-resilience/{url_path}")
-        if not Path(local_dir).exists() or not Path(local_dir).is_dir():
-            hf_args["local_dir"] = local_dir
-            snapshot_download(repo_id=path_or_url, **hf_args)
+        hf_args = dict(hf_args)
+        local_dir = Path(hf_args.pop("local_dir", f"~/.cache/huggingface/project-resilience/{url_path}")).expanduser()
+        # Only replace directories we downloaded ourselves, which are marked complete
+        if not local_dir.exists() or ((local_dir / COMPLETE_MARKER).exists() and not is_downloaded(local_dir)):
+            download_snapshot(self.api, path_or_url, local_dir, **hf_args)
+        return self.load_local(path_or_url, local_dir, hf_args.get("revision"))
 
-        return self.serializer.load(Path(local_dir))
+    def load_local(self, path_or_url: str, local_dir: Path, revision: str = None):
+        """
+        Loads a model from its local directory, through the registry if the persistor has one.
+        :param path_or_url: path to the model or url to the huggingface repo, used to key the registry.
+        :param local_dir: directory the model was downloaded to.
+        :param revision: revision the model was downloaded at, used to key the registry.
+        """
+        if self.registry is None:
+            return self.serializer.load(local_dir)
+        serializer_key = (type(self.serializer).__qualname__, repr(sorted(vars(self.serializer).items())))
+        key = (path_or_url, revision, serializer_key)
+        return self.registry.get(key, lambda: self.serializer.load(local_dir), snapshot_fingerprint(local_dir))
@@ -0,0 +1,181 @@
+"""
+In-memory registry of loaded models so that repeatedly loading the same model in a process only reads it from disk
+once.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Hashable
+
+import numpy as np
+
+
+def estimate_bytes(obj) -> int:
+    """
+    Estimates the memory used by a model by summing the sizes of the numpy arrays and torch tensors reachable from it.
+    Torch modules are walked through their state dicts and sklearn objects without a __dict__, like trees, through
+    their pickled state.
+    """
+    # Objects are kept alive while walking so that the ids of temporary states can't be reused
+    seen = {}
+    # Models can only hold tensors if torch was imported, and we don't want to import it ourselves
+    torch = sys.modules.get("torch")
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or item is None or isinstance(item, (str, bytes, int, float, bool)):
+            continue
+        seen[id(item)] = item
+        if isinstance(item, np.ndarray):
+            total += item.nbytes
+        elif torch is not None and isinstance(item, torch.Tensor):
+            total += item.element_size() * item.nelement()
+        elif torch is not None and isinstance(item, torch.nn.Module):
+            # TorchScript modules keep their parameters out of their __dict__
+            stack.extend(item.state_dict(keep_vars=True).values())
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.append(vars(item))
+        elif type(item).__module__.startswith("sklearn"):
+            stack.append(item.__getstate__())
+    return total
+
+
+def snapshot_fingerprint(path: Path) -> tuple:
+    """
+    Fingerprints a local model directory by the path, size and modification time of each of its files, which changes
+    whenever the snapshot is updated without having to hash the files.
+    """
+    return tuple(sorted((str(file.relative_to(path)), stat.st_size, stat.st_mtime_ns)
+                        for file in path.rglob("*") if file.is_file() and (stat := file.stat())))
+
+
+# pylint: disable=too-many-instance-attributes
+class ModelRegistry:
+    """
+    Thread-safe LRU cache of loaded models.
+    Models are looked up by a key, for example the repo id, revision and serializer used to load them. Concurrent
+    misses on the same key are single-flight: one thread loads the model while the others wait for its result.
+    Entries can carry a fingerprint of the files they were loaded from. Getting an entry with a different fingerprint
+    invalidates it, calling the invalidation hooks with its key, and loads the model again.
+    Models are evicted least recently used first once there are more than max_models or their estimated sizes add up
+    to more than max_bytes. The most recently loaded model is never evicted.
+    :param max_models: maximum number of models to keep, or None for no limit.
+    :param max_bytes: maximum total estimated size of the models to keep, or None for no limit.
+    :param size_fn: function estimating the size of a model in bytes (defaults to estimate_bytes).
+    """
+    def __init__(self, max_models: int = None, max_bytes: int = None, size_fn: Callable[[object], int] = None):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.size_fn = size_fn if size_fn is not None else estimate_bytes
+        # key -> (model, fingerprint, size)
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.hooks = []
+        self.lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0, "invalidations": 0}
+
+    def add_invalidation_hook(self, hook: Callable[[Hashable], None]):
+        """
+        Registers a function to call with the key of every invalidated entry.
+        """
+        self.hooks.append(hook)
+
+    @property
+    def stats(self) -> dict:
+        """
+        Hit, miss, load, eviction and invalidation counts along with the number and total size of cached models.
+        """
+        with self.lock:
+            return {**self.counts, "models": len(self.entries),
+                    "bytes": sum(size for _, _, size in self.entries.values())}
+
+    def get(self, key: Hashable, loader: Callable[[], object], fingerprint: Hashable = None):
+        """
+        Gets the model for key, loading it with loader if it isn't cached or its fingerprint changed.
+        :param key: hashable key identifying the model.
+        :param loader: function loading the model, called at most once for concurrent misses on the same key.
+        :param fingerprint: optional fingerprint of the files the model is loaded from.
+        :return: the cached or newly loaded model.
+        """
+        invalidated = False
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] != fingerprint:
+                del self.entries[key]
+                self.counts["invalidations"] += 1
+                invalidated = True
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.counts["hits"] += 1
+                return entry[0]
+            self.counts["misses"] += 1
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+        if invalidated:
+            self.run_hooks(key)
+        if not leader:
+            return future.result()
+
+        try:
+            model = loader()
+            size = self.size_fn(model)
+        except BaseException as err:
+            with self.lock:
+                del self.in_flight[key]
+            future.set_exception(err)
+            raise
+        with self.lock:
+            del self.in_flight[key]
+            self.counts["loads"] += 1
+            self.entries[key] = (model, fingerprint, size)
+            self.evict()
+        future.set_result(model)
+        return model
+
+    def evict(self):
+        """
+        Evicts least recently used models until the limits are met. Must be called with the lock held.
+        """
+        def over_limits() -> bool:
+            if self.max_models is not None and len(self.entries) > self.max_models:
+                return True
+            return self.max_bytes is not None and sum(size for _, _, size in self.entries.values()) > self.max_bytes
+
+        while len(self.entries) > 1 and over_limits():
+            self.entries.popitem(last=False)
+            self.counts["evictions"] += 1
+
+    def invalidate(self, key: Hashable = None):
+        """
+        Drops the model for key, or every model if key is None, and calls the invalidation hooks for each.
+        """
+        with self.lock:
+            keys = list(self.entries) if key is None else [key] if key in self.entries else []
+            for k in keys:
+                del self.entries[k]
+            self.counts["invalidations"] += len(keys)
+        for k in keys:
+            self.run_hooks(k)
+
+    def run_hooks(self, key: Hashable):
+        """
+        Calls each invalidation hook with key.
+        """
+        for hook in self.hooks:
+            hook(key)
+# pylint: enable=too-many-instance-attributes
+
+
+# Registry that can be shared by all the persistors in a process
+PROCESS_REGISTRY = ModelRegistry()
@@ -0,0 +1,78 @@
+"""
+Pickle-free file format for named numpy arrays that can be memory-mapped without copying.
+The file starts with the length of a JSON header as a little-endian uint64, followed by the header itself and then
+the raw array data. The header maps each array's name to its dtype, shape and byte offset into the data. Offsets are
+aligned so that every array can be viewed in place.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+ALIGNMENT = 64
+
+
+def align(offset: int) -> int:
+    """
+    Rounds offset up to the next multiple of ALIGNMENT.
+    """
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_arrays(arrays: dict[str, np.ndarray], path: Path, metadata: dict = None):
+    """
+    Writes named arrays to a single flat file.
+    :param arrays: dictionary of array name to array.
+    :param path: path of the file to write.
+    :param metadata: optional JSON-serializable dictionary stored in the header.
+    """
+    header = {"__metadata__": metadata or {}}
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.asarray(arr)
+        header[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset = align(offset + arr.nbytes)
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = align(8 + len(header_bytes))
+
+    with open(path, "wb") as file:
+        file.write(len(header_bytes).to_bytes(8, "little"))
+        file.write(header_bytes)
+        for name, arr in arrays.items():
+            file.seek(data_start + header[name]["offset"])
+            file.write(np.ascontiguousarray(arr).tobytes())
+        # Pad the end so the last array's region is fully backed by the file
+        file.truncate(data_start + offset)
+
+
+def load_arrays(path: Path, mmap_mode: str = "c") -> tuple[dict[str, np.ndarray], dict]:
+    """
+    Loads the named arrays from a flat file.
+    With the default copy-on-write mmap_mode the arrays view the file directly, so processes loading the same file
+    share its pages in the OS page cache until they write to them.
+    :param path: path of the file to read.
+    :param mmap_mode: mode passed to np.memmap ("r" or "c"), or None to read the arrays into memory.
+    :return: dictionary of array name to array, and the metadata stored with them.
+    """
+    with open(path, "rb") as file:
+        header_len = int.from_bytes(file.read(8), "little")
+        header = json.loads(file.read(header_len).decode("utf-8"))
+    metadata = header.pop("__metadata__", {})
+    data_start = align(8 + header_len)
+
+    if mmap_mode is None:
+        with open(path, "rb") as file:
+            data = np.frombuffer(bytearray(file.read()), dtype=np.uint8)
+    elif header:
+        data = np.memmap(path, dtype=np.uint8, mode=mmap_mode)
+    else:
+        return {}, metadata
+
+    arrays = {}
+    for name, info in header.items():
+        dtype = np.dtype(info["dtype"])
+        start = data_start + info["offset"]
+        count = int(np.prod(info["shape"], dtype=np.int64))
+        arr = data[start:start + count * dtype.itemsize].view(dtype).reshape(info["shape"])
+        arrays[name] = np.asarray(arr)
+    return arrays, metadata
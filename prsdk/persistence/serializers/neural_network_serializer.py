@@ -5,24 +5,40 @@ import json
 from pathlib import Path
 
 import joblib
+import numpy as np
 import torch
 
+from prsdk.persistence.serializers.flat_arrays import load_arrays, save_arrays
 from prsdk.persistence.serializers.serializer import Serializer
 from prsdk.predictors.neural_network.torch_neural_net import TorchNeuralNet
-from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor, new_scaler
 
 
 class NeuralNetSerializer(Serializer):
     """
     Serializer for the NeuralNetPredictor.
     Saves config necessary to recreate the model, the model itself, and the scaler for the data to a folder.
+    If the predictor has a TorchScript inference model (see NeuralNetPredictor.compile_model) it is saved as well so
+    that it can be loaded for serving without rebuilding the model.
+    The weights and scaler are saved either as a pickled torch state dict and joblib scaler, or in a flat pickle-free
+    file (see flat_arrays) that is memory-mapped on load. Memory-mapped weights are copy-on-write views of the file, so
+    serving processes loading the same model share its pages in the OS page cache instead of each keeping a copy.
+    The format is recorded in config.json for load to read, and saving removes the other format's files from the
+    folder.
+    :param weight_format: "torch" to save model.pt and scaler.joblib, or "flat" to save weights.bin.
     """
-    def save(self, model: NeuralNetPredictor, path: Path):
+    def __init__(self, weight_format: str = "torch"):
+        if weight_format not in ("torch", "flat"):
+            raise ValueError(f"Unsupported weight format {weight_format}.")
+        self.weight_format = weight_format
+
+    def save(self, model: NeuralNetPredictor, path: Path) -> list[str]:
         """
         Saves model, config, and scaler into format for loading.
         Generates path to folder if it does not exist.
         :param model: the neural network predictor to save.
         :param path: path to folder to save model files.
+        :return: the names of the files saved.
         """
         if model.model is None:
             raise ValueError("Model not fitted yet.")
@@ -39,39 +55,115 @@ class NeuralNetSerializer(Serializer):
             "batch_size": model.batch_size,
             "optim_params": model.optim_params,
             "train_pct": model.train_pct,
-            "step_lr_params": model.step_lr_params
+            "step_lr_params": model.step_lr_params,
+            "patience": model.patience,
+            "min_delta": model.min_delta,
+            "precision": model.precision,
+            "weight_format": self.weight_format
         }
+        save_inference = isinstance(model.inference_model, torch.jit.ScriptModule)
+        if save_inference:
+            config["inference_fused"] = model.fused
         with open(path / "config.json", "w", encoding="utf-8") as file:
             json.dump(config, file)
         # Put model on CPU before saving
         model.model.to("cpu")
-        torch.save(model.model.state_dict(), path / "model.pt")
-        joblib.dump(model.scaler, path / "scaler.joblib")
+        if self.weight_format == "flat":
+            self.save_flat(model, path / "weights.bin")
+            saved_files, stale_files = ["config.json", "weights.bin"], ["model.pt", "scaler.joblib"]
+        else:
+            torch.save(model.model.state_dict(), path / "model.pt")
+            joblib.dump(model.scaler, path / "scaler.joblib")
+            saved_files, stale_files = ["config.json", "model.pt", "scaler.joblib"], ["weights.bin"]
+        # Don't leave behind weights in the other format from a previous save
+        for file in stale_files:
+            (path / file).unlink(missing_ok=True)
+        if save_inference:
+            model.inference_model.to("cpu")
+            torch.jit.save(model.inference_model, path / "inference.pt")
+            saved_files.append("inference.pt")
+        else:
+            # Don't leave behind an inference model from a previous save for load to pick up
+            (path / "inference.pt").unlink(missing_ok=True)
+        return saved_files
 
-    def load(self, path: Path) -> NeuralNetPredictor:
+    def load(self, path: Path, inference_only: bool = False) -> NeuralNetPredictor:
         """
         Loads a model from a given folder. Creates empty model with config, then loads model state dict and scaler.
+        If a TorchScript inference model was saved it is loaded as the predictor's inference model.
         NOTE: We don't put the model back on the device it was trained on. This has to be done manually.
         :param path: path to folder containing model files.
+        :param inference_only: only load the saved inference model, skipping rebuilding the model from its config.
+            The resulting predictor can predict but not be refit or saved.
         """
         if not path.exists() or not path.is_dir():
             raise FileNotFoundError(f"Path {path} does not exist.")
-        if not (path / "config.json").exists() or \
-            not (path / "model.pt").exists() or \
-                not (path / "scaler.joblib").exists():
+        if not (path / "config.json").exists():
             raise FileNotFoundError("Model files not found in path.")
-
-        # Initialize model with config
         with open(path / "config.json", "r", encoding="utf-8") as file:
             config = json.load(file)
+        # Models saved before the format was recorded have weights.bin only if they were saved flat
+        weight_format = config.pop("weight_format", "flat" if (path / "weights.bin").exists() else "torch")
+        flat = weight_format == "flat"
+        weight_files = ["weights.bin"] if flat else ["scaler.joblib"]
+        if inference_only:
+            weight_files.append("inference.pt")
+        elif not flat:
+            weight_files.append("model.pt")
+        if not all((path / file).exists() for file in weight_files):
+            raise FileNotFoundError("Model files not found in path.")
+
+        # Initialize model with config
         nnp = NeuralNetPredictor(config)
+        if flat:
+            arrays, metadata = load_arrays(path / "weights.bin")
+            nnp.scaler = self.scaler_from_arrays(arrays, metadata)
+            nnp.name_scaler_features()
+        else:
+            nnp.scaler = joblib.load(path / "scaler.joblib")
+
+        if (path / "inference.pt").exists():
+            nnp.inference_model = torch.jit.load(path / "inference.pt", map_location="cpu")
+            nnp.fused = config.get("inference_fused", False)
+        if inference_only:
+            return nnp
 
-        nnp.model = TorchNeuralNet(len(config["features"]),
-                                   config["hidden_sizes"],
-                                   config["linear_skip"],
-                                   config["dropout"])
-        # Set map_location to CPU to avoid issues with GPU availability
-        nnp.model.load_state_dict(torch.load(path / "model.pt", map_location="cpu"))
+        model_args = (len(config["features"]), config["hidden_sizes"], config["linear_skip"], config["dropout"],
+                      len(nnp.labels))
+        if flat:
+            # Point the parameters at the memory-mapped arrays, freeing the freshly initialized weights
+            nnp.model = TorchNeuralNet(*model_args)
+            state_dict = {name[len("model."):]: torch.from_numpy(arr)
+                          for name, arr in arrays.items() if name.startswith("model.")}
+            nnp.model.load_state_dict(state_dict, assign=True)
+        else:
+            nnp.model = TorchNeuralNet(*model_args)
+            # Set map_location to CPU to avoid issues with GPU availability
+            nnp.model.load_state_dict(torch.load(path / "model.pt", map_location="cpu"))
         nnp.model.eval()
-        nnp.scaler = joblib.load(path / "scaler.joblib")
         return nnp
+
+    @staticmethod
+    def save_flat(model: NeuralNetPredictor, path: Path):
+        """
+        Saves the model's state dict and the scaler's statistics as plain arrays in a flat file.
+        """
+        arrays = {f"model.{name}": tensor.detach().numpy() for name, tensor in model.model.state_dict().items()}
+        for attr in ["mean_", "var_", "scale_"]:
+            arrays[f"scaler.{attr}"] = getattr(model.scaler, attr)
+        metadata = {"n_samples_seen_": np.asarray(model.scaler.n_samples_seen_).tolist()}
+        save_arrays(arrays, path, metadata)
+
+    @staticmethod
+    def scaler_from_arrays(arrays: dict[str, np.ndarray], metadata: dict):
+        """
+        Rebuilds a fitted StandardScaler from the statistics saved by save_flat.
+        """
+        scaler = new_scaler()
+        for attr in ["mean_", "var_", "scale_"]:
+            setattr(scaler, attr, np.array(arrays[f"scaler.{attr}"]))
+        scaler.n_samples_seen_ = np.asarray(metadata["n_samples_seen_"])
+        if scaler.n_samples_seen_.ndim == 0:
+            scaler.n_samples_seen_ = scaler.n_samples_seen_.item()
+        scaler.n_features_in_ = len(scaler.mean_)
+        return scaler
@@ -9,15 +9,16 @@ class Serializer(ABC):
     """
     Abstract class responsible for saving and loading predictor/prescriptor models locally.
     Save and load should be compatible with each other but don't necessarily have to be the same as other models.
-    Save should take an object and save it to a path.
+    Save should take an object and save it to a path, returning the files it wrote.
     Load should take a path and return an object.
     """
     @abstractmethod
-    def save(self, model, path: Path) -> None:
+    def save(self, model, path: Path) -> list[str]:
         """
         Saves a model to disk.
         :param model: The model as a python object to save.
         :param path: The path to save the model to.
+        :return: The paths of the files saved, relative to path in posix form.
         """
         raise NotImplementedError("Saving not implemented")
 
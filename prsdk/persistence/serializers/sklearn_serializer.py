@@ -1,46 +1,113 @@
 """
 Serializer for the SKLearnPredictor class.
 """
+import importlib
 import json
 from pathlib import Path
 
 import joblib
 
+from prsdk.persistence.serializers.flat_arrays import load_arrays, save_arrays
 from prsdk.persistence.serializers.serializer import Serializer
+from prsdk.predictors.sklearn_predictors.compiled_forest import CompiledForest
 from prsdk.predictors.sklearn_predictors.sklearn_predictor import SKLearnPredictor
 
 
 class SKLearnSerializer(Serializer):
     """
     Serializer for the SKLearnPredictor.
-    Uses joblib to save the model and json to save the config used to load it.
+    Uses joblib to save the model and json to save the config used to load it, along with the predictor's class so
+    that subclasses like LinearRegressionPredictor are loaded as themselves.
+    Uncompressed saves store the model's numpy arrays raw inside model.joblib, so that they can be memory-mapped on
+    load and shared between the processes loading the same file through the OS page cache. Compressed saves are
+    smaller to transfer but have to be decompressed into memory by every process that loads them.
+    NOTE: sklearn's trees copy their node arrays when unpickled, so memory-mapping saves the read buffer but not the
+    copy of a forest's trees. Forests compiled with RandomForestPredictor.compile_forest are also saved as flat node
+    arrays in forest.bin (see flat_arrays), which are memory-mapped on load without copying.
+    :param compress: joblib compression level from 0 to 9, or a (method, level) tuple like ("gzip", 3).
+    :param mmap_mode: mode passed to joblib.load to memory-map the arrays of uncompressed saves, e.g. "r". Ignored
+        for compressed saves.
     """
-    def save(self, model: SKLearnPredictor, path: Path):
+    def __init__(self, compress: int | tuple[str, int] = 0, mmap_mode: str = None):
+        self.compress = compress
+        self.mmap_mode = mmap_mode
+
+    def save(self, model: SKLearnPredictor, path: Path) -> list[str]:
         """
         Saves saves model and features into format for loading.
         Generates path to folder if it does not exist.
         :param path: path to folder to save model files.
+        :return: the names of the files saved.
         """
         path.mkdir(parents=True, exist_ok=True)
 
+        predictor_class = f"{type(model).__module__}.{type(model).__qualname__}"
         with open(path / "config.json", "w", encoding="utf-8") as file:
-            json.dump(model.config, file)
-        joblib.dump(model.model, path / "model.joblib")
+            json.dump({**model.config, "predictor_class": predictor_class}, file)
+        joblib.dump(model.model, path / "model.joblib", compress=self.compress)
+        saved_files = ["config.json", "model.joblib"]
+        if isinstance(model.inference_model, CompiledForest):
+            arrays, metadata = model.inference_model.to_arrays()
+            save_arrays(arrays, path / "forest.bin", metadata)
+            saved_files.append("forest.bin")
+        else:
+            # Don't leave behind a compiled forest from a previous save for load to pick up
+            (path / "forest.bin").unlink(missing_ok=True)
+        return saved_files
 
-    def load(self, path: Path) -> "SKLearnPredictor":
+    def load(self, path: Path, inference_only: bool = False) -> "SKLearnPredictor":
         """
-        Loads saved model and config from a local folder.
+        Loads saved model and config from a local folder into the class of predictor that was saved, or a plain
+        SKLearnPredictor for saves that didn't record it.
+        If a compiled forest was saved it is loaded as the predictor's inference model.
         :param path: path to folder to load model files from.
+        :param inference_only: only load the saved compiled forest, skipping unpickling the model. The resulting
+            predictor can predict but not be refit or saved.
         """
         load_path = Path(path)
         if not load_path.exists() or not load_path.is_dir():
             raise FileNotFoundError(f"Path {path} does not exist.")
-        if not (load_path / "config.json").exists() or not (load_path / "model.joblib").exists():
+        model_file = "forest.bin" if inference_only else "model.joblib"
+        if not (load_path / "config.json").exists() or not (load_path / model_file).exists():
             raise FileNotFoundError("Model files not found in path.")
 
         with open(load_path / "config.json", "r", encoding="utf-8") as file:
             config = json.load(file)
+        predictor_class = self.predictor_class(config.pop("predictor_class", None))
 
-        model = joblib.load(load_path / "model.joblib")
-        sklearn_predictor = SKLearnPredictor(model, config)
+        model = None
+        if not inference_only:
+            mmap_mode = None if self.is_compressed(load_path / "model.joblib") else self.mmap_mode
+            model = joblib.load(load_path / "model.joblib", mmap_mode=mmap_mode)
+        if predictor_class is SKLearnPredictor:
+            sklearn_predictor = SKLearnPredictor(model, config)
+        else:
+            # Subclasses construct their own model from the config, which we replace with the saved one
+            sklearn_predictor = predictor_class(config)
+            sklearn_predictor.model = model
+        if (load_path / "forest.bin").exists():
+            sklearn_predictor.inference_model = CompiledForest(*load_arrays(load_path / "forest.bin"))
         return sklearn_predictor
+
+    @staticmethod
+    def predictor_class(name: str | None) -> type[SKLearnPredictor]:
+        """
+        Imports the predictor class recorded by save as its module path and qualified name.
+        """
+        if name is None:
+            return SKLearnPredictor
+        module_name, class_name = name.rsplit(".", 1)
+        predictor_class = getattr(importlib.import_module(module_name), class_name, None)
+        if not isinstance(predictor_class, type) or not issubclass(predictor_class, SKLearnPredictor):
+            raise ValueError(f"Saved predictor class {name} is not an SKLearnPredictor.")
+        return predictor_class
+
+    @staticmethod
+    def is_compressed(path: Path) -> bool:
+        """
+        Checks whether a joblib file was saved compressed. Uncompressed pickles start with the PROTO opcode whereas
+        compressed files start with their compressor's magic number.
+        joblib can fail to memory-map compressed files rather than ignoring mmap_mode so we have to check ourselves.
+        """
+        with open(path, "rb") as file:
+            return file.read(1) != b"\x80"
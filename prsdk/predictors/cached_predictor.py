@@ -0,0 +1,151 @@
+"""
+Predictor wrapper that memoizes predictions by feature row.
+Prescriptor search asks predictors about the same context and actions over and over, as elites survive across
+generations and candidates converge, so only the rows that haven't been seen before are passed to the wrapped predictor.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.predictor import Predictor
+
+
+class LRUCache:
+    """
+    Bounded mapping from row hashes to prediction rows that evicts the least recently used rows and counts its hits,
+    misses and evictions.
+    :param max_entries: maximum number of rows to cache before evicting the least recently used.
+    """
+    def __init__(self, max_entries: int):
+        if max_entries <= 0:
+            raise ValueError(f"max_entries must be positive, but got {max_entries}.")
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, keys: list[int]) -> tuple[list[tuple[int, np.ndarray]], list[int]]:
+        """
+        Looks up keys, marking the ones found as recently used.
+        :param keys: list of distinct keys to look up.
+        :return: list of the positions and values of the keys found, and list of the positions of the keys missing.
+        """
+        found = []
+        missing = []
+        for i, key in enumerate(keys):
+            value = self.entries.get(key)
+            if value is None:
+                missing.append(i)
+            else:
+                self.entries.move_to_end(key)
+                found.append((i, value))
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def put(self, key: int, value: np.ndarray):
+        """
+        Caches a value, evicting the least recently used values if the cache is full.
+        """
+        self.entries[key] = value
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Empties the cache. The counters are kept.
+        """
+        self.entries.clear()
+
+    @property
+    def stats(self) -> dict:
+        """
+        Hit, miss and eviction counts along with the current number of cached rows.
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self.entries)}
+
+
+class CachedPredictor(Predictor):
+    """
+    Wraps a NeuralNetPredictor or SKLearnPredictor and caches its predictions in a bounded LRU cache keyed by a hash of
+    each row's features.
+    The features are extracted with the wrapped predictor's ingest and hashed all at once with pandas'
+    hash_pandas_object. Keys are 64-bit hashes, so distinct rows colliding is possible but vanishingly unlikely.
+    Hits, misses and evictions are counted per distinct row in each call to predict.
+    The cache has to be cleared with clear() if the wrapped predictor is modified outside of fit.
+    :param predictor: the predictor to wrap. It must have been fit, or be fit through this wrapper, before predicting.
+    :param max_entries: maximum number of rows to cache before evicting the least recently used.
+    """
+    def __init__(self, predictor: Predictor, max_entries: int = 100000):
+        self.predictor = predictor
+        self.cache = LRUCache(max_entries)
+        self.columns = None
+        self.dtype = None
+
+    def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
+        """
+        Fits the wrapped predictor and clears the cache since its predictions are no longer valid.
+        """
+        results = self.predictor.fit(X_train, y_train)
+        self.clear()
+        return results
+
+    def clear(self):
+        """
+        Empties the cache. The counters are kept.
+        """
+        self.cache.clear()
+        self.columns = None
+        self.dtype = None
+
+    @property
+    def stats(self) -> dict:
+        """
+        Hit, miss and eviction counts along with the current number of cached rows.
+        """
+        return self.cache.stats
+
+    def hash_rows(self, context_actions_df: pd.DataFrame) -> np.ndarray:
+        """
+        Hashes the wrapped predictor's features of each row.
+        :param context_actions_df: DataFrame containing at least the wrapped predictor's features.
+        :return: array of uint64 hashes, one per row.
+        """
+        X = self.predictor.ingest(context_actions_df)
+        return pd.util.hash_pandas_object(pd.DataFrame(X, copy=False), index=False).to_numpy()
+
+    def predict(self, context_actions_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Serves the predictions of rows seen before from the cache and predicts the rest with the wrapped predictor.
+        Duplicate rows within the same call are only predicted once.
+        :param context_actions_df: DataFrame with context and actions input data.
+        :return: DataFrame with the wrapped predictor's labels and the same index as context_actions_df.
+        """
+        keys, first_idx, inverse = np.unique(self.hash_rows(context_actions_df), return_index=True,
+                                             return_inverse=True)
+        if len(keys) == 0:
+            return self.predictor.predict(context_actions_df)
+
+        cached, miss_pos = self.cache.lookup(keys.tolist())
+        if miss_pos:
+            miss_df = self.predictor.predict(context_actions_df.iloc[first_idx[miss_pos]])
+            if self.columns is None:
+                self.columns = miss_df.columns
+                self.dtype = miss_df.to_numpy().dtype
+            miss_values = miss_df.to_numpy(dtype=self.dtype)
+
+        values = np.empty((len(keys), len(self.columns)), dtype=self.dtype)
+        for i, value in cached:
+            values[i] = value
+        if miss_pos:
+            values[miss_pos] = miss_values
+            for i, row in zip(miss_pos, miss_values):
+                self.cache.put(keys[i].item(), row.copy())
+
+        return pd.DataFrame(values[inverse], index=context_actions_df.index, columns=self.columns, copy=False)
@@ -0,0 +1,176 @@
+"""
+Callbacks hooking into the NeuralNetPredictor training loop, used for logging, progress bars and profiling.
+"""
+import time
+
+import torch
+
+
+class Callback:
+    """
+    Base class for training callbacks. Every hook does nothing by default so subclasses only override the events they
+    need. The training loop only calls on_batch_end and only times the phases of each step if some callback asks for
+    it, so unused hooks cost nothing.
+    """
+    # Whether on_batch_end should be called after every training step
+    batch_hooks = False
+    # Whether to time the phases of every training step and report them to on_epoch_end
+    timed = False
+
+    def on_train_begin(self, predictor):
+        """
+        Called before the first epoch with the predictor being trained.
+        """
+
+    def on_epoch_begin(self, epoch: int):
+        """
+        Called at the start of every epoch.
+        """
+
+    def on_batch_end(self, step: int, loss: torch.Tensor):
+        """
+        Called after every training step with the batch's loss, still on the device. Calling .item() on it
+        synchronizes with the device so it should be done sparingly.
+        """
+
+    def on_epoch_end(self, epoch: int, logs: dict):
+        """
+        Called at the end of every epoch.
+        :param logs: the step count as "step", the validation loss as "val_loss" if there is a validation set, and if
+            any callback is timed, "timings" of the seconds spent in each phase of the epoch's steps along with
+            "samples_per_s".
+        """
+
+    def on_train_end(self, results: dict):
+        """
+        Called once training is done with the dictionary of results returned by fit.
+        """
+
+
+class PhaseTimer:
+    """
+    Accumulates the wall time between laps into named phases. Work on CUDA devices is asynchronous, so each lap
+    synchronizes with the device to attribute the time to the phase that queued the work.
+    :param device: device training runs on.
+    """
+    PHASES = ["data", "copy", "forward", "backward", "step"]
+
+    def __init__(self, device: str):
+        self.sync = torch.cuda.synchronize if torch.device(device).type == "cuda" else None
+        self.totals = dict.fromkeys(self.PHASES, 0.0)
+        self.samples = 0
+        self.last = time.perf_counter()
+
+    def reset(self):
+        """
+        Clears the totals and restarts the clock.
+        """
+        self.totals = dict.fromkeys(self.PHASES, 0.0)
+        self.samples = 0
+        self.last = time.perf_counter()
+
+    def lap(self, phase: str):
+        """
+        Adds the time since the last lap to phase.
+        """
+        if self.sync is not None:
+            self.sync()
+        now = time.perf_counter()
+        self.totals[phase] += now - self.last
+        self.last = now
+
+    def logs(self) -> dict:
+        """
+        The phase totals and throughput of the steps timed since the last reset.
+        """
+        total = sum(self.totals.values())
+        return {"timings": dict(self.totals), "samples_per_s": self.samples / total if total > 0 else 0.0}
+
+
+class TimingCallback(Callback):
+    """
+    Records how long each epoch's steps spent waiting for data, copying it to the device, in the forward pass, in the
+    backward pass and in the optimizer step, along with the training throughput.
+    :param verbose: whether to print the timings after every epoch.
+    """
+    timed = True
+
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+        self.history = []
+
+    def on_epoch_end(self, epoch: int, logs: dict):
+        self.history.append({**logs["timings"], "samples_per_s": logs["samples_per_s"]})
+        if self.verbose:
+            phases = " ".join(f"{phase} {seconds:.3f}s" for phase, seconds in logs["timings"].items())
+            print(f"epoch {epoch} {phases} {logs['samples_per_s']:.0f} samples/s")
+
+
+class ProgressCallback(Callback):
+    """
+    Shows a tqdm progress bar over each epoch's training steps.
+    """
+    batch_hooks = True
+
+    def __init__(self):
+        self.progress = None
+
+    def on_epoch_begin(self, epoch: int):
+        # pylint: disable=import-outside-toplevel
+        from tqdm import tqdm
+        self.progress = tqdm(desc=f"epoch {epoch}")
+
+    def on_batch_end(self, step: int, loss: torch.Tensor):
+        self.progress.update()
+
+    def on_epoch_end(self, epoch: int, logs: dict):
+        self.progress.close()
+
+
+class PrintCallback(Callback):
+    """
+    Prints the validation loss after every epoch.
+    """
+    def on_epoch_end(self, epoch: int, logs: dict):
+        if "val_loss" in logs:
+            print(f"epoch {epoch} mae {logs['val_loss']}")
+
+
+class TensorBoardCallback(Callback):
+    """
+    Logs the training loss averaged over every log_steps steps, the validation loss and any timings to tensorboard.
+    The losses are summed on the device so it is only synchronized with every log_steps steps.
+    Tensorboard is only imported once training begins.
+    :param log_path: directory to write the tensorboard logs to.
+    :param log_steps: number of steps to average the training loss over.
+    """
+    batch_hooks = True
+
+    def __init__(self, log_path: str, log_steps: int = 50):
+        self.log_path = log_path
+        self.log_steps = log_steps
+        self.writer = None
+        self.window_loss = None
+
+    def on_train_begin(self, predictor):
+        # pylint: disable=import-outside-toplevel
+        from torch.utils.tensorboard import SummaryWriter
+        self.writer = SummaryWriter(self.log_path)
+        self.window_loss = torch.zeros((), device=predictor.device)
+
+    def on_batch_end(self, step: int, loss: torch.Tensor):
+        self.window_loss += loss.detach()
+        if (step + 1) % self.log_steps == 0:
+            self.writer.add_scalar("loss", self.window_loss.item() / self.log_steps, step)
+            self.window_loss.zero_()
+
+    def on_epoch_end(self, epoch: int, logs: dict):
+        if "val_loss" in logs:
+            self.writer.add_scalar("val_loss", logs["val_loss"], logs["step"])
+        if "timings" in logs:
+            for phase, seconds in logs["timings"].items():
+                self.writer.add_scalar(f"time/{phase}", seconds, epoch)
+            self.writer.add_scalar("samples_per_s", logs["samples_per_s"], epoch)
+
+    def on_train_end(self, results: dict):
+        self.writer.close()
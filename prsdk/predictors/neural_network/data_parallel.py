@@ -0,0 +1,159 @@
+"""
+Data-parallel CPU training for the NeuralNetPredictor.
+Spawns local worker processes that each train on a shard of every epoch's samples and all-reduce their gradients
+through torch.distributed with the gloo backend, so that a single fit can make use of many cores.
+"""
+import contextlib
+import os
+import socket
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+from prsdk.data.torch_data import TorchBatchLoader, TorchDataset
+from prsdk.predictors.neural_network.callbacks import Callback
+
+
+def find_free_port() -> int:
+    """
+    Finds a free port on localhost for the workers to rendezvous on.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class EventRecorder(Callback):
+    """
+    Records the training events of the first worker so that the parent process's callbacks can be called with them
+    once training is done. Batch losses and timings are only recorded if one of the callbacks asks for them.
+    :param batch_hooks: whether to record the loss of every training step.
+    :param timed: whether to time the phases of every training step.
+    """
+    def __init__(self, batch_hooks: bool, timed: bool):
+        self.batch_hooks = batch_hooks
+        self.timed = timed
+        self.events = []
+
+    def on_epoch_begin(self, epoch: int):
+        self.events.append(("on_epoch_begin", epoch))
+
+    def on_batch_end(self, step: int, loss: torch.Tensor):
+        self.events.append(("on_batch_end", step, loss.item()))
+
+    def on_epoch_end(self, epoch: int, logs: dict):
+        self.events.append(("on_epoch_end", epoch, logs))
+
+    @staticmethod
+    def replay(events: list[tuple], callbacks: list[Callback], predictor, results: dict):
+        """
+        Calls the callbacks with recorded events as if they had run during training.
+        :param events: events recorded by an EventRecorder.
+        :param callbacks: callbacks to call.
+        :param predictor: the predictor that was fit, passed to on_train_begin.
+        :param results: the dictionary of results from training, passed to on_train_end.
+        """
+        for callback in callbacks:
+            callback.on_train_begin(predictor)
+        for hook, *args in events:
+            if hook == "on_batch_end":
+                args = [args[0], torch.tensor(args[1])]
+            for callback in callbacks:
+                if hook != "on_batch_end" or callback.batch_hooks:
+                    getattr(callback, hook)(*args)
+        for callback in callbacks:
+            callback.on_train_end(results)
+
+
+@dataclass
+class WorkerJob:
+    """
+    Everything a worker process needs to train its replica, sent to every worker by mp.spawn.
+    :param predictor: the NeuralNetPredictor being fit.
+    :param train_ds: the scaled training dataset in shared memory.
+    :param world_size: number of worker processes.
+    :param port: localhost port the workers rendezvous on.
+    :param seed: seed shared by every worker so that their weights and samples line up.
+    :param train_kwargs: keyword arguments to pass on to NeuralNetPredictor._train, with an EventRecorder as the only
+        callback.
+    :param results_path: where the first worker saves the fitted weights and results.
+    """
+    predictor: object
+    train_ds: TorchDataset
+    world_size: int
+    port: int
+    seed: int
+    train_kwargs: dict
+    results_path: Path
+
+
+def train_worker(rank: int, job: WorkerJob):
+    """
+    Trains one replica of the predictor's model. Every replica starts from the same weights and seed, so they split the
+    same permutation of the samples each epoch and stay in sync through DistributedDataParallel. Since their weights
+    are identical, they also compute the same validation loss and make the same early stopping decisions.
+    The batch size is split between the replicas, so that with DistributedDataParallel averaging their gradients each
+    step still follows the gradient of about batch_size samples, and an epoch takes the same number of steps as in a
+    single process.
+    Only the first replica prints, records its training events, and saves its fitted weights, results and events to
+    results_path.
+    """
+    dist.init_process_group("gloo", init_method=f"tcp://127.0.0.1:{job.port}", rank=rank, world_size=job.world_size)
+    try:
+        torch.set_num_threads(max((os.cpu_count() or 1) // job.world_size, 1))
+        torch.manual_seed(job.seed)
+        predictor = job.predictor
+        train_dl = TorchBatchLoader(job.train_ds, max(predictor.batch_size // job.world_size, 1), shuffle=True,
+                                    num_samples=int(len(job.train_ds) * predictor.train_pct),
+                                    generator=torch.Generator().manual_seed(job.seed),
+                                    num_replicas=job.world_size, rank=rank)
+
+        train_kwargs = job.train_kwargs if rank == 0 else {**job.train_kwargs, "callbacks": []}
+        with open(os.devnull, "w", encoding="utf-8") as devnull, \
+                contextlib.redirect_stdout(sys.stdout if rank == 0 else devnull), \
+                contextlib.redirect_stderr(sys.stderr if rank == 0 else devnull):
+            # pylint: disable=protected-access
+            result_dict = predictor._train(lambda: train_dl, **train_kwargs, distributed=True)
+        if rank == 0:
+            recorder = train_kwargs["callbacks"][0]
+            torch.save((predictor.model.state_dict(), result_dict, recorder.events), job.results_path)
+    finally:
+        dist.destroy_process_group()
+
+
+# pylint: disable=too-many-arguments
+def fit_data_parallel(predictor, train_ds: TorchDataset, n_workers: int,
+                      X_val=None, y_val=None,
+                      X_test=None, y_test=None,
+                      callbacks=None, start=None) -> tuple[dict, dict]:
+    """
+    Trains the predictor's model across n_workers local processes.
+    The predictor's features, label and scaler must already be set up.
+    :param predictor: the NeuralNetPredictor to fit.
+    :param train_ds: the scaled training dataset, shared with the workers rather than copied.
+    :param n_workers: number of worker processes to train with.
+    :param callbacks: callbacks to call with the first worker's training events. The events are recorded in the
+        worker and the callbacks are called in this process once training is done, so they keep what they record.
+    See NeuralNetPredictor.fit for the rest of the parameters.
+    :return: the fitted model's state dict and the dictionary of results from training.
+    """
+    train_ds.X.share_memory_()
+    train_ds.y.share_memory_()
+    callbacks = callbacks or []
+    train_kwargs = {"X_val": X_val, "y_val": y_val, "X_test": X_test, "y_test": y_test, "start": start,
+                    "callbacks": [EventRecorder(any(callback.batch_hooks for callback in callbacks),
+                                                any(callback.timed for callback in callbacks))]}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        job = WorkerJob(predictor, train_ds, n_workers, find_free_port(), int(torch.randint(2 ** 31 - 1, ()).item()),
+                        train_kwargs, Path(temp_dir) / "results.pt")
+        mp.spawn(train_worker, args=(job,), nprocs=n_workers, join=True)
+        # The results are plain Python objects written by our own worker rather than just tensors
+        state_dict, result_dict, events = torch.load(job.results_path, weights_only=False)
+    EventRecorder.replay(events, callbacks, predictor, result_dict)
+    return state_dict, result_dict
+# pylint: enable=too-many-arguments
@@ -4,21 +4,32 @@ implemented in PyTorch.
 """
 import copy
 import time
+from typing import Callable, Iterable
 
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from tqdm import tqdm
 
 import torch
-from torch.utils.data import DataLoader
-from torch.utils.tensorboard import SummaryWriter
+from torch.nn.parallel import DistributedDataParallel
 
-from prsdk.data.torch_data import TorchDataset
+from prsdk.data.ingestion import FeatureIngestor
+from prsdk.data.torch_data import TorchBatchLoader, TorchDataset
 from prsdk.predictors.predictor import Predictor
+from prsdk.predictors.neural_network.callbacks import Callback, PhaseTimer, PrintCallback, ProgressCallback
+from prsdk.predictors.neural_network.callbacks import TensorBoardCallback
+from prsdk.predictors.neural_network.data_parallel import fit_data_parallel
 from prsdk.predictors.neural_network.torch_neural_net import TorchNeuralNet
 
 
+def new_scaler():
+    """
+    Creates an unfitted StandardScaler. sklearn is slow to import so it is only imported once a predictor is created.
+    """
+    # pylint: disable=import-outside-toplevel
+    from sklearn.preprocessing import StandardScaler
+    return StandardScaler()
+
+
 # pylint: disable=too-many-instance-attributes
 class NeuralNetPredictor(Predictor):
     """
@@ -33,7 +44,8 @@ class NeuralNetPredictor(Predictor):
         :param model_config: dictionary of model configuration parameters.
             Model config should contain the following:
             features: list of features to use in the model (optional, defaults to all context + actions)
-            label: name of the label column (optional, defaults to passed label in fit)
+            label: name of the label column, or list of label columns to predict jointly with a single network
+                (optional, defaults to passed label(s) in fit)
             hidden_sizes: list of hidden layer sizes (defaults to single layer of size 4096)
             linear_skip: whether to concatenate input to hidden layer output (defaults to True)
             dropout: dropout probability (defaults to 0)
@@ -43,6 +55,15 @@ class NeuralNetPredictor(Predictor):
             optim_params: dictionary of parameters to pass to the optimizer (defaults to PyTorch default)
             train_pct: percentage of training data to use (defaults to 1)
             step_lr_params: dictionary of parameters to pass to the step learning rate scheduler (defaults to 1, 0.1)
+            patience: number of epochs without validation improvement to stop training after (defaults to None,
+                training for all the epochs)
+            min_delta: minimum decrease in validation loss to count as an improvement (defaults to 0)
+            log_steps: number of training steps to average the loss logged to tensorboard over (defaults to 50)
+            precision: "float32" or "bfloat16" to run the forward passes of fit and predict under bfloat16 autocast.
+                The loss is still computed and the weights are still stored in float32 (defaults to "float32")
+            data_parallel_workers: number of local processes to train with in fit, each on a share of every epoch's
+                samples and of every batch, with gradients all-reduced between them so that the optimization matches
+                training in a single process with the same batch_size (defaults to 1, training in this process)
         """
         super().__init__()
         self.features = model_config.get("features", None)
@@ -57,55 +78,175 @@ class NeuralNetPredictor(Predictor):
         self.optim_params = model_config.get("optim_params", {})
         self.train_pct = model_config.get("train_pct", 1)
         self.step_lr_params = model_config.get("step_lr_params", {"step_size": 1, "gamma": 0.1})
+        self.patience = model_config.get("patience", None)
+        self.min_delta = model_config.get("min_delta", 0)
+        self.log_steps = model_config.get("log_steps", 50)
+        self.data_parallel_workers = model_config.get("data_parallel_workers", 1)
+        self.precision = model_config.get("precision", "float32")
+        if self.precision not in ("float32", "bfloat16"):
+            raise ValueError(f"Unsupported precision {self.precision}.")
 
         self.model = None
-        self.scaler = StandardScaler()
+        self.scaler = new_scaler()
+
+        # Optional alternative model used by predict, and whether it takes unscaled features
+        self.inference_model = None
+        self.fused = False
+
+        self.ingestor = None
+
+    @property
+    def labels(self) -> list[str]:
+        """
+        The label(s) predicted by the model as a list, one per output of the network.
+        """
+        return self.label if isinstance(self.label, list) else [self.label]
 
-    # pylint: disable=too-many-arguments,too-many-locals,too-many-branches,too-many-statements
-    def fit(self, X_train: pd.DataFrame, y_train: pd.Series,
+    # pylint: disable=too-many-arguments
+    def fit(self, X_train: pd.DataFrame, y_train: pd.Series | pd.DataFrame,
             X_val=None, y_val=None,
             X_test=None, y_test=None,
-            log_path=None, verbose=False) -> dict:
+            log_path=None, verbose=False, callbacks: list[Callback] = None) -> dict:
         """
         Fits neural network to given data using predefined parameters and hyperparameters.
         If no features were specified we use all the columns in X_train.
+        If y_train is a DataFrame, one output is trained per column, sharing the rest of the network.
         We scale based on the training data and apply it to validation and test data.
-        AdamW optimizer is used with L1 loss.
+        AdamW optimizer is used with L1 loss. If patience is set, training stops early once the validation loss
+        hasn't improved by min_delta for that many epochs. The best weights on the validation set are kept.
+        Losses are accumulated on the device and only read back once per epoch or every log_steps steps.
+        Logging, progress bars and profiling are done by callbacks, see prsdk.predictors.neural_network.callbacks.
+        If data_parallel_workers is greater than 1, training is split across that many local processes, each taking
+        batch_size // data_parallel_workers samples of every batch. The callbacks are then called in this process with
+        the first worker's events once training is done.
         TODO: We want to be able to customize the loss function in the future.
         :param X_train: training data, may be unscaled and have excess features.
-        :param y_train: training labels.
+        :param y_train: training labels, either a Series or a DataFrame with one column per label.
         :param X_val: validation data, may be unscaled and have excess features.
         :param y_val: validation labels.
         :param X_test: test data, may be unscaled and have excess features.
         :param y_test: test labels.
-        :param log_path: path to log training data to tensorboard.
-        :param verbose: whether to print progress bars.
+        :param log_path: path to log training data to tensorboard, shorthand for adding a TensorBoardCallback.
+        :param verbose: whether to show progress bars and print the validation loss of each epoch.
+        :param callbacks: list of callbacks to call during training.
         :return: dictionary of results from training containing time taken, best epoch, best loss,
-        and test loss if applicable.
+        the epoch training stopped early at, and test loss if applicable.
         """
+        start = time.time()
+        callbacks = self.make_callbacks(callbacks, log_path, verbose)
         if not self.features:
             self.features = X_train.columns.tolist()
-        self.label = y_train.name
+        self.label = y_train.columns.tolist() if isinstance(y_train, pd.DataFrame) else y_train.name
 
-        self.model = TorchNeuralNet(len(self.features), self.hidden_sizes, self.linear_skip, self.dropout)
-        self.model.to(self.device)
-        self.model.train()
+        # Set up train set
+        X_train = self.ingest(X_train)
+        self.scaler.fit(X_train)
+        self.name_scaler_features()
+        # X_train is our own scaled copy and the labels are only read, so there's no need to copy them again
+        train_ds = TorchDataset(self.standardize(X_train), y_train.values, copy=False)
+        if self.data_parallel_workers > 1:
+            state_dict, result_dict = fit_data_parallel(self, train_ds, self.data_parallel_workers,
+                                                        X_val, y_val, X_test, y_test, callbacks, start)
+            self._build_model()
+            self.model.load_state_dict(state_dict)
+            return result_dict
+        train_dl = TorchBatchLoader(train_ds, self.batch_size, shuffle=True,
+                                    num_samples=int(len(train_ds) * self.train_pct))
+
+        return self._train(lambda: train_dl, X_val, y_val, X_test, y_test, callbacks, start)
 
+    def fit_stream(self, train_chunks: Iterable[pd.DataFrame], label: str | list[str],
+                   X_val=None, y_val=None,
+                   X_test=None, y_test=None,
+                   log_path=None, verbose=False, callbacks: list[Callback] = None) -> dict:
+        """
+        Fits neural network to training data too large to fit in memory, streamed as DataFrame chunks.
+        The scaler is fit incrementally over a first pass of the chunks, then each epoch trains on one chunk at a
+        time so that only a single chunk is in memory. Samples are shuffled within each chunk, so chunks should not be
+        sorted. Otherwise training is the same as in fit.
+        If no features were specified we use all the columns in the chunks other than the label(s).
+        :param train_chunks: re-iterable source of DataFrame chunks containing the features and label(s), for
+            example a ChunkSource.
+        :param label: name of the label column, or list of label columns to predict jointly.
+        :param X_val: validation data, may be unscaled and have excess features.
+        :param y_val: validation labels.
+        :param X_test: test data, may be unscaled and have excess features.
+        :param y_test: test labels.
+        :param log_path: path to log training data to tensorboard.
+        :param verbose: whether to show progress bars and print the validation loss of each epoch.
+        :param callbacks: list of callbacks to call during training.
+        :return: dictionary of results from training, see fit.
+        """
         start = time.time()
+        callbacks = self.make_callbacks(callbacks, log_path, verbose)
+        self.label = label
+        self.scaler = new_scaler()
+        for chunk in train_chunks:
+            if not self.features:
+                self.features = [col for col in chunk.columns if col not in self.labels]
+            if len(chunk) > 0:
+                self.scaler.partial_fit(self.ingest(chunk))
+        self.name_scaler_features()
 
-        # Set up train set
-        X_train = self.scaler.fit_transform(X_train[self.features])
-        y_train = y_train.values
-        train_ds = TorchDataset(X_train, y_train)
-        sampler = torch.utils.data.RandomSampler(train_ds, num_samples=int(len(train_ds) * self.train_pct))
-        train_dl = DataLoader(train_ds, self.batch_size, sampler=sampler)
+        def epoch_batches():
+            for chunk in train_chunks:
+                if len(chunk) == 0:
+                    continue
+                chunk_ds = TorchDataset(self.standardize(self.ingest(chunk)), chunk[self.label].values, copy=False)
+                num_samples = max(int(len(chunk_ds) * self.train_pct), 1)
+                yield from TorchBatchLoader(chunk_ds, self.batch_size, shuffle=True, num_samples=num_samples)
+
+        return self._train(epoch_batches, X_val, y_val, X_test, y_test, callbacks, start)
+
+    def make_callbacks(self, callbacks: list[Callback], log_path: str, verbose: bool) -> list[Callback]:
+        """
+        Adds the callbacks implied by the log_path and verbose arguments of fit to the given callbacks.
+        """
+        callbacks = list(callbacks) if callbacks else []
+        if log_path:
+            callbacks.append(TensorBoardCallback(log_path, self.log_steps))
+        if verbose:
+            callbacks += [ProgressCallback(), PrintCallback()]
+        return callbacks
+
+    def _build_model(self):
+        """
+        Creates a new model to train, discarding any inference model.
+        """
+        self.model = TorchNeuralNet(len(self.features), self.hidden_sizes, self.linear_skip, self.dropout,
+                                    len(self.labels))
+        self.model.to(self.device)
+        self.inference_model = None
+        self.fused = False
+
+    # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+    def _train(self, epoch_batches: Callable[[], Iterable[tuple]],
+               X_val=None, y_val=None,
+               X_test=None, y_test=None,
+               callbacks: list[Callback] = None, start=None, distributed=False) -> dict:
+        """
+        Creates a new model and runs the training loop shared by fit and fit_stream.
+        :param epoch_batches: function returning an iterable over the scaled (X, y) training batches of an epoch.
+        :param callbacks: callbacks to call during training.
+        :param start: time training started at, defaults to now.
+        :param distributed: whether to wrap the model in DistributedDataParallel for training. The process group must
+            already be initialized.
+        See fit for the rest of the parameters and the returned results.
+        """
+        if start is None:
+            start = time.time()
+        callbacks = callbacks or []
+        batch_callbacks = [callback for callback in callbacks if callback.batch_hooks]
+        timer = PhaseTimer(self.device) if any(callback.timed for callback in callbacks) else None
+        self._build_model()
+        train_model = DistributedDataParallel(self.model) if distributed else self.model
 
         # If we pass in a validation set, use them
         if X_val is not None and y_val is not None:
-            X_val = self.scaler.transform(X_val[self.features])
+            X_val = self.standardize(self.ingest(X_val))
             y_val = y_val.values
-            val_ds = TorchDataset(X_val, y_val)
-            val_dl = DataLoader(val_ds, self.batch_size, shuffle=False)
+            val_ds = TorchDataset(X_val, y_val, copy=False)
+            val_dl = TorchBatchLoader(val_ds, self.batch_size)
 
         # Optimization parameters
         optimizer = torch.optim.AdamW(self.model.parameters(), **self.optim_params)
@@ -113,97 +254,239 @@ class NeuralNetPredictor(Predictor):
         if self.step_lr_params:
             scheduler = torch.optim.lr_scheduler.StepLR(optimizer, **self.step_lr_params)
 
-        if log_path:
-            writer = SummaryWriter(log_path)
-
-        # Keeping track of best performance for validation
+        # Keeping track of best performance for validation. The best weights are copied into a buffer allocated once.
         result_dict = {}
-        best_model = None
+        best_state = None
         best_loss = np.inf
+        epochs_without_improvement = 0
         end = 0
 
+        for callback in callbacks:
+            callback.on_train_begin(self)
         step = 0
         for epoch in range(self.epochs):
+            for callback in callbacks:
+                callback.on_epoch_begin(epoch)
             self.model.train()
+            if timer is not None:
+                timer.reset()
             # Standard training loop
-            train_iter = tqdm(train_dl) if verbose else train_dl
-            for X, y in train_iter:
+            for X, y in epoch_batches():
+                if timer is not None:
+                    timer.lap("data")
+                    timer.samples += len(X)
                 X, y = X.to(self.device), y.to(self.device)
+                if timer is not None:
+                    timer.lap("copy")
                 optimizer.zero_grad()
-                out = self.model(X)
-                loss = loss_fn(out.squeeze(), y.squeeze())
-                if log_path:
-                    writer.add_scalar("loss", loss.item(), step)
-                step += 1
+                with self.autocast():
+                    out = train_model(X)
+                loss = loss_fn(out.float().squeeze(), y.squeeze())
+                if timer is not None:
+                    timer.lap("forward")
                 loss.backward()
+                if timer is not None:
+                    timer.lap("backward")
                 optimizer.step()
+                if timer is not None:
+                    timer.lap("step")
+                for callback in batch_callbacks:
+                    callback.on_batch_end(step, loss)
+                step += 1
+            logs = {"step": step}
+            if timer is not None:
+                logs.update(timer.logs())
 
             # LR Decay
             if self.step_lr_params:
                 scheduler.step()
 
             # Evaluate epoch
+            stop = False
             if X_val is not None and y_val is not None:
-                total = 0
+                total = torch.zeros((), device=self.device)
                 self.model.eval()
                 with torch.no_grad():
-                    for X, y in tqdm(val_dl):
+                    for X, y in val_dl:
                         X, y = X.to(self.device), y.to(self.device)
-                        out = self.model(X)
-                        loss = loss_fn(out.squeeze(), y.squeeze())
-                        total += loss.item() * y.shape[0]
+                        with self.autocast():
+                            out = self.model(X)
+                        total += loss_fn(out.float().squeeze(), y.squeeze()) * y.shape[0]
+                val_loss = total.item() / len(val_ds)
+                logs["val_loss"] = val_loss
 
-                if log_path:
-                    writer.add_scalar("val_loss", total / len(val_ds), step)
-
-                if total < best_loss:
-                    best_model = copy.deepcopy(self.model.state_dict())
-                    best_loss = total
+                if val_loss < best_loss - self.min_delta:
+                    if best_state is None:
+                        best_state = {key: torch.empty_like(value) for key, value in self.model.state_dict().items()}
+                    for key, value in self.model.state_dict().items():
+                        best_state[key].copy_(value)
+                    best_loss = val_loss
+                    epochs_without_improvement = 0
                     end = time.time()
                     result_dict["best_epoch"] = epoch
-                    result_dict["best_loss"] = total / len(val_ds)
+                    result_dict["best_loss"] = val_loss
                     result_dict["time"] = end - start
+                else:
+                    epochs_without_improvement += 1
+
+                if self.patience is not None and epochs_without_improvement >= self.patience:
+                    result_dict["stopped_epoch"] = epoch
+                    stop = True
 
-                print(f"epoch {epoch} mae {total / len(val_ds)}")
+            for callback in callbacks:
+                callback.on_epoch_end(epoch, logs)
+            if stop:
+                break
 
-        if best_model:
-            self.model.load_state_dict(best_model)
+        if best_state:
+            self.model.load_state_dict(best_state)
         else:
             end = time.time()
             result_dict["time"] = end - start
 
         # If we provide a test dataset
         if X_test is not None and y_test is not None:
-            y_pred = self.predict(X_test)
-            y_true = y_test.values
+            y_pred = self.predict(X_test).values
+            y_true = y_test.values.reshape(y_pred.shape)
             mae = np.mean(np.abs(y_pred - y_true))
             result_dict["test_loss"] = mae
 
+        for callback in callbacks:
+            callback.on_train_end(result_dict)
         return result_dict
-    # pylint: enable=too-many-arguments,too-many-locals,too-many-branches,too-many-statements
+    # pylint: enable=too-many-locals,too-many-branches,too-many-statements
+    # pylint: enable=too-many-arguments
 
     def predict(self, context_actions_df: pd.DataFrame) -> pd.DataFrame:
         """
         Generates prediction from model for given test data.
         :param context_actions_df: test data to predict on.
-        :return: DataFrame of predictions properly labeled and indexed.
-        """
-        X_test_scaled = self.scaler.transform(context_actions_df[self.features])
-        test_ds = TorchDataset(X_test_scaled, np.zeros(len(X_test_scaled)), device=self.device)
-        test_dl = DataLoader(test_ds, self.batch_size, shuffle=False)
-        pred_list = []
-        with torch.no_grad():
-            self.model.eval()
-            for X, _ in test_dl:
-                X = X.to(self.device)
-                pred_list.append(self.model(X))
-
-        # Flatten into a single numpy array if we have multiple batches
-        if len(pred_list) > 1:
-            y_pred = torch.concatenate(pred_list, dim=0).cpu().numpy()
+        :return: DataFrame of predictions properly labeled and indexed, with one column per label.
+        """
+        model = self.model if self.inference_model is None else self.inference_model
+        X_test = self.ingest(context_actions_df)
+        if not self.fused:
+            X_test = self.standardize(X_test)
+        X_test = torch.from_numpy(X_test)
+        # Each chunk's output is written straight into a single preallocated buffer that backs the returned DataFrame
+        y_pred = np.empty((len(X_test), len(self.labels)), dtype=np.float32)
+        out = torch.from_numpy(y_pred)
+        model.eval()
+        with torch.inference_mode(), self.autocast():
+            for start in range(0, len(X_test), self.batch_size):
+                end = start + self.batch_size
+                out[start:end] = model(X_test[start:end].to(self.device))
+        return pd.DataFrame(y_pred, index=context_actions_df.index, columns=self.labels, copy=False)
+
+    def ingest(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Extracts the unscaled features from df into a float32 array, caching the column positions per schema.
+        :param df: DataFrame containing at least the features.
+        :return: C-contiguous float32 array of the features.
+        """
+        if self.ingestor is None or self.ingestor.features != self.features:
+            self.ingestor = FeatureIngestor(self.features, np.float32)
+        return self.ingestor(df)
+
+    def autocast(self) -> torch.autocast:
+        """
+        Context manager running the forward passes inside it in the configured precision.
+        """
+        return torch.autocast(torch.device(self.device).type, dtype=torch.bfloat16,
+                              enabled=self.precision == "bfloat16")
+
+    def name_scaler_features(self):
+        """
+        Records the feature names on the scaler, which is fit on ingested arrays, so that it can still be used on
+        DataFrames of the features without sklearn warning that it was fitted without feature names.
+        """
+        self.scaler.feature_names_in_ = np.asarray(self.features, dtype=object)
+
+    def standardize(self, X: np.ndarray) -> np.ndarray:
+        """
+        Standardizes ingested features in place with the fitted scaler.
+        We do this rather than calling the scaler's transform to avoid another copy of the data in float64.
+        :param X: float32 array of unscaled features.
+        :return: X, standardized.
+        """
+        X -= self.scaler.mean_.astype(np.float32)
+        X /= self.scaler.scale_.astype(np.float32)
+        return X
+
+    def fuse_scaler(self) -> TorchNeuralNet:
+        """
+        Creates a copy of the fitted model with the scaler folded into its input layers and uses it for inference.
+        predict then passes the raw features straight to the network, skipping the scaler transform and its copy.
+        Refitting the model discards the fused model.
+        :return: the fused network, which takes unscaled features.
+        """
+        if self.model is None:
+            raise ValueError("Model not fitted yet.")
+        fused_model = copy.deepcopy(self.model)
+        fused_model.fold_input_scaling(self.scaler.mean_, self.scaler.scale_)
+        fused_model.eval()
+        self.inference_model = fused_model
+        self.fused = True
+        return fused_model
+
+    def quantize(self, X_val: pd.DataFrame = None, y_val: pd.Series | pd.DataFrame = None) -> dict:
+        """
+        Applies dynamic int8 quantization to the linear layers of the model used for inference (the fused model if
+        there is one) and uses it in predict. Quantized models only run on CPU. To save the quantized model, compile
+        it afterwards with compile_model so that NeuralNetSerializer saves it as the inference model.
+        Refitting the model discards the quantized model.
+        :param X_val: optional held-out data to measure the drift of the quantized model's predictions on.
+        :param y_val: optional held-out labels to compare the float and quantized model's error on.
+        :return: dictionary of the max and mean absolute difference between the float and quantized predictions, and
+        the float and quantized mean absolute error if labels were provided.
+        """
+        if self.model is None:
+            raise ValueError("Model not fitted yet.")
+        if isinstance(self.inference_model, torch.jit.ScriptModule):
+            raise ValueError("Quantize the model before compiling it.")
+        if self.device != "cpu":
+            raise ValueError("Quantized models can only run on CPU.")
+
+        float_pred = self.predict(X_val).values if X_val is not None else None
+        model = self.model if self.inference_model is None else self.inference_model
+        model.eval()
+        self.inference_model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        drift = {}
+        if X_val is not None:
+            quant_pred = self.predict(X_val).values
+            drift["max_abs_diff"] = np.max(np.abs(quant_pred - float_pred))
+            drift["mean_abs_diff"] = np.mean(np.abs(quant_pred - float_pred))
+            if y_val is not None:
+                y_true = y_val.values.reshape(quant_pred.shape)
+                drift["float_mae"] = np.mean(np.abs(float_pred - y_true))
+                drift["quantized_mae"] = np.mean(np.abs(quant_pred - y_true))
+        return drift
+
+    def compile_model(self, method: str = "trace") -> torch.nn.Module:
+        """
+        Compiles the model used for inference (the fused model if there is one) and uses it in predict.
+        Traced and scripted models are frozen TorchScript modules that NeuralNetSerializer saves alongside the model
+        and that can be served without rebuilding the model from its config. torch.compile models can't be saved.
+        Refitting the model discards the compiled model.
+        :param method: "trace" for torch.jit.trace, "script" for torch.jit.script or "compile" for torch.compile.
+        :return: the compiled model.
+        """
+        if self.model is None and self.inference_model is None:
+            raise ValueError("Model not fitted yet.")
+        model = self.model if self.inference_model is None else self.inference_model
+        model.eval()
+        if method == "trace":
+            example = torch.zeros((2, len(self.features)), device=self.device)
+            compiled_model = torch.jit.freeze(torch.jit.trace(model, example))
+        elif method == "script":
+            compiled_model = torch.jit.freeze(torch.jit.script(model))
+        elif method == "compile":
+            compiled_model = torch.compile(model)
         else:
-            y_pred = pred_list[0].cpu().numpy()
-        return pd.DataFrame(y_pred, index=context_actions_df.index, columns=[self.label])
+            raise ValueError(f"Unknown compile method {method}.")
+        self.inference_model = compiled_model
+        return compiled_model
 
     def set_device(self, device: str):
         """
@@ -212,3 +495,5 @@ class NeuralNetPredictor(Predictor):
         self.device = device
         if self.model:
             self.model.to(device)
+        if self.inference_model:
+            self.inference_model.to(device)
@@ -11,6 +11,7 @@ class TorchNeuralNet(torch.nn.Module):
     :param hidden_sizes: list of hidden layer sizes
     :param linear_skip: whether to concatenate input to hidden layer output
     :param dropout: dropout probability
+    :param out_size: number of outputs, one per label predicted
     """
     class EncBlock(torch.nn.Module):
         """
@@ -22,7 +23,7 @@ class TorchNeuralNet(torch.nn.Module):
             self.model = torch.nn.Sequential(
                 torch.nn.Linear(in_size, out_size),
                 torch.nn.ReLU(),
-                torch.nn.Dropout(p=dropout)
+                torch.nn.Dropout(p=float(dropout))
             )
 
         def forward(self, X: torch.FloatTensor) -> torch.FloatTensor:
@@ -31,15 +32,17 @@ class TorchNeuralNet(torch.nn.Module):
             """
             return self.model(X)
 
-    def __init__(self, in_size: int, hidden_sizes: list[str], linear_skip: bool, dropout: float):
+    # pylint: disable=too-many-arguments
+    def __init__(self, in_size: int, hidden_sizes: list[str], linear_skip: bool, dropout: float, out_size: int = 1):
         super().__init__()
         self.linear_skip = linear_skip
         hidden_sizes = [in_size] + hidden_sizes
         enc_blocks = [self.EncBlock(hidden_sizes[i], hidden_sizes[i+1], dropout) for i in range(len(hidden_sizes) - 1)]
         self.enc = torch.nn.Sequential(*enc_blocks)
         # If we are using linear skip, we concatenate the input to the output of the hidden layers
-        out_size = hidden_sizes[-1] + in_size if linear_skip else hidden_sizes[-1]
-        self.linear = torch.nn.Linear(out_size, 1)
+        linear_size = hidden_sizes[-1] + in_size if linear_skip else hidden_sizes[-1]
+        self.linear = torch.nn.Linear(linear_size, out_size)
+    # pylint: enable=too-many-arguments
 
     def forward(self, X: torch.FloatTensor) -> torch.FloatTensor:
         """
@@ -53,3 +56,30 @@ class TorchNeuralNet(torch.nn.Module):
             hid = torch.concatenate([hid, X], dim=1)
         out = self.linear(hid)
         return out
+
+    def fold_input_scaling(self, mean: torch.Tensor, scale: torch.Tensor):
+        """
+        Folds the standardization (X - mean) / scale of the input into the weights of every layer that sees the input
+        so that the network can take unscaled input instead. Since the scaling is affine this is exact up to floating
+        point error. Modifies the network in place.
+        :param mean: mean of each input feature.
+        :param scale: scale of each input feature.
+        """
+        mean = torch.as_tensor(mean, dtype=torch.float64)
+        scale = torch.as_tensor(scale, dtype=torch.float64)
+        in_size = len(mean)
+
+        # Each entry is a linear layer and the slice of its input columns that receive the scaled input
+        folds = []
+        if len(self.enc) > 0:
+            folds.append((self.enc[0].model[0], slice(0, in_size)))
+        else:
+            folds.append((self.linear, slice(0, in_size)))
+        if self.linear_skip:
+            folds.append((self.linear, slice(self.linear.in_features - in_size, self.linear.in_features)))
+
+        with torch.no_grad():
+            for layer, cols in folds:
+                weight = layer.weight[:, cols].double()
+                layer.bias -= (weight @ (mean / scale)).to(layer.bias.dtype)
+                layer.weight[:, cols] = (weight / scale).to(layer.weight.dtype)
@@ -0,0 +1,143 @@
+"""
+Array-based inference for fitted sklearn forests of regression trees.
+The nodes of every tree are packed into a few contiguous arrays so that a block of rows can be walked down all of the
+trees at once with vectorized numpy instead of dispatching to each tree in turn.
+"""
+import numpy as np
+
+# Number of (tree, row) pairs traversed at once, which bounds the memory used by predict
+BLOCK_SIZE = 2 ** 18
+# Number of steps down the trees between dropping the pairs that have reached a leaf
+COMPACT_EVERY = 4
+
+
+# pylint: disable=too-many-instance-attributes
+class CompiledForest:
+    """
+    Flattened copy of a fitted forest of regression trees like a RandomForestRegressor or ExtraTreesRegressor.
+    The nodes of all the trees are stored in narrow dtypes: int16 features (int32 for very wide inputs), float32
+    thresholds and int32 children. Leaves are their own children, so rows that have already reached a leaf can keep
+    stepping down without changing nodes until they are periodically dropped.
+    Predictions are identical to the forest's: features are cast to float32 like sklearn does, thresholds are rounded
+    down to the float32 that makes the comparison exact, and the float64 leaf values are summed in tree order before
+    dividing by the number of trees.
+    :param arrays: dictionary of the node arrays as returned by to_arrays.
+    :param metadata: dictionary with the forest's n_features, n_outputs and max_depth.
+    """
+    ARRAY_NAMES = ["roots", "feature", "threshold", "children", "value"]
+
+    def __init__(self, arrays: dict[str, np.ndarray], metadata: dict):
+        self.roots = arrays["roots"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"]
+        self.value = arrays["value"]
+        self.n_features = metadata["n_features"]
+        self.n_outputs = metadata["n_outputs"]
+        self.max_depth = metadata["max_depth"]
+
+    @classmethod
+    def from_forest(cls, model) -> "CompiledForest":  # pylint: disable=too-many-locals
+        """
+        Compiles a fitted forest.
+        :param model: fitted sklearn forest regressor with an estimators_ list of decision trees.
+        :return: the compiled forest.
+        """
+        if not hasattr(model, "estimators_"):
+            raise ValueError("Model must be a fitted forest.")
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        n_nodes = int(sizes.sum())
+        if n_nodes >= 2 ** 30:
+            raise ValueError("Forest has too many nodes to compile.")
+        feature_dtype = np.int16 if model.n_features_in_ < 2 ** 15 else np.int32
+
+        feature = np.empty(n_nodes, dtype=feature_dtype)
+        threshold = np.empty(n_nodes, dtype=np.float32)
+        children = np.empty((n_nodes, 2), dtype=np.int32)
+        value = np.empty((n_nodes, model.n_outputs_), dtype=np.float64)
+        for tree, offset, size in zip(trees, offsets, sizes):
+            nodes = slice(offset, offset + size)
+            is_leaf = tree.children_left == -1
+            own_index = np.arange(offset, offset + size)
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = cls.round_down(tree.threshold)
+            children[nodes, 0] = np.where(is_leaf, own_index, tree.children_left + offset)
+            children[nodes, 1] = np.where(is_leaf, own_index, tree.children_right + offset)
+            value[nodes] = tree.value[:, :, 0]
+
+        arrays = {"roots": offsets.astype(np.int32), "feature": feature, "threshold": threshold,
+                  "children": children, "value": value}
+        metadata = {"n_features": int(model.n_features_in_), "n_outputs": int(model.n_outputs_),
+                    "max_depth": max(int(tree.max_depth) for tree in trees)}
+        return cls(arrays, metadata)
+
+    @staticmethod
+    def round_down(threshold: np.ndarray) -> np.ndarray:
+        """
+        Converts float64 thresholds to the largest float32 that is not above them. For any float32 x, x <= threshold
+        holds exactly when x is at most the rounded threshold.
+        """
+        rounded = threshold.astype(np.float32)
+        above = rounded.astype(np.float64) > threshold
+        rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+        return rounded
+
+    def to_arrays(self) -> tuple[dict[str, np.ndarray], dict]:
+        """
+        Gets the node arrays and metadata needed to rebuild the compiled forest, e.g. to save with flat_arrays.
+        """
+        arrays = {name: getattr(self, name) for name in self.ARRAY_NAMES}
+        metadata = {"n_features": self.n_features, "n_outputs": self.n_outputs, "max_depth": self.max_depth}
+        return arrays, metadata
+
+    def find_leaves(self, X: np.ndarray) -> np.ndarray:
+        """
+        Walks every row of X down every tree at once.
+        The (tree, row) pairs are laid out tree by tree so that each step's lookups stay within one tree's nodes.
+        Pairs that have reached a leaf are dropped every COMPACT_EVERY steps so that deep, unbalanced trees don't
+        keep stepping every row until the maximum depth.
+        :param X: float32 array of shape (n_rows, n_features).
+        :return: array of shape (n_trees, n_rows) of the index of the leaf each row lands in for each tree.
+        """
+        n_rows = len(X)
+        # Feature-major so that feature f of row r is at f * n_rows + r
+        columns = np.ascontiguousarray(X.T).ravel()
+        children = self.children.ravel()
+        nodes = np.repeat(self.roots, n_rows)
+        rows = np.tile(np.arange(n_rows, dtype=np.int64), len(self.roots))
+        pairs = np.arange(len(nodes))
+        leaves = np.empty_like(nodes)
+        for depth in range(self.max_depth):
+            if depth and depth % COMPACT_EVERY == 0:
+                done = self.children[nodes, 0] == nodes
+                leaves[pairs[done]] = nodes[done]
+                active = ~done
+                nodes, rows, pairs = nodes[active], rows[active], pairs[active]
+            x = columns[np.multiply(self.feature[nodes], n_rows, dtype=np.int64) + rows]
+            nodes = children[2 * nodes + (x > self.threshold[nodes])]
+        leaves[pairs] = nodes
+        return leaves.reshape(len(self.roots), n_rows)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predicts with the compiled forest, processing the rows in blocks of about BLOCK_SIZE (tree, row) pairs.
+        :param X: array of shape (n_rows, n_features).
+        :return: array of predictions, of shape (n_rows,) for single-output forests or (n_rows, n_outputs) otherwise.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"X must have shape (n_rows, {self.n_features}), got {X.shape}.")
+        n_trees = len(self.roots)
+        block_rows = max(BLOCK_SIZE // n_trees, 1)
+        y_pred = np.empty((len(X), self.n_outputs))
+        for start in range(0, len(X), block_rows):
+            leaves = self.find_leaves(X[start:start + block_rows])
+            # Sum the trees one at a time in the same order as sklearn so the floating point results match
+            y_sum = np.zeros((leaves.shape[1], self.n_outputs))
+            for tree_leaves in leaves:
+                y_sum += self.value[tree_leaves]
+            y_pred[start:start + block_rows] = y_sum / n_trees
+        return y_pred[:, 0] if self.n_outputs == 1 else y_pred
+# pylint: enable=too-many-instance-attributes
@@ -1,8 +1,12 @@
 """
 Implementation of SKLearnPredictor as a LinearRegressor.
 """
+from typing import Iterable
+
+import pandas as pd
 from sklearn.linear_model import LinearRegression
 
+from prsdk.predictors.sklearn_predictors.linear_statistics import LinearStatistics
 from prsdk.predictors.sklearn_predictors.sklearn_predictor import SKLearnPredictor
 
 
@@ -10,14 +14,106 @@ class LinearRegressionPredictor(SKLearnPredictor):
     """
     Simple linear regression predictor.
     See SKLearnPredictor for more details.
+    In incremental mode the regression is solved from mergeable LinearStatistics instead of the full design matrix.
+    fit_stream then only holds one chunk at a time, and partial_fit and merge refresh the model with new data in time
+    proportional to the new data alone. The statistics are stored on the model as stats_, so they are saved with it by
+    the SKLearnSerializer and a loaded model can be refreshed with LinearStatistics.merge and apply.
     """
     def __init__(self, model_config: dict):
         """
         :param model_config: Configuration to pass into the SKLearn constructor. Also contains the keys "features" and
-            "label" to keep track of the features and label to predict.
+            "label" to keep track of the features and label to predict, and optionally "incremental" to fit from
+            sufficient statistics.
         """
         if not model_config:
             model_config = {}
-        lr_config = {key: value for key, value in model_config.items() if key not in ["features", "label"]}
+        lr_config = {key: value for key, value in model_config.items()
+                     if key not in ["features", "label", "incremental"]}
         model = LinearRegression(**lr_config)
         super().__init__(model, model_config)
+
+    @property
+    def incremental(self) -> bool:
+        """
+        Whether the predictor is fit from sufficient statistics.
+        """
+        return self.config.get("incremental", False)
+
+    def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
+        """
+        Fits the linear regression, from the statistics of the training data in incremental mode.
+        See SKLearnPredictor.fit for more details.
+        """
+        if not self.incremental:
+            super().fit(X_train, y_train)
+            self.drop_statistics()
+            return
+        if "features" not in self.config:
+            self.config["features"] = list(X_train.columns)
+        self.config["label"] = y_train.name
+        self.inference_model = None
+        LinearStatistics.from_data(self.ingest(X_train), y_train.to_numpy()).apply(self.model)
+
+    def fit_stream(self, train_chunks: Iterable[pd.DataFrame], label: str):
+        """
+        Fits the linear regression on streamed chunks. In incremental mode the statistics of each chunk are merged in
+        a single pass, so only one chunk is held in memory at a time.
+        See SKLearnPredictor.fit_stream for more details.
+        """
+        if not self.incremental:
+            super().fit_stream(train_chunks, label)
+            self.drop_statistics()
+            return
+        self.config["label"] = label
+        self.inference_model = None
+        stats = None
+        for chunk in train_chunks:
+            if "features" not in self.config:
+                self.config["features"] = [col for col in chunk.columns if col != label]
+            chunk_stats = LinearStatistics.from_data(self.ingest(chunk), chunk[label].to_numpy())
+            stats = chunk_stats if stats is None else stats.merge(chunk_stats)
+        if stats is None:
+            raise ValueError("No chunks to fit on.")
+        stats.apply(self.model)
+
+    def partial_fit(self, X_train: pd.DataFrame, y_train: pd.Series):
+        """
+        Refreshes the regression with new training data by merging its statistics into the ones the model was fit on.
+        Starts a new fit if the model hasn't been fit yet. Only supported in incremental mode.
+        :param X_train: DataFrame with the new input data.
+        :param y_train: series with the new target data.
+        """
+        self.check_incremental()
+        if "features" not in self.config:
+            self.config["features"] = list(X_train.columns)
+        self.config["label"] = y_train.name
+        self.merge(LinearStatistics.from_data(self.ingest(X_train), y_train.to_numpy()))
+
+    def merge(self, stats: LinearStatistics):
+        """
+        Merges statistics computed elsewhere, e.g. by other workers with LinearStatistics.from_data on the ingested
+        features, into the model's and re-solves the regression.
+        Only supported in incremental mode.
+        :param stats: statistics of samples of the same features in the same order.
+        """
+        self.check_incremental()
+        if hasattr(self.model, "coef_") and not hasattr(self.model, "stats_"):
+            raise ValueError("Model was not fit in incremental mode so has no statistics to merge into.")
+        if hasattr(self.model, "stats_"):
+            stats = self.model.stats_.merge(stats)
+        self.inference_model = None
+        stats.apply(self.model)
+
+    def check_incremental(self):
+        """
+        Raises a ValueError unless the predictor is in incremental mode.
+        """
+        if not self.incremental:
+            raise ValueError("Predictor is not in incremental mode so can't be refreshed with new statistics.")
+
+    def drop_statistics(self):
+        """
+        Removes the statistics of an earlier incremental fit from the model, since they don't describe a batch refit.
+        """
+        if hasattr(self.model, "stats_"):
+            del self.model.stats_
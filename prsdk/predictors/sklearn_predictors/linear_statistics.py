@@ -0,0 +1,97 @@
+"""
+Mergeable sufficient statistics for least squares linear regression.
+Ordinary least squares only depends on the data through the number of samples, the means of the features and label,
+and their centered cross products. These can be computed per chunk of data and merged exactly, so a regression can be
+fit over streamed data, across workers, or refreshed with new data without revisiting the old.
+"""
+import numpy as np
+
+
+class LinearStatistics:
+    """
+    Sufficient statistics of a set of samples for fitting a linear regression.
+    The cross products are stored centered around the means and merged with Chan et al.'s pairwise update, which is
+    much more accurate than accumulating raw XᵀX and Xᵀy when the features have large means.
+    :param n_samples: number of samples.
+    :param x_mean: array of shape (n_features,) of the feature means.
+    :param y_mean: mean of the label.
+    :param xx: array of shape (n_features, n_features) of the centered feature cross products.
+    :param xy: array of shape (n_features,) of the centered feature-label cross products.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, n_samples: int, x_mean: np.ndarray, y_mean: float, xx: np.ndarray, xy: np.ndarray):
+        self.n_samples = n_samples
+        self.x_mean = x_mean
+        self.y_mean = y_mean
+        self.xx = xx
+        self.xy = xy
+    # pylint: enable=too-many-arguments
+
+    @classmethod
+    def from_data(cls, X: np.ndarray, y: np.ndarray) -> "LinearStatistics":
+        """
+        Computes the statistics of a batch of samples.
+        :param X: array of shape (n_samples, n_features).
+        :param y: array of shape (n_samples,).
+        :return: the statistics of the batch.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64).reshape(-1)
+        if len(X) != len(y):
+            raise ValueError("X and y must have the same length.")
+        if len(X) == 0:
+            return cls(0, np.zeros(X.shape[1]), 0.0, np.zeros((X.shape[1], X.shape[1])), np.zeros(X.shape[1]))
+        x_mean = X.mean(axis=0)
+        y_mean = float(y.mean())
+        centered = X - x_mean
+        return cls(len(X), x_mean, y_mean, centered.T @ centered, centered.T @ (y - y_mean))
+
+    def merge(self, other: "LinearStatistics") -> "LinearStatistics":
+        """
+        Combines two sets of statistics into the statistics of all of their samples.
+        :param other: statistics of samples with the same features.
+        :return: new merged statistics. Neither input is modified.
+        """
+        if self.x_mean.shape != other.x_mean.shape:
+            raise ValueError("Statistics must have the same number of features to be merged.")
+        n_samples = self.n_samples + other.n_samples
+        if n_samples == 0:
+            return self
+        x_delta = other.x_mean - self.x_mean
+        y_delta = other.y_mean - self.y_mean
+        weight = self.n_samples * other.n_samples / n_samples
+        return LinearStatistics(n_samples,
+                                self.x_mean + x_delta * other.n_samples / n_samples,
+                                self.y_mean + y_delta * other.n_samples / n_samples,
+                                self.xx + other.xx + np.outer(x_delta, x_delta) * weight,
+                                self.xy + other.xy + x_delta * y_delta * weight)
+
+    def solve(self, fit_intercept: bool = True) -> tuple[np.ndarray, float, int, np.ndarray]:
+        """
+        Solves the normal equations for the least squares coefficients. Like sklearn, rank-deficient problems get the
+        minimum norm solution.
+        :param fit_intercept: whether to fit an intercept or force the regression through the origin.
+        :return: the coefficients, intercept, rank, and singular values of the (centered if fitting an intercept)
+            design matrix, corresponding to sklearn's LinearRegression coef_, intercept_, rank_ and singular_.
+        """
+        if self.n_samples == 0:
+            raise ValueError("Cannot solve statistics of zero samples.")
+        xx, xy = self.xx, self.xy
+        if not fit_intercept:
+            xx = xx + np.outer(self.x_mean, self.x_mean) * self.n_samples
+            xy = xy + self.x_mean * self.y_mean * self.n_samples
+        coef, _, rank, singular = np.linalg.lstsq(xx, xy, rcond=None)
+        intercept = self.y_mean - self.x_mean @ coef if fit_intercept else 0.0
+        return coef, intercept, rank, np.sqrt(singular)
+
+    def apply(self, model):
+        """
+        Sets a sklearn LinearRegression's fitted attributes to the solution of the statistics, and stores the
+        statistics on it as stats_ so that they are saved along with the model and can be merged into later.
+        :param model: the LinearRegression to set up. Its fit_intercept parameter is respected.
+        """
+        if getattr(model, "positive", False):
+            raise ValueError("Positive coefficients are not supported when fitting from statistics.")
+        model.coef_, model.intercept_, model.rank_, model.singular_ = self.solve(model.fit_intercept)
+        model.n_features_in_ = len(self.x_mean)
+        model.stats_ = self
@@ -3,9 +3,14 @@ Abstract SKLearn predictor.
 Since the SKLearn library is standardized we can easily make more.
 """
 from abc import ABC
+from typing import Iterable
 
+import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 
+from prsdk.data.chunked import ChunkSource
+from prsdk.data.ingestion import FeatureIngestor
 from prsdk.predictors.predictor import Predictor
 
 
@@ -13,7 +18,14 @@ class SKLearnPredictor(Predictor, ABC):
     """
     Simple abstract class for sklearn predictors.
     Keeps track of features fit on and label to predict.
+    Features are passed to the model as a numpy array of input_dtype, which subclasses can narrow if their model
+    converts its input anyway.
+    Subclasses can set an inference_model with a predict method that takes the ingested features, like a
+    CompiledForest, to use in place of the model in predict. Refitting discards it.
+    Large frames can be predicted in chunks of rows across a pool of workers, see set_chunking.
     """
+    input_dtype = np.float64
+
     def __init__(self, model, model_config: dict):
         """
         Model config contains the following:
@@ -24,6 +36,33 @@ class SKLearnPredictor(Predictor, ABC):
         super().__init__()
         self.config = model_config
         self.model = model
+        self.inference_model = None
+        self.ingestor = None
+        self.chunk_size = None
+        self.n_workers = 1
+        self.backend = "threading"
+
+    def set_chunking(self, chunk_size: int = None, n_workers: int = 1, backend: str = "threading"):
+        """
+        Sets up predict to split frames with more than chunk_size rows into chunks that are ingested and predicted
+        separately across a joblib pool, then reassembled in order.
+        At most 2 * n_workers chunks are dispatched at a time, so the features being worked on take up at most about
+        2 * n_workers * chunk_size * len(features) * itemsize bytes, rather than a copy of the whole frame. The model's
+        own temporary arrays, like the per-tree predictions of a forest, are bounded by the chunk size in the same way.
+        The default threading backend shares the model between the workers, which suits sklearn models since their
+        predict releases the GIL in BLAS or Cython. Process backends like "loky" send a copy of the predictor with
+        every chunk, so are only worth it for models that are cheap to pickle. Models that parallelize their own
+        predict, like forests with n_jobs, should be set to n_jobs=1 to avoid oversubscribing the CPU.
+        :param chunk_size: number of rows per chunk, or None to predict the whole frame at once.
+        :param n_workers: number of workers to predict the chunks with. Negative values count back from the number of
+            CPUs like joblib's n_jobs.
+        :param backend: joblib backend to run the workers with, e.g. "threading" or "loky".
+        """
+        if chunk_size is not None and chunk_size <= 0:
+            raise ValueError(f"chunk_size should be a positive integer value, but got chunk_size={chunk_size}")
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers
+        self.backend = backend
 
     def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
         """
@@ -32,13 +71,66 @@ class SKLearnPredictor(Predictor, ABC):
         :param X_train: DataFrame with input data
         :param y_train: series with target data
         """
-        if "features" in self.config:
-            X_train = X_train[self.config["features"]]
-        else:
+        if "features" not in self.config:
             self.config["features"] = list(X_train.columns)
         self.config["label"] = y_train.name
+        self.inference_model = None
+        self.model.fit(self.ingest(X_train), y_train.values)
+
+    def fit_stream(self, train_chunks: Iterable[pd.DataFrame], label: str):
+        """
+        Fits SKLearn model on training data streamed as DataFrame chunks.
+        SKLearn models need all of the training data at once, so the features of the chunks are gathered into a
+        single array of input_dtype in one pass over the chunks, see stack_chunks. Memory is bounded by that array
+        rather than the full DataFrame plus its copies.
+        If we passed in features, use those. Otherwise use all columns other than the label.
+        :param train_chunks: iterable of DataFrame chunks containing the features and label, for example a ChunkSource.
+        :param label: name of the label column.
+        """
+        self.config["label"] = label
+        X_train, y_train = self.stack_chunks(train_chunks, label)
+        self.inference_model = None
         self.model.fit(X_train, y_train)
 
+    def stack_chunks(self, train_chunks: Iterable[pd.DataFrame], label: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Reads the features and label of every chunk into single arrays, reading each chunk once.
+        When the chunks come from a ChunkSource of shards, the rows are counted from the shards' metadata and the
+        chunks are copied straight into preallocated arrays. Otherwise each chunk's features are ingested and the
+        arrays are concatenated at the end, which briefly holds two copies of them.
+        Sets the features from the first chunk if they aren't set yet.
+        :param train_chunks: iterable of DataFrame chunks containing the features and label.
+        :param label: name of the label column.
+        :return: the features array of input_dtype and the float64 label array.
+        """
+        n_rows = train_chunks.count_rows() if isinstance(train_chunks, ChunkSource) else None
+        x_parts, y_parts = [], []
+        start = 0
+        for chunk in train_chunks:
+            if "features" not in self.config:
+                self.config["features"] = [col for col in chunk.columns if col != label]
+            if n_rows is None:
+                x_parts.append(self.ingest(chunk))
+                y_parts.append(chunk[label].to_numpy(dtype=np.float64))
+                continue
+            if start == 0:
+                x_parts.append(np.empty((n_rows, len(self.config["features"])), dtype=self.input_dtype))
+                y_parts.append(np.empty(n_rows))
+            end = start + len(chunk)
+            if end > n_rows:
+                raise ValueError(f"Chunks have more rows than the {n_rows} counted from the shards' metadata.")
+            x_parts[0][start:end] = self.ingest(chunk)
+            y_parts[0][start:end] = chunk[label].to_numpy()
+            start = end
+
+        if not x_parts:
+            raise ValueError("No chunks to fit on.")
+        if n_rows is None:
+            return np.concatenate(x_parts), np.concatenate(y_parts)
+        if start != n_rows:
+            raise ValueError(f"Chunks have {start} rows but {n_rows} were counted from the shards' metadata.")
+        return x_parts[0], y_parts[0]
+
     def predict(self, context_actions_df: pd.DataFrame) -> pd.DataFrame:
         """
         Standard sklearn predict method.
@@ -47,6 +139,35 @@ class SKLearnPredictor(Predictor, ABC):
         :param context_actions_df: DataFrame with input data
         :return: properly labeled DataFrame with predictions and matching index.
         """
-        context_actions_df = context_actions_df[self.config["features"]]
-        y_pred = self.model.predict(context_actions_df)
+        if self.chunk_size is None or len(context_actions_df) <= self.chunk_size:
+            y_pred = self.predict_values(context_actions_df)
+        else:
+            starts = range(0, len(context_actions_df), self.chunk_size)
+            parallel = Parallel(n_jobs=self.n_workers, backend=self.backend, pre_dispatch="2*n_jobs")
+            chunks = parallel(delayed(self.predict_values)(context_actions_df.iloc[start:start + self.chunk_size])
+                              for start in starts)
+            y_pred = np.concatenate(chunks)
         return pd.DataFrame(y_pred, index=context_actions_df.index, columns=[self.config["label"]])
+
+    def predict_values(self, context_actions_df: pd.DataFrame) -> np.ndarray:
+        """
+        Predicts on a frame with the inference model if there is one, otherwise the model.
+        :param context_actions_df: DataFrame with input data
+        :return: array of predictions.
+        """
+        if self.inference_model is not None:
+            return self.inference_model.predict(self.ingest(context_actions_df))
+        # Models fit on DataFrames check the feature names so we have to pass them one
+        if hasattr(self.model, "feature_names_in_"):
+            return self.model.predict(context_actions_df[self.config["features"]])
+        return self.model.predict(self.ingest(context_actions_df))
+
+    def ingest(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Extracts the features from df into an array of input_dtype, caching the column positions per schema.
+        :param df: DataFrame containing at least the features.
+        :return: C-contiguous array of the features.
+        """
+        if self.ingestor is None or self.ingestor.features != self.config["features"]:
+            self.ingestor = FeatureIngestor(self.config["features"], self.input_dtype)
+        return self.ingestor(df)
@@ -0,0 +1,178 @@
+"""
+Parallel hyperparameter sweeps over predictor configs.
+The training and validation data are put in shared memory once so that the worker processes read the same copy
+instead of each task pickling its own.
+"""
+import inspect
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.predictor import Predictor
+
+# Data attached to by each worker process, set by init_worker
+WORKER_DATA = {}
+# Shared memory blocks that can't be closed yet because arrays still view them
+OPEN_BLOCKS = []
+
+
+# pylint: disable=too-many-instance-attributes
+class SharedFrame:
+    """
+    Numeric DataFrame stored in a shared memory block. Pickling a SharedFrame only sends the name of the block along
+    with the index and columns, and attach() views the block as a read-only DataFrame without copying it.
+    The process that created the SharedFrame is responsible for calling unlink once it is no longer needed.
+    :param df: numeric DataFrame or Series to put in shared memory. Its values are stored with the common dtype of its
+        columns.
+    """
+    def __init__(self, df: pd.DataFrame | pd.Series):
+        self.is_series = isinstance(df, pd.Series)
+        frame = df.to_frame() if self.is_series else df
+        non_numeric = [col for col, dtype in frame.dtypes.items() if not pd.api.types.is_numeric_dtype(dtype)]
+        if non_numeric:
+            raise ValueError(f"SharedFrame only supports numeric data, got non-numeric columns {non_numeric}.")
+        self.dtype = np.result_type(*frame.dtypes) if len(frame.columns) > 0 else np.dtype(np.float64)
+        values = frame.to_numpy(dtype=self.dtype)
+        self.index = frame.index
+        self.columns = frame.columns
+        self.series_name = df.name if self.is_series else None
+        self.shape = values.shape
+        self.shm = SharedMemory(create=True, size=max(values.nbytes, 1))
+        self.view()[:] = values
+        self.name = self.shm.name
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["shm"] = None
+        return state
+
+    def view(self) -> np.ndarray:
+        """
+        Views the shared memory block as an array. frombuffer holds on to the buffer so the block can't be closed
+        while the array is alive.
+        """
+        if self.shm is None:
+            self.shm = SharedMemory(name=self.name)
+        return np.frombuffer(self.shm.buf, dtype=self.dtype, count=int(np.prod(self.shape))).reshape(self.shape)
+
+    def attach(self) -> pd.DataFrame | pd.Series:
+        """
+        Views the shared memory block as a read-only DataFrame, or Series if a Series was shared.
+        """
+        values = self.view()
+        # The block has to stay open for as long as the DataFrame may be used
+        OPEN_BLOCKS.append(self.shm)
+        values.flags.writeable = False
+        if self.is_series:
+            return pd.Series(values[:, 0], index=self.index, name=self.series_name, copy=False)
+        return pd.DataFrame(values, index=self.index, columns=self.columns, copy=False)
+
+    def unlink(self):
+        """
+        Frees the shared memory block. If attached DataFrames still view the block it stays mapped in this process.
+        """
+        if self.shm is not None:
+            self.shm.unlink()
+            try:
+                self.shm.close()
+                if self.shm in OPEN_BLOCKS:
+                    OPEN_BLOCKS.remove(self.shm)
+            except BufferError:
+                pass
+            self.shm = None
+# pylint: enable=too-many-instance-attributes
+
+
+def init_worker(shared: dict[str, SharedFrame], torch_threads: int):
+    """
+    Attaches a worker to the shared data and limits its threads so that the workers don't oversubscribe the CPU.
+    """
+    for var in ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]:
+        os.environ[var] = str(torch_threads)
+    # pylint: disable=import-outside-toplevel
+    import torch
+    from threadpoolctl import threadpool_limits
+    # pylint: enable=import-outside-toplevel
+    torch.set_num_threads(torch_threads)
+    threadpool_limits(torch_threads)
+    for key, frame in shared.items():
+        WORKER_DATA[key] = frame.attach()
+
+
+def fit_config(predictor_cls: type[Predictor], config: dict) -> dict:
+    """
+    Fits a predictor with the given config on the worker's shared data and evaluates it on the validation set.
+    Predictors whose fit takes a validation set, like NeuralNetPredictor, are passed it.
+    :return: the results returned by fit along with the fit time and validation mean absolute error.
+    """
+    X_train, y_train = WORKER_DATA["X_train"], WORKER_DATA["y_train"]
+    X_val, y_val = WORKER_DATA["X_val"], WORKER_DATA["y_val"]
+    predictor = predictor_cls(config)
+
+    start = time.perf_counter()
+    if "X_val" in inspect.signature(predictor.fit).parameters:
+        results = predictor.fit(X_train, y_train, X_val=X_val, y_val=y_val)
+    else:
+        results = predictor.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = predictor.predict(X_val).values
+    predict_time = time.perf_counter() - start
+    val_mae = np.mean(np.abs(y_pred - y_val.values.reshape(y_pred.shape)))
+    return {**(results or {}), "fit_time": fit_time, "predict_time": predict_time, "val_mae": val_mae}
+
+
+def fit_configs(predictor_cls: type[Predictor], configs: list[dict], shared: dict[str, SharedFrame],
+                n_workers: int, torch_threads: int) -> list[dict]:
+    """
+    Fits a predictor for each config in a pool of worker processes attached to the shared data.
+    :return: list of the config and metrics of each fit, in the same order as configs.
+    """
+    # Spawn rather than fork so that workers don't inherit torch's thread pools
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(configs)), mp_context=get_context("spawn"),
+                             initializer=init_worker, initargs=(shared, torch_threads)) as executor:
+        futures = [executor.submit(fit_config, predictor_cls, config) for config in configs]
+        return [{"config": config, **future.result()} for config, future in zip(configs, futures)]
+
+
+# pylint: disable=too-many-arguments
+def run_sweep(predictor_cls: type[Predictor], configs: list[dict],
+              X_train: pd.DataFrame, y_train: pd.Series,
+              X_val: pd.DataFrame, y_val: pd.Series,
+              n_workers: int = None, torch_threads: int = 1) -> pd.DataFrame:
+    """
+    Fits a predictor for each config across a pool of worker processes and collects their metrics.
+    The data is converted to float64 and shared with the workers through shared memory.
+    :param predictor_cls: the Predictor class to instantiate with each config.
+    :param configs: list of model configs to try.
+    :param X_train: training data.
+    :param y_train: training labels.
+    :param X_val: validation data to evaluate each config on.
+    :param y_val: validation labels.
+    :param n_workers: number of worker processes (defaults to the number of CPUs divided by torch_threads).
+    :param torch_threads: number of torch and BLAS threads each worker may use.
+    :return: DataFrame with a row per config containing the config, the results returned by fit, the fit and predict
+    times, and the validation mean absolute error.
+    """
+    if not configs:
+        return pd.DataFrame()
+    if n_workers is None:
+        n_workers = max((os.cpu_count() or 1) // torch_threads, 1)
+
+    data = {"X_train": X_train, "y_train": y_train, "X_val": X_val, "y_val": y_val}
+    shared = {}
+    try:
+        for key, df in data.items():
+            shared[key] = SharedFrame(df)
+        rows = fit_configs(predictor_cls, configs, shared, n_workers, torch_threads)
+    finally:
+        for frame in shared.values():
+            frame.unlink()
+    return pd.DataFrame(rows)
+# pylint: enable=too-many-arguments
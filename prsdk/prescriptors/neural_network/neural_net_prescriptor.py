@@ -0,0 +1,48 @@
+"""
+Prescriptor that uses a small neural network to map context to actions. Populations of these are evolved and can be
+evaluated together with the PopulationEvaluator.
+"""
+import numpy as np
+import pandas as pd
+import torch
+
+from prsdk.data.ingestion import FeatureIngestor
+from prsdk.prescriptors.neural_network.torch_prescriptor_net import TorchPrescriptorNet
+from prsdk.prescriptors.prescriptor import Prescriptor
+
+
+class NeuralNetPrescriptor(Prescriptor):
+    """
+    Prescribes actions in [0, 1] from the context columns of a DataFrame with a TorchPrescriptorNet.
+    :param context: list of context columns the prescriptor takes in.
+    :param actions: list of action columns the prescriptor outputs.
+    :param hidden_size: size of the hidden layer.
+    :param device: device to run the model on.
+    """
+    def __init__(self, context: list[str], actions: list[str], hidden_size: int = 16, device: str = "cpu"):
+        self.context = list(context)
+        self.actions = list(actions)
+        self.hidden_size = hidden_size
+        self.device = device
+        self.model = TorchPrescriptorNet(len(self.context), hidden_size, len(self.actions)).to(device)
+        self.ingestor = FeatureIngestor(self.context)
+
+    def prescribe_actions(self, context_df: pd.DataFrame) -> np.ndarray:
+        """
+        Prescribes actions for each row of context_df without concatenating them to the context.
+        :param context_df: DataFrame containing at least the context columns.
+        :return: array of shape (len(context_df), len(actions)).
+        """
+        X = torch.from_numpy(self.ingestor(context_df)).to(self.device)
+        self.model.eval()
+        with torch.inference_mode():
+            return self.model(X).cpu().numpy()
+
+    def prescribe(self, context_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Prescribes actions for each row of context_df.
+        :param context_df: DataFrame containing at least the context columns.
+        :return: context_df with the action columns appended.
+        """
+        actions_df = pd.DataFrame(self.prescribe_actions(context_df), index=context_df.index, columns=self.actions)
+        return pd.concat([context_df, actions_df], axis=1)
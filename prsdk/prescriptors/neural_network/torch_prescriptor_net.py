@@ -0,0 +1,30 @@
+"""
+Simple feed-forward neural network to be used in the Neural Network Prescriptor.
+"""
+import torch
+
+
+class TorchPrescriptorNet(torch.nn.Module):
+    """
+    Maps a batch of contexts to actions with a single tanh hidden layer. The actions are squashed to [0, 1] with a
+    sigmoid.
+    :param in_size: number of context features
+    :param hidden_size: size of the hidden layer
+    :param out_size: number of actions
+    """
+    def __init__(self, in_size: int, hidden_size: int, out_size: int):
+        super().__init__()
+        self.model = torch.nn.Sequential(
+            torch.nn.Linear(in_size, hidden_size),
+            torch.nn.Tanh(),
+            torch.nn.Linear(hidden_size, out_size),
+            torch.nn.Sigmoid()
+        )
+
+    def forward(self, X: torch.FloatTensor) -> torch.FloatTensor:
+        """
+        Prescribes actions for the contexts in X.
+        :param X: context data
+        :return: actions in [0, 1]
+        """
+        return self.model(X)
@@ -0,0 +1,81 @@
+"""
+Batched evaluation of a population of neural network prescriptors.
+Instead of having each candidate prescribe and then predicting its outcomes one at a time, the context is read once,
+every candidate's actions are computed in a single vectorized forward pass, and the predictors score all of the
+candidates' context and actions in one call each.
+"""
+import numpy as np
+import pandas as pd
+import torch
+from torch.func import functional_call, stack_module_state, vmap
+
+from prsdk.data.ingestion import FeatureIngestor
+from prsdk.predictors.predictor import Predictor
+from prsdk.prescriptors.neural_network.neural_net_prescriptor import NeuralNetPrescriptor
+
+
+class PopulationEvaluator:
+    """
+    Evaluates populations of NeuralNetPrescriptors with the same architecture on a fixed set of contexts.
+    :param context: list of context columns the prescriptors take in.
+    :param actions: list of action columns the prescriptors output.
+    :param predictors: predictors used to estimate the outcomes of the prescribed actions. Their features must be a
+        subset of context and actions.
+    """
+    def __init__(self, context: list[str], actions: list[str], predictors: list[Predictor]):
+        self.context = list(context)
+        self.actions = list(actions)
+        self.predictors = predictors
+        # Context is kept in float64 so the predictors see the same values they would in the original frame
+        self.ingestor = FeatureIngestor(self.context, np.float64)
+
+    def prescribe_population(self, population: list[NeuralNetPrescriptor], context_df: pd.DataFrame) -> np.ndarray:
+        """
+        Prescribes actions for every candidate at once. The candidates' parameters are stacked and the forward pass is
+        vectorized over them with vmap, so each layer is a single batched matmul over the whole population.
+        :param population: list of prescriptors sharing the same architecture and device.
+        :param context_df: DataFrame containing at least the context columns.
+        :return: array of shape (len(population), len(context_df), len(actions)).
+        """
+        models = [candidate.model for candidate in population]
+        device = population[0].device
+        X = torch.from_numpy(self.ingestor(context_df).astype(np.float32)).to(device)
+        params, buffers = stack_module_state(models)
+        base = models[0]
+
+        def forward(candidate_params, candidate_buffers):
+            return functional_call(base, (candidate_params, candidate_buffers), (X,))
+
+        with torch.inference_mode():
+            return vmap(forward)(params, buffers).cpu().numpy()
+
+    def predict_population(self, population: list[NeuralNetPrescriptor], context_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Predicts the outcomes of every candidate's actions on every context.
+        The contexts are tiled once per candidate and stacked with all of the actions into a single frame, which each
+        predictor scores in one call.
+        :param population: list of prescriptors sharing the same architecture and device.
+        :param context_df: DataFrame containing at least the context columns.
+        :return: DataFrame of the predictors' outcomes, indexed by candidate and context row.
+        """
+        actions = self.prescribe_population(population, context_df)
+        n_candidates, n_rows, n_actions = actions.shape
+        values = np.empty((n_candidates, n_rows, len(self.context) + n_actions), dtype=np.float64)
+        values[:, :, :len(self.context)] = self.ingestor(context_df)
+        values[:, :, len(self.context):] = actions
+        index = pd.MultiIndex.from_product([range(n_candidates), range(n_rows)], names=["candidate", "row"])
+        context_actions_df = pd.DataFrame(values.reshape(n_candidates * n_rows, -1), index=index,
+                                          columns=self.context + self.actions, copy=False)
+        outcomes = [predictor.predict(context_actions_df) for predictor in self.predictors]
+        outcomes_df = pd.concat(outcomes, axis=1)
+        outcomes_df.index = index
+        return outcomes_df
+
+    def evaluate(self, population: list[NeuralNetPrescriptor], context_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluates each candidate by the mean of its predicted outcomes over the contexts.
+        :param population: list of prescriptors sharing the same architecture and device.
+        :param context_df: DataFrame containing at least the context columns.
+        :return: DataFrame with a row per candidate and a column per predicted outcome.
+        """
+        return self.predict_population(population, context_df).groupby(level="candidate").mean()
@@ -0,0 +1,161 @@
+"""
+Unit tests for chunked data sources and fitting predictors on them.
+"""
+import importlib.util
+import shutil
+import tracemalloc
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from prsdk.data.chunked import ChunkSource
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+
+
+def make_chunk(seed: int, n_rows: int = 100) -> pd.DataFrame:
+    """
+    Creates a chunk of random data with a linear label.
+    """
+    rng = np.random.default_rng(seed)
+    chunk = pd.DataFrame(rng.random((n_rows, 4)), columns=["a", "b", "c", "d"])
+    chunk["label"] = chunk["a"] + 2 * chunk["b"] - chunk["c"]
+    return chunk
+
+
+class TestChunkSource(unittest.TestCase):
+    """
+    Tests reading chunks from the different sources.
+    """
+    def setUp(self):
+        self.temp_dir = Path("tests/temp")
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.chunks = [make_chunk(seed) for seed in range(3)]
+
+    def test_callable(self):
+        """
+        A callable source is called again every iteration.
+        """
+        source = ChunkSource(lambda: iter(self.chunks), columns=["a", "label"])
+        for _ in range(2):
+            chunks = list(source)
+            self.assertEqual(len(chunks), 3)
+            self.assertEqual(list(chunks[0].columns), ["a", "label"])
+
+    def test_npy_shards(self):
+        """
+        Reads structured .npy shards from a directory.
+        """
+        for i, chunk in enumerate(self.chunks):
+            np.save(self.temp_dir / f"shard_{i}.npy", chunk.to_records(index=False))
+        chunks = list(ChunkSource(self.temp_dir))
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), pd.concat(self.chunks, ignore_index=True))
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow not installed")
+    def test_parquet_shards(self):
+        """
+        Reads Parquet shards from a list of paths.
+        """
+        paths = []
+        for i, chunk in enumerate(self.chunks):
+            paths.append(self.temp_dir / f"shard_{i}.parquet")
+            chunk.to_parquet(paths[-1])
+        chunks = list(ChunkSource(paths, columns=["b", "label"]))
+        pd.testing.assert_frame_equal(chunks[1], self.chunks[1][["b", "label"]])
+
+    def test_count_rows(self):
+        """
+        Shards' rows are counted from their metadata, while callable sources can't be counted.
+        """
+        for i, chunk in enumerate(self.chunks):
+            np.save(self.temp_dir / f"shard_{i}.npy", chunk.iloc[:20 * (i + 1)].to_records(index=False))
+        self.assertEqual(ChunkSource(self.temp_dir).count_rows(), 120)
+        self.assertIsNone(ChunkSource(lambda: iter(self.chunks)).count_rows())
+        if importlib.util.find_spec("pyarrow"):
+            self.chunks[0].to_parquet(self.temp_dir / "shard.parquet")
+            self.assertEqual(ChunkSource([self.temp_dir / "shard.parquet"]).count_rows(), 100)
+
+    def test_missing_dir(self):
+        """
+        Empty or missing directories raise a FileNotFoundError.
+        """
+        with self.assertRaises(FileNotFoundError):
+            ChunkSource(self.temp_dir)
+        with self.assertRaises(FileNotFoundError):
+            ChunkSource(self.temp_dir / "missing")
+
+    def tearDown(self):
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+
+
+class TestFitStream(unittest.TestCase):
+    """
+    Tests fitting predictors on chunked data.
+    """
+    def setUp(self):
+        self.source = ChunkSource(lambda: (make_chunk(seed, 5000) for seed in range(40)))
+
+    def test_linear_regression_matches_fit(self):
+        """
+        Streaming the data into a linear regression should give the same model as fitting on all of it.
+        """
+        data = pd.concat(list(self.source), ignore_index=True)
+        streamed = LinearRegressionPredictor({})
+        streamed.fit_stream(self.source, "label")
+        fitted = LinearRegressionPredictor({})
+        fitted.fit(data.drop(columns="label"), data["label"])
+        self.assertEqual(streamed.config["features"], ["a", "b", "c", "d"])
+        np.testing.assert_allclose(streamed.model.coef_, fitted.model.coef_)
+
+    def test_sklearn_single_pass(self):
+        """
+        SKLearn predictors should read each shard once and accept one-shot iterables of chunks.
+        """
+        temp_dir = Path("tests/temp")
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            chunks = [make_chunk(seed) for seed in range(3)]
+            for i, chunk in enumerate(chunks):
+                np.save(temp_dir / f"shard_{i}.npy", chunk.to_records(index=False))
+            source = ChunkSource(temp_dir)
+            with patch.object(ChunkSource, "read_shard", autospec=True, side_effect=ChunkSource.read_shard) as read:
+                from_shards = LinearRegressionPredictor({})
+                from_shards.fit_stream(source, "label")
+            self.assertEqual(read.call_count, 3)
+
+            from_generator = LinearRegressionPredictor({})
+            from_generator.fit_stream((chunk for chunk in chunks), "label")
+            np.testing.assert_allclose(from_shards.model.coef_, from_generator.model.coef_)
+            np.testing.assert_allclose(from_shards.model.coef_, [1, 2, -1, 0], atol=1e-8)
+            with self.assertRaises(ValueError):
+                LinearRegressionPredictor({}).fit_stream(iter([]), "label")
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_neural_net_bounded_memory(self):
+        """
+        The neural net should learn from the chunks while never holding much more than a chunk in memory.
+        """
+        predictor = NeuralNetPredictor({"hidden_sizes": [16], "epochs": 2, "batch_size": 256,
+                                        "optim_params": {"lr": 0.01}, "step_lr_params": None})
+        # Warm up so that torch's lazy imports on first use aren't counted
+        predictor.fit_stream(ChunkSource(lambda: [make_chunk(0, 10)]), "label")
+        tracemalloc.start()
+        try:
+            predictor.fit_stream(self.source, "label")
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        total_bytes = 40 * 5000 * 5 * 8
+        self.assertLess(peak, total_bytes / 4)
+        self.assertEqual(predictor.features, ["a", "b", "c", "d"])
+        np.testing.assert_allclose(predictor.scaler.mean_, 0.5, atol=0.01)
+
+        test_chunk = make_chunk(100)
+        mae = np.mean(np.abs(predictor.predict(test_chunk)["label"] - test_chunk["label"]))
+        self.assertLess(mae, 0.2)
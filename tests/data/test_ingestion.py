@@ -0,0 +1,132 @@
+"""
+Unit tests for the feature ingestion used by the predictors.
+"""
+import threading
+import tracemalloc
+import unittest
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from prsdk.data.ingestion import FeatureIngestor
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+
+
+def peak_memory(fn, *args) -> int:
+    """
+    Returns the peak traced memory in bytes allocated while calling fn.
+    """
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class TestFeatureIngestor(unittest.TestCase):
+    """
+    Tests the FeatureIngestor's output and allocation behavior.
+    """
+    def setUp(self):
+        self.features = ["c", "a", "e"]
+        self.df = pd.DataFrame(np.random.rand(20000, 6), columns=list("abcdef"))
+
+    def test_matches_label_lookup(self):
+        """
+        The ingested array should equal selecting the features by label, for homogeneous and mixed dtype frames.
+        """
+        mixed = self.df.astype({"a": np.float32, "c": np.int64, "f": object})
+        for df in [self.df, self.df.astype(np.float32), mixed]:
+            for dtype in [np.float32, np.float64]:
+                with self.subTest(dtypes=set(df.dtypes), dtype=dtype):
+                    X = FeatureIngestor(self.features, dtype)(df)
+                    self.assertEqual(X.dtype, dtype)
+                    self.assertTrue(X.flags["C_CONTIGUOUS"])
+                    np.testing.assert_array_equal(X, df[self.features].to_numpy(dtype=dtype))
+
+    def test_fallback(self):
+        """
+        Non-numeric and extension dtype features go through pandas' own conversion.
+        """
+        df = pd.DataFrame({"a": pd.array([1, 2], dtype="Int64"), "c": ["1.5", "2"], "e": [True, False]})
+        X = FeatureIngestor(self.features)(df)
+        np.testing.assert_array_equal(X, np.array([[1.5, 1, 1], [2, 2, 0]], dtype=np.float32))
+
+    def test_cached_positions(self):
+        """
+        Positions are only resolved again when the schema changes.
+        """
+        ingestor = FeatureIngestor(self.features)
+        ingestor(self.df)
+        cache = ingestor.cache
+        ingestor(self.df.copy())
+        self.assertIs(ingestor.cache, cache)
+        reordered = self.df[list("fedcba")]
+        X = ingestor(reordered)
+        self.assertIs(ingestor.cache[0], reordered.columns)
+        self.assertEqual(ingestor.cache[1].tolist(), [3, 5, 1])
+        np.testing.assert_array_equal(X, ingestor(self.df))
+
+    def test_concurrent_schemas(self):
+        """
+        Threads sharing an ingestor across schemas should always get their own schema's features.
+        """
+        ingestor = FeatureIngestor(self.features)
+        expected = ingestor(self.df)
+        frames = [self.df, self.df[list("fedcba")]]
+        errors = []
+
+        def ingest(frame):
+            for _ in range(500):
+                if not np.array_equal(ingestor(frame), expected):
+                    errors.append(frame.columns.tolist())
+
+        threads = [threading.Thread(target=ingest, args=(frames[i % 2],)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_missing_feature(self):
+        """
+        Missing features raise a KeyError like label lookup does.
+        """
+        with self.assertRaises(KeyError):
+            FeatureIngestor(["a", "z"])(self.df)
+
+    def test_fewer_allocations(self):
+        """
+        Ingesting should only allocate the output array, unlike building an intermediate DataFrame first.
+        """
+        ingestor = FeatureIngestor(self.features)
+        ingestor(self.df)
+        out_bytes = len(self.df) * len(self.features) * 4
+        ingest_peak = peak_memory(ingestor, self.df)
+        lookup_peak = peak_memory(lambda df: df[self.features].to_numpy(dtype=np.float32), self.df)
+        self.assertLess(ingest_peak, 1.2 * out_bytes)
+        self.assertLess(ingest_peak, lookup_peak)
+
+    def test_fewer_allocations_predict(self):
+        """
+        NeuralNetPredictor.predict should allocate less than scaling a label lookup of the features did.
+        """
+        predictor = NeuralNetPredictor({"hidden_sizes": [4], "epochs": 1, "features": self.features})
+        predictor.fit(self.df.iloc[:100], pd.Series(np.random.rand(100), name="label"))
+        predictor.predict(self.df)
+        predict_peak = peak_memory(predictor.predict, self.df)
+        old_peak = peak_memory(lambda df: predictor.scaler.transform(df[self.features]).astype(np.float32), self.df)
+        self.assertLess(predict_peak, old_peak)
+
+    def test_scaler_feature_names(self):
+        """
+        The scaler is fit on ingested arrays but should still transform DataFrames of the features without warning.
+        """
+        predictor = NeuralNetPredictor({"hidden_sizes": [4], "epochs": 1, "features": self.features})
+        predictor.fit(self.df.iloc[:100], pd.Series(np.random.rand(100), name="label"))
+        self.assertEqual(predictor.scaler.feature_names_in_.tolist(), self.features)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            predictor.scaler.transform(self.df[self.features])
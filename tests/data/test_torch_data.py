@@ -0,0 +1,106 @@
+"""
+Unit tests for the torch data utilities.
+"""
+import unittest
+
+import numpy as np
+import torch
+
+from prsdk.data.torch_data import TorchBatchLoader, TorchDataset
+
+
+class TestTorchBatchLoader(unittest.TestCase):
+    """
+    Tests the batch-slicing loader against the behavior of a standard DataLoader.
+    """
+    def setUp(self):
+        self.X = np.arange(30, dtype=np.float64).reshape(10, 3)
+        self.y = np.arange(10, dtype=np.float64)
+        self.ds = TorchDataset(self.X, self.y)
+
+    def test_sequential_batches(self):
+        """
+        Without shuffling the batches should be contiguous slices of the data in order.
+        """
+        loader = TorchBatchLoader(self.ds, batch_size=4)
+        batches = list(loader)
+        self.assertEqual(len(loader), 3)
+        self.assertEqual([len(X) for X, _ in batches], [4, 4, 2])
+        self.assertTrue(torch.equal(torch.cat([X for X, _ in batches]), self.ds.X))
+        self.assertTrue(torch.equal(torch.cat([y for _, y in batches]), self.ds.y))
+
+    def test_shuffled_covers_dataset(self):
+        """
+        A shuffled epoch should see every sample exactly once and keep X and y aligned.
+        """
+        loader = TorchBatchLoader(self.ds, batch_size=3, shuffle=True, generator=torch.Generator().manual_seed(0))
+        ys = []
+        for X, y in loader:
+            self.assertTrue(torch.equal(X[:, 0], y * 3))
+            ys.append(y)
+        self.assertEqual(sorted(torch.cat(ys).tolist()), self.y.tolist())
+
+    def test_num_samples(self):
+        """
+        Sampling a fraction of the dataset should draw that many unique samples, and sampling more than the
+        dataset should draw multiple permutations.
+        """
+        loader = TorchBatchLoader(self.ds, batch_size=4, shuffle=True, num_samples=5)
+        ys = torch.cat([y for _, y in loader])
+        self.assertEqual(len(loader), 2)
+        self.assertEqual(len(ys), 5)
+        self.assertEqual(len(set(ys.tolist())), 5)
+
+        loader = TorchBatchLoader(self.ds, batch_size=4, shuffle=True, num_samples=25)
+        ys = torch.cat([y for _, y in loader])
+        self.assertEqual(len(ys), 25)
+        self.assertTrue(all(ys.tolist().count(val) >= 2 for val in self.y))
+
+    def test_invalid_num_samples(self):
+        """
+        Non-positive sample counts are rejected like in torch's RandomSampler.
+        """
+        with self.assertRaises(ValueError):
+            TorchBatchLoader(self.ds, batch_size=4, shuffle=True, num_samples=0)
+        with self.assertRaises(ValueError):
+            TorchBatchLoader(self.ds, batch_size=4, num_samples=11)
+
+    def test_replicas(self):
+        """
+        Replicas with identically seeded generators should split each epoch's samples into equal disjoint shares.
+        """
+        shares = []
+        for rank in range(3):
+            loader = TorchBatchLoader(self.ds, batch_size=2, shuffle=True, generator=torch.Generator().manual_seed(1),
+                                      num_replicas=3, rank=rank)
+            self.assertEqual(len(loader), 2)
+            shares.append(torch.cat([y for _, y in loader]).tolist())
+        self.assertTrue(all(len(share) == 3 for share in shares))
+        self.assertEqual(len(set(sum(shares, []))), 9)
+
+        sequential = [torch.cat([y for _, y in TorchBatchLoader(self.ds, batch_size=4, num_replicas=2, rank=rank)])
+                      for rank in range(2)]
+        self.assertEqual(sorted(torch.cat(sequential).tolist()), self.y.tolist())
+
+    def test_copy(self):
+        """
+        By default the dataset should copy the arrays, and only share memory with them when asked to.
+        """
+        X = np.arange(30, dtype=np.float32).reshape(10, 3)
+        y = np.arange(10, dtype=np.float32)
+        copied = TorchDataset(X, y)
+        copied.X[0, 0] = -1
+        copied.y[0] = -1
+        self.assertEqual(X[0, 0], 0)
+        self.assertEqual(y[0], 0)
+
+        shared = TorchDataset(X, y, copy=False)
+        X[1, 0] = -2
+        y[1] = -2
+        self.assertEqual(shared.X[1, 0].item(), -2)
+        self.assertEqual(shared.y[1].item(), -2)
+
+        X.flags.writeable = False
+        readonly = TorchDataset(X, y, copy=False)
+        readonly.X[2, 0] = -3
+        self.assertEqual(X[2, 0], 6)
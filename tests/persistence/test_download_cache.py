@@ -0,0 +1,226 @@
+"""
+Unit tests for the managed download cache, using a local stand-in for the HuggingFace Hub.
+"""
+import os
+import shutil
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+from filelock import FileLock
+from huggingface_hub.utils import RevisionNotFoundError
+
+from prsdk.persistence.download_cache import DownloadCache
+from prsdk.persistence.manifest import write_manifest
+from prsdk.persistence.persistors.hf_persistor import HuggingFacePersistor
+from prsdk.persistence.serializers.sklearn_serializer import SKLearnSerializer
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+
+
+class FakeHub:
+    """
+    Serves snapshots of local directories by commit hash and counts downloads.
+    """
+    def __init__(self):
+        self.commits = {}
+        self.refs = {}
+        self.downloads = 0
+        self.online = True
+        self.corrupt = False
+
+    def add_commit(self, repo_id: str, source: Path, commit: str):
+        """
+        Publishes the files in source as a commit of repo_id and points main at it.
+        """
+        self.commits[commit] = source
+        self.refs[(repo_id, "main")] = commit
+
+    def model_info(self, repo_id: str, revision: str = None, **_):
+        """
+        Resolves a revision to its commit.
+        """
+        if not self.online:
+            raise ConnectionError("offline")
+        if (repo_id, revision) not in self.refs:
+            raise RevisionNotFoundError(f"{revision} not found")
+        return SimpleNamespace(sha=self.refs[(repo_id, revision)])
+
+    def snapshot_download(self, revision: str, local_dir: Path, **_):
+        """
+        Copies a commit's files into local_dir, slowly to give concurrent fetches a chance to overlap.
+        """
+        self.downloads += 1
+        time.sleep(0.1)
+        shutil.copytree(self.commits[revision], local_dir, dirs_exist_ok=True)
+        if self.corrupt:
+            with open(Path(local_dir) / "model.joblib", "ab") as file:
+                file.write(b"garbage")
+        return str(local_dir)
+
+
+class TestDownloadCache(unittest.TestCase):
+    """
+    Tests fetching, verification, pinning and eviction.
+    """
+    def setUp(self):
+        self.temp_dir = Path("tests/temp")
+        self.hub = FakeHub()
+        X = pd.DataFrame({"a": [1, 2, 3], "b": [3, 1, 2]})
+        for i, commit in enumerate(["a" * 40, "b" * 40]):
+            predictor = LinearRegressionPredictor({})
+            predictor.fit(X, pd.Series([1, 2, 3 + i], name="label"))
+            source = self.temp_dir / "hub" / commit
+            SKLearnSerializer().save(predictor, source)
+            write_manifest(source)
+            self.hub.add_commit("org/model", source, commit)
+        self.hub.refs[("org/model", "main")] = "a" * 40
+        self.cache = DownloadCache(self.temp_dir / "cache", api=self.hub)
+
+    def test_fetch_once(self):
+        """
+        Concurrent fetches should download once, and later fetches should be served from disk.
+        """
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.fetch("org/model"))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.hub.downloads, 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(results[0].name, "a" * 40)
+        self.assertFalse(any(path.name.startswith(".tmp") for path in results[0].parent.iterdir()))
+        self.cache.fetch("org/model")
+        self.assertEqual(self.hub.downloads, 1)
+
+    def test_pinning(self):
+        """
+        Commits should be fetched without resolving, and branches should fall back to their last resolution offline.
+        """
+        self.assertEqual(self.cache.fetch("org/model", revision="b" * 40).name, "b" * 40)
+        self.cache.fetch("org/model")
+        self.hub.online = False
+        self.assertEqual(self.cache.fetch("org/model").name, "a" * 40)
+        with self.assertRaises(ConnectionError):
+            self.cache.fetch("org/model", revision="dev")
+        self.assertEqual(self.hub.downloads, 2)
+
+    def test_verification(self):
+        """
+        Corrupt downloads should be rejected without leaving a snapshot, and incomplete snapshots should be replaced.
+        """
+        self.hub.corrupt = True
+        with self.assertRaises(IOError):
+            self.cache.fetch("org/model")
+        self.assertEqual(list((self.temp_dir / "cache" / "org--model" / "snapshots").glob("a*")), [])
+
+        self.hub.corrupt = False
+        snapshot = self.cache.fetch("org/model")
+        (snapshot / "model.joblib").unlink()
+        self.cache.fetch("org/model")
+        self.assertTrue((snapshot / "model.joblib").exists())
+        self.assertEqual(self.hub.downloads, 3)
+
+    def test_eviction(self):
+        """
+        The least recently fetched snapshot should be evicted once the cache is over its size limit.
+        """
+        first = self.cache.fetch("org/model")
+        size = sum(file.stat().st_size for file in first.rglob("*") if file.is_file())
+        os.utime(first, (time.time() - 10, time.time() - 10))
+        self.cache.max_bytes = size + 1
+        second = self.cache.fetch("org/model", revision="b" * 40)
+        self.assertFalse(first.exists())
+        self.assertTrue(second.exists())
+
+        self.cache.max_bytes = None
+        self.cache.max_age = 5
+        os.utime(second, (time.time() - 10, time.time() - 10))
+        self.cache.fetch("org/model")
+        self.assertFalse(second.exists())
+
+    def test_temp_dirs(self):
+        """
+        Temporary directories of dead downloads should be removed, while those of downloads in progress should count
+        towards the size limit.
+        """
+        snapshots_dir = self.temp_dir / "cache" / "org--model" / "snapshots"
+        orphan = snapshots_dir / f".tmp-{'b' * 40}-dead"
+        orphan.mkdir(parents=True)
+        (orphan / "model.joblib").write_bytes(b"partial")
+        first = self.cache.fetch("org/model", revision="b" * 40)
+        self.assertFalse(orphan.exists())
+
+        os.utime(first, (time.time() - 10, time.time() - 10))
+        in_progress = snapshots_dir / f".tmp-{'c' * 40}-live"
+        in_progress.mkdir()
+        (in_progress / "model.joblib").write_bytes(b"0" * 1000)
+        size = sum(file.stat().st_size for file in first.rglob("*") if file.is_file())
+        self.cache.max_bytes = 2 * size + 500
+        with FileLock(self.cache.lock_path(snapshots_dir / ("c" * 40))):
+            self.cache.fetch("org/model")
+        self.assertFalse(first.exists())
+        self.assertTrue(in_progress.exists())
+
+    def test_checkout(self):
+        """
+        Snapshots checked out by one process should not be evicted by another until they are released.
+        """
+        other = DownloadCache(self.temp_dir / "cache", max_bytes=1, api=self.hub)
+        with self.cache.checkout("org/model") as first:
+            os.utime(first, (time.time() - 10, time.time() - 10))
+            other.fetch("org/model", revision="b" * 40)
+            self.assertTrue(first.exists())
+        other.fetch("org/model", revision="b" * 40)
+        self.assertFalse(first.exists())
+
+    def test_persistor_local_dir(self):
+        """
+        Without a cache, the persistor should download missing local directories atomically, reuse complete ones and
+        download them again if they no longer match their manifest.
+        """
+        local_dir = self.temp_dir / "local"
+        persistor = HuggingFacePersistor(SKLearnSerializer(), api=self.hub)
+        model = persistor.from_pretrained("org/model", revision="a" * 40, local_dir=str(local_dir))
+        self.assertEqual(model.predict(pd.DataFrame({"a": [1], "b": [3]})).shape, (1, 1))
+        self.assertTrue((local_dir / "model.joblib").exists())
+        self.assertFalse(any(path.name.startswith(".tmp") for path in local_dir.parent.iterdir()))
+        persistor.from_pretrained("org/model", revision="a" * 40, local_dir=str(local_dir))
+        self.assertEqual(self.hub.downloads, 1)
+
+        # A corrupted file should be noticed and downloaded again
+        with open(local_dir / "model.joblib", "ab") as file:
+            file.write(b"garbage")
+        persistor.from_pretrained("org/model", revision="a" * 40, local_dir=str(local_dir))
+        self.assertEqual(self.hub.downloads, 2)
+
+    def test_persistor_unmarked_local_dir(self):
+        """
+        An existing local directory that wasn't downloaded by the persistor should be loaded as is and left untouched.
+        """
+        local_dir = self.temp_dir / "local"
+        shutil.copytree(self.hub.commits["b" * 40], local_dir)
+        (local_dir / "notes.txt").write_text("mine", encoding="utf-8")
+        before = sorted(path.name for path in local_dir.iterdir())
+        persistor = HuggingFacePersistor(SKLearnSerializer(), api=self.hub)
+        model = persistor.from_pretrained("org/model", revision="a" * 40, local_dir=str(local_dir))
+        self.assertEqual(model.predict(pd.DataFrame({"a": [1], "b": [3]})).shape, (1, 1))
+        self.assertEqual(self.hub.downloads, 0)
+        self.assertEqual(sorted(path.name for path in local_dir.iterdir()), before)
+        self.assertEqual((local_dir / "notes.txt").read_text(encoding="utf-8"), "mine")
+
+    def test_persistor(self):
+        """
+        The persistor should load models through the cache.
+        """
+        persistor = HuggingFacePersistor(SKLearnSerializer(), cache=self.cache)
+        model = persistor.from_pretrained("org/model", revision="b" * 40)
+        self.assertEqual(model.predict(pd.DataFrame({"a": [1], "b": [3]})).shape, (1, 1))
+        self.assertEqual(self.hub.downloads, 1)
+
+    def tearDown(self):
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
@@ -0,0 +1,148 @@
+"""
+Unit tests for incremental and concurrent uploads with the HuggingFace persistor, using a local stand-in for HfApi.
+"""
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import pandas as pd
+from huggingface_hub import CommitOperationAdd
+from huggingface_hub.utils import EntryNotFoundError
+
+from prsdk.persistence.persistors.hf_persistor import HuggingFacePersistor
+from prsdk.persistence.serializers.neural_network_serializer import NeuralNetSerializer
+from prsdk.persistence.serializers.sklearn_serializer import SKLearnSerializer
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+from prsdk.predictors.sklearn_predictors.random_forest_predictor import RandomForestPredictor
+
+
+class FakeHfApi:
+    """
+    Stores repos in memory and records how many bytes were uploaded to them.
+    """
+    def __init__(self):
+        self.repos = {}
+        self.bytes_uploaded = 0
+        self.commits = 0
+        self.lock = threading.Lock()
+        self.download_dir = Path(tempfile.mkdtemp())
+
+    def create_repo(self, repo_id: str, **_):
+        """
+        Creates an empty repo if it doesn't exist.
+        """
+        with self.lock:
+            self.repos.setdefault(repo_id, {})
+
+    def hf_hub_download(self, repo_id: str, filename: str, **_) -> str:
+        """
+        Writes a file from a repo to disk and returns its path.
+        """
+        with self.lock:
+            if filename not in self.repos.get(repo_id, {}):
+                raise EntryNotFoundError(f"{filename} not found in {repo_id}")
+            path = self.download_dir / repo_id / filename
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(self.repos[repo_id][filename])
+        return str(path)
+
+    def create_commit(self, repo_id: str, operations: list, **_):
+        """
+        Applies additions and deletions to a repo, counting the bytes added.
+        """
+        with self.lock:
+            self.commits += 1
+            for operation in operations:
+                if isinstance(operation, CommitOperationAdd):
+                    data = Path(operation.path_or_fileobj).read_bytes()
+                    self.bytes_uploaded += len(data)
+                    self.repos[repo_id][operation.path_in_repo] = data
+                else:
+                    del self.repos[repo_id][operation.path_in_repo]
+
+
+class TestIncrementalUpload(unittest.TestCase):
+    """
+    Tests that only changed files are uploaded and that several models can be persisted at once.
+    """
+    def setUp(self):
+        self.temp_dir = Path("tests/temp")
+        self.api = FakeHfApi()
+        self.X = pd.DataFrame({"a": [1, 2, 3, 4], "b": [4, 5, 6, 4]})
+        self.y = pd.Series([1, 2, 3, 4], name="label")
+
+    def test_incremental(self):
+        """
+        Re-persisting an unchanged model should upload nothing, and changing the model should only upload the files
+        that changed.
+        """
+        predictor = NeuralNetPredictor({"hidden_sizes": [4], "epochs": 1, "device": "cpu"})
+        predictor.fit(self.X, self.y)
+        persistor = HuggingFacePersistor(NeuralNetSerializer(), api=self.api)
+
+        uploaded = persistor.persist(predictor, self.temp_dir, "org/model")
+        self.assertEqual(set(uploaded), {"config.json", "model.pt", "scaler.joblib", "README.md"})
+        self.assertEqual(set(self.api.repos["org/model"]), set(uploaded) | {"manifest.json"})
+
+        bytes_uploaded = self.api.bytes_uploaded
+        self.assertEqual(persistor.persist(predictor, self.temp_dir, "org/model"), [])
+        self.assertEqual(self.api.bytes_uploaded, bytes_uploaded)
+        self.assertEqual(self.api.commits, 1)
+
+        predictor.epochs = 2
+        self.assertEqual(persistor.persist(predictor, self.temp_dir, "org/model"), ["config.json"])
+        self.assertEqual(self.api.repos["org/model"]["config.json"], (self.temp_dir / "config.json").read_bytes())
+
+        # Switching to the flat format uploads the new weights and config recording the format, and deletes the old
+        # weights
+        shutil.rmtree(self.temp_dir)
+        flat_persistor = HuggingFacePersistor(NeuralNetSerializer(weight_format="flat"), api=self.api)
+        self.assertEqual(flat_persistor.persist(predictor, self.temp_dir, "org/model"), ["config.json", "weights.bin"])
+        self.assertEqual(set(self.api.repos["org/model"]),
+                         {"config.json", "weights.bin", "README.md", "manifest.json"})
+
+    def test_only_saved_files(self):
+        """
+        Files in the save directory that the serializer didn't save should not be uploaded, and files it no longer
+        saves should be deleted from the repo.
+        """
+        predictor = RandomForestPredictor({"n_estimators": 2, "max_depth": 2})
+        predictor.fit(self.X, self.y)
+        predictor.compile_forest()
+        persistor = HuggingFacePersistor(SKLearnSerializer(), api=self.api)
+        self.temp_dir.mkdir(parents=True)
+        (self.temp_dir / "notes.txt").write_text("not part of the model", encoding="utf-8")
+        uploaded = persistor.persist(predictor, self.temp_dir, "org/model")
+        self.assertEqual(set(uploaded), {"config.json", "model.joblib", "forest.bin", "README.md"})
+
+        predictor.inference_model = None
+        self.assertEqual(persistor.persist(predictor, self.temp_dir, "org/model"), [])
+        self.assertEqual(set(self.api.repos["org/model"]),
+                         {"config.json", "model.joblib", "README.md", "manifest.json"})
+        manifest = json.loads(self.api.repos["org/model"]["manifest.json"])
+        self.assertEqual(set(manifest["files"]), {"config.json", "model.joblib", "README.md"})
+
+    def test_persist_many(self):
+        """
+        persist_many should upload every model to its own repo.
+        """
+        persistor = HuggingFacePersistor(SKLearnSerializer(), api=self.api)
+        models = []
+        for i in range(4):
+            predictor = LinearRegressionPredictor({})
+            predictor.fit(self.X, self.y * i)
+            models.append((predictor, self.temp_dir / str(i), f"org/model-{i}"))
+        results = persistor.persist_many(models, max_workers=2)
+        self.assertEqual(len(results), 4)
+        for i in range(4):
+            self.assertEqual(self.api.repos[f"org/model-{i}"]["model.joblib"],
+                             (self.temp_dir / str(i) / "model.joblib").read_bytes())
+
+    def tearDown(self):
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+        shutil.rmtree(self.api.download_dir)
@@ -5,6 +5,7 @@ import unittest
 import shutil
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from prsdk.persistence.serializers.neural_network_serializer import NeuralNetSerializer
@@ -81,6 +82,170 @@ class TestPredictorSerialization(unittest.TestCase):
                 shutil.rmtree(self.temp_path)
                 self.assertFalse(self.temp_path.exists())
 
+    def test_multi_label_loaded_same(self):
+        """
+        Makes sure a multi-label neural network round-trips through the serializer.
+        """
+        predictor = NeuralNetPredictor(self.configs[0])
+        targets = pd.DataFrame({"cost": [1, 2, 3, 4], "emissions": [4, 3, 2, 1]})
+        predictor.fit(self.dummy_data, targets)
+        output = predictor.predict(self.dummy_data)
+
+        serializer = NeuralNetSerializer()
+        serializer.save(predictor, self.temp_path)
+        loaded = serializer.load(self.temp_path)
+        loaded_output = loaded.predict(self.dummy_data)
+
+        self.assertEqual(loaded.label, ["cost", "emissions"])
+        self.assertTrue(output.equals(loaded_output))
+
+    def test_inference_model_loaded_same(self):
+        """
+        Makes sure a compiled inference model is saved alongside the model and can be served on its own.
+        """
+        predictor = NeuralNetPredictor(self.configs[0])
+        predictor.fit(self.dummy_data, self.dummy_target)
+        predictor.fuse_scaler()
+        predictor.compile_model()
+        output = predictor.predict(self.dummy_data)
+
+        serializer = NeuralNetSerializer()
+        serializer.save(predictor, self.temp_path)
+        self.assertTrue((self.temp_path / "inference.pt").exists())
+        for inference_only in [True, False]:
+            with self.subTest(inference_only=inference_only):
+                loaded = serializer.load(self.temp_path, inference_only=inference_only)
+                self.assertEqual(loaded.model is None, inference_only)
+                self.assertTrue(loaded.fused)
+                self.assertTrue(output.equals(loaded.predict(self.dummy_data)))
+
+    def test_resave_without_inference_model(self):
+        """
+        Saving a predictor without an inference model over a save with one should not load the old inference model.
+        """
+        predictor = NeuralNetPredictor(self.configs[0])
+        predictor.fit(self.dummy_data, self.dummy_target)
+        predictor.compile_model()
+        serializer = NeuralNetSerializer()
+        serializer.save(predictor, self.temp_path)
+
+        predictor.fit(self.dummy_data, self.dummy_target * 10)
+        serializer.save(predictor, self.temp_path)
+        self.assertFalse((self.temp_path / "inference.pt").exists())
+        loaded = serializer.load(self.temp_path)
+        self.assertIsNone(loaded.inference_model)
+        self.assertTrue(predictor.predict(self.dummy_data).equals(loaded.predict(self.dummy_data)))
+
+    def test_quantized_loaded_same(self):
+        """
+        Makes sure a quantized model can be saved and served from its compiled inference model.
+        """
+        predictor = NeuralNetPredictor({**self.configs[0], "hidden_sizes": [64]})
+        predictor.fit(self.dummy_data, self.dummy_target)
+        predictor.quantize()
+        predictor.compile_model()
+        output = predictor.predict(self.dummy_data)
+
+        serializer = NeuralNetSerializer()
+        serializer.save(predictor, self.temp_path)
+        loaded = serializer.load(self.temp_path, inference_only=True)
+        self.assertTrue(output.equals(loaded.predict(self.dummy_data)))
+
+    def test_flat_loaded_same(self):
+        """
+        Makes sure the flat weight format saves no pickles and predicts the same after loading, and can
+        still be refit after loading.
+        """
+        predictor = NeuralNetPredictor(self.configs[0])
+        predictor.fit(self.dummy_data, self.dummy_target)
+        output = predictor.predict(self.dummy_data)
+
+        serializer = NeuralNetSerializer(weight_format="flat")
+        serializer.save(predictor, self.temp_path)
+        files = [f.name for f in self.temp_path.glob("**/*") if f.is_file()]
+        self.assertEqual(set(files), {"config.json", "weights.bin"})
+
+        loaded = serializer.load(self.temp_path)
+        self.assertTrue(output.equals(loaded.predict(self.dummy_data)))
+        np.testing.assert_array_equal(loaded.scaler.mean_, predictor.scaler.mean_)
+        np.testing.assert_array_equal(loaded.scaler.scale_, predictor.scaler.scale_)
+        self.assertEqual(loaded.scaler.n_samples_seen_, predictor.scaler.n_samples_seen_)
+        self.assertTrue(all(param.requires_grad for param in loaded.model.parameters()))
+
+        # Refitting builds a fresh model so the file is left untouched
+        loaded.fit(self.dummy_data, self.dummy_target)
+        reloaded = NeuralNetSerializer().load(self.temp_path)
+        self.assertTrue(output.equals(reloaded.predict(self.dummy_data)))
+
+    def test_switch_weight_format(self):
+        """
+        Saving in one weight format over a save in the other should remove the old weights and load the new ones.
+        """
+        predictor = NeuralNetPredictor(self.configs[0])
+        for weight_format, weight_files in [("flat", {"weights.bin"}), ("torch", {"model.pt", "scaler.joblib"}),
+                                            ("flat", {"weights.bin"})]:
+            with self.subTest(weight_format=weight_format):
+                predictor.fit(self.dummy_data, self.dummy_target)
+                NeuralNetSerializer(weight_format=weight_format).save(predictor, self.temp_path)
+                files = {f.name for f in self.temp_path.glob("**/*") if f.is_file()}
+                self.assertEqual(files, {"config.json"} | weight_files)
+                loaded = NeuralNetSerializer().load(self.temp_path)
+                self.assertTrue(predictor.predict(self.dummy_data).equals(loaded.predict(self.dummy_data)))
+
+    def test_sklearn_compress_mmap_loaded_same(self):
+        """
+        Makes sure sklearn models load the same when saved compressed or memory-mapped, and that uncompressed arrays
+        are memory-mapped while compressed saves ignore mmap_mode.
+        """
+        for model, config in zip(self.models[1:], self.configs[1:]):
+            predictor = model(config)
+            predictor.fit(self.dummy_data, self.dummy_target)
+            output = predictor.predict(self.dummy_data)
+            for compress in [0, 3]:
+                with self.subTest(model=model, compress=compress):
+                    SKLearnSerializer(compress=compress).save(predictor, self.temp_path)
+                    loaded = SKLearnSerializer(mmap_mode="r").load(self.temp_path)
+                    self.assertTrue(output.equals(loaded.predict(self.dummy_data)))
+                    if model is LinearRegressionPredictor:
+                        self.assertEqual(isinstance(loaded.model.coef_, np.memmap), compress == 0)
+                    shutil.rmtree(self.temp_path)
+
+    def test_compiled_forest_loaded_same(self):
+        """
+        Makes sure a compiled forest is saved alongside the model, memory-mapped on load, and can be served on its own.
+        """
+        predictor = RandomForestPredictor(self.configs[2])
+        predictor.fit(self.dummy_data, self.dummy_target)
+        predictor.compile_forest()
+        output = predictor.predict(self.dummy_data)
+
+        serializer = SKLearnSerializer()
+        serializer.save(predictor, self.temp_path)
+        self.assertTrue((self.temp_path / "forest.bin").exists())
+        for inference_only in [True, False]:
+            with self.subTest(inference_only=inference_only):
+                loaded = serializer.load(self.temp_path, inference_only=inference_only)
+                self.assertEqual(loaded.model is None, inference_only)
+                self.assertIsInstance(loaded.inference_model.threshold.base, np.memmap)
+                self.assertTrue(output.equals(loaded.predict(self.dummy_data)))
+
+    def test_resave_without_compiled_forest(self):
+        """
+        Saving a forest without a compiled forest over a save with one should not load the old compiled forest.
+        """
+        predictor = RandomForestPredictor(self.configs[2])
+        predictor.fit(self.dummy_data, self.dummy_target)
+        predictor.compile_forest()
+        serializer = SKLearnSerializer()
+        serializer.save(predictor, self.temp_path)
+
+        predictor.fit(self.dummy_data, self.dummy_target * 10)
+        serializer.save(predictor, self.temp_path)
+        self.assertFalse((self.temp_path / "forest.bin").exists())
+        loaded = serializer.load(self.temp_path)
+        self.assertIsNone(loaded.inference_model)
+        self.assertTrue(predictor.predict(self.dummy_data).equals(loaded.predict(self.dummy_data)))
+
     def tearDown(self):
         """
         Removes the temp directory if it exists.
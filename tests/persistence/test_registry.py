@@ -0,0 +1,118 @@
+"""
+Unit tests for the model registry.
+"""
+import shutil
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from prsdk.persistence.persistors.hf_persistor import HuggingFacePersistor
+from prsdk.persistence.registry import ModelRegistry
+from prsdk.persistence.serializers.sklearn_serializer import SKLearnSerializer
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+
+
+class TestModelRegistry(unittest.TestCase):
+    """
+    Tests caching, eviction, single-flight loading and invalidation.
+    """
+    def setUp(self):
+        self.temp_dir = Path("tests/temp")
+
+    def test_lru_eviction(self):
+        """
+        Models should be evicted least recently used first by count and by size.
+        """
+        registry = ModelRegistry(max_models=2)
+        for key in ["a", "b", "a", "c"]:
+            registry.get(key, lambda k=key: k)
+        self.assertEqual(list(registry.entries), ["a", "c"])
+        self.assertEqual(registry.stats["evictions"], 1)
+        self.assertEqual(registry.stats["hits"], 1)
+
+        registry = ModelRegistry(max_bytes=10, size_fn=len)
+        for key in ["aaaa", "bbbb", "cccc"]:
+            registry.get(key, lambda k=key: k)
+        self.assertEqual(list(registry.entries), ["bbbb", "cccc"])
+        self.assertEqual(registry.stats["bytes"], 8)
+
+    def test_single_flight(self):
+        """
+        Concurrent misses on the same key should only load once and all get the same model.
+        """
+        registry = ModelRegistry()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.2)
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("key", loader))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(registry.stats["loads"], 1)
+
+    def test_failed_load(self):
+        """
+        A failed load or size estimate should raise and not be cached, without leaving later gets waiting on it.
+        """
+        def failing_loader():
+            raise ValueError("failed")
+
+        registry = ModelRegistry()
+        with self.assertRaises(ValueError):
+            registry.get("key", failing_loader)
+        self.assertEqual(registry.get("key", lambda: 1), 1)
+
+        def failing_size(model):
+            if model == "bad":
+                raise ValueError("failed")
+            return 1
+
+        registry = ModelRegistry(size_fn=failing_size)
+        with self.assertRaises(ValueError):
+            registry.get("key", lambda: "bad")
+        self.assertEqual(registry.in_flight, {})
+        self.assertEqual(registry.get("key", lambda: "good"), "good")
+
+    def test_persistor_invalidation(self):
+        """
+        The persistor should serve repeated loads from the registry and reload when the local snapshot changes.
+        """
+        X = pd.DataFrame({"a": [1, 2, 3], "b": [3, 1, 2]})
+        predictor = LinearRegressionPredictor({})
+        predictor.fit(X, pd.Series([1, 2, 3], name="label"))
+        SKLearnSerializer().save(predictor, self.temp_dir)
+
+        registry = ModelRegistry()
+        invalidated = []
+        registry.add_invalidation_hook(invalidated.append)
+        persistor = HuggingFacePersistor(SKLearnSerializer(), registry=registry)
+        first = persistor.from_pretrained(str(self.temp_dir))
+        self.assertIs(persistor.from_pretrained(str(self.temp_dir)), first)
+        self.assertEqual(registry.stats["loads"], 1)
+        # A differently configured serializer is cached separately
+        other = HuggingFacePersistor(SKLearnSerializer(mmap_mode="r"), registry=registry)
+        self.assertIsNot(other.from_pretrained(str(self.temp_dir)), first)
+
+        predictor.fit(X, pd.Series([3, 2, 1], name="label"))
+        time.sleep(0.01)
+        SKLearnSerializer().save(predictor, self.temp_dir)
+        reloaded = persistor.from_pretrained(str(self.temp_dir))
+        self.assertIsNot(reloaded, first)
+        self.assertEqual(len(invalidated), 1)
+        self.assertEqual(invalidated[0][0], str(self.temp_dir))
+        pd.testing.assert_frame_equal(reloaded.predict(X), predictor.predict(X))
+
+    def tearDown(self):
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
@@ -0,0 +1,57 @@
+"""
+Unit tests for the memoizing CachedPredictor wrapper.
+"""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.cached_predictor import CachedPredictor
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+
+
+class TestCachedPredictor(unittest.TestCase):
+    """
+    Tests that cached predictions match the wrapped predictor and that the cache is bounded.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.X = pd.DataFrame(rng.random((100, 3)), columns=["a", "b", "c"])
+        self.y = pd.Series(self.X.sum(axis=1), name="label")
+
+    def test_matches_wrapped(self):
+        """
+        Predictions should match the wrapped predictor with the same index and label, and repeated rows should be
+        served from the cache.
+        """
+        predictors = [LinearRegressionPredictor({}),
+                      NeuralNetPredictor({"hidden_sizes": [8], "epochs": 1, "batch_size": 32, "device": "cpu"})]
+        for predictor in predictors:
+            cached = CachedPredictor(predictor)
+            cached.fit(self.X, self.y)
+            test_df = self.X.iloc[:20].copy()
+            test_df.index = range(100, 120)
+            pd.testing.assert_frame_equal(cached.predict(test_df), predictor.predict(test_df))
+            self.assertEqual(cached.stats, {"hits": 0, "misses": 20, "evictions": 0, "size": 20})
+
+            # Half new rows, half seen before, with duplicates and a shuffled index
+            mixed_df = pd.concat([self.X.iloc[10:30], self.X.iloc[10:15]]).sample(frac=1, random_state=0)
+            pd.testing.assert_frame_equal(cached.predict(mixed_df), predictor.predict(mixed_df))
+            self.assertEqual(cached.stats, {"hits": 10, "misses": 30, "evictions": 0, "size": 30})
+
+    def test_eviction(self):
+        """
+        The least recently used rows should be evicted once the cache is full.
+        """
+        cached = CachedPredictor(LinearRegressionPredictor({}), max_entries=10)
+        cached.fit(self.X, self.y)
+        cached.predict(self.X.iloc[:10])
+        cached.predict(self.X.iloc[:2])
+        cached.predict(self.X.iloc[10:15])
+        self.assertEqual(cached.stats, {"hits": 2, "misses": 15, "evictions": 5, "size": 10})
+        # Rows 0 and 1 were used recently so they should have survived
+        cached.predict(self.X.iloc[:2])
+        self.assertEqual(cached.stats["hits"], 4)
+        cached.predict(self.X.iloc[2:3])
+        self.assertEqual(cached.stats["misses"], 16)
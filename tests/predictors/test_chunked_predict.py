@@ -0,0 +1,53 @@
+"""
+Unit tests for chunked parallel prediction with the SKLearnPredictor.
+"""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+from prsdk.predictors.sklearn_predictors.random_forest_predictor import RandomForestPredictor
+
+
+class TestChunkedPredict(unittest.TestCase):
+    """
+    Tests that chunked predictions match predicting the whole frame at once.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.X = pd.DataFrame(rng.random((1000, 3)), columns=["a", "b", "c"], index=rng.permutation(1000) + 500)
+        self.y = pd.Series(self.X.sum(axis=1), name="label")
+
+    def test_matches_unchunked(self):
+        """
+        Chunked predictions should be reassembled in order with the original index and label, whether or not the
+        chunks divide the frame evenly, for every backend.
+        """
+        predictors = [LinearRegressionPredictor({}), RandomForestPredictor({"n_estimators": 5, "max_depth": 4})]
+        for predictor in predictors:
+            predictor.fit(self.X, self.y)
+            expected = predictor.predict(self.X)
+            for chunk_size, n_workers, backend in [(100, 1, "threading"), (333, 4, "threading"), (256, 2, "loky"),
+                                                   (5000, 4, "threading")]:
+                with self.subTest(predictor=predictor, chunk_size=chunk_size, n_workers=n_workers, backend=backend):
+                    predictor.set_chunking(chunk_size, n_workers, backend)
+                    pd.testing.assert_frame_equal(predictor.predict(self.X), expected)
+
+    def test_compiled_forest(self):
+        """
+        Chunks should be predicted with the inference model when there is one.
+        """
+        predictor = RandomForestPredictor({"n_estimators": 5})
+        predictor.fit(self.X, self.y)
+        expected = predictor.predict(self.X)
+        predictor.compile_forest()
+        predictor.set_chunking(128, 4)
+        pd.testing.assert_frame_equal(predictor.predict(self.X), expected)
+
+    def test_invalid_chunk_size(self):
+        """
+        Chunk sizes must be positive.
+        """
+        with self.assertRaises(ValueError):
+            LinearRegressionPredictor({}).set_chunking(0)
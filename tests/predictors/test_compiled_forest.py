@@ -0,0 +1,78 @@
+"""
+Unit tests for the array-based CompiledForest.
+"""
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+from prsdk.predictors.sklearn_predictors.compiled_forest import CompiledForest
+from prsdk.predictors.sklearn_predictors.random_forest_predictor import RandomForestPredictor
+
+
+class TestCompiledForest(unittest.TestCase):
+    """
+    Tests that compiled forests predict exactly the same as the sklearn forests they were compiled from.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.X = rng.random((500, 4))
+        self.y = np.sin(self.X * 5).sum(axis=1)
+        self.X_test = rng.random((300, 4))
+
+    def test_matches_sklearn(self):
+        """
+        Predictions should be bit-for-bit identical for different forests, including on the training data whose
+        values sit right next to the thresholds, and when the rows are split into several blocks.
+        """
+        models = [RandomForestRegressor(n_estimators=20, random_state=0),
+                  RandomForestRegressor(n_estimators=7, max_depth=3, random_state=0),
+                  ExtraTreesRegressor(n_estimators=10, random_state=0)]
+        for model in models:
+            model.fit(self.X, self.y)
+            compiled = CompiledForest.from_forest(model)
+            for X in [self.X, self.X_test, self.X_test[:1]]:
+                with self.subTest(model=model, rows=len(X)):
+                    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+            with mock.patch("prsdk.predictors.sklearn_predictors.compiled_forest.BLOCK_SIZE", 100):
+                np.testing.assert_array_equal(compiled.predict(self.X_test), model.predict(self.X_test))
+
+    def test_multi_output(self):
+        """
+        Multi-output forests should predict a column per output.
+        """
+        y = np.stack([self.y, self.X[:, 0]], axis=1)
+        model = RandomForestRegressor(n_estimators=5, random_state=0).fit(self.X, y)
+        compiled = CompiledForest.from_forest(model)
+        self.assertEqual(compiled.predict(self.X_test).shape, (300, 2))
+        np.testing.assert_array_equal(compiled.predict(self.X_test), model.predict(self.X_test))
+
+    def test_round_down(self):
+        """
+        Rounded thresholds should never be above the original and float32 comparisons against them should match
+        comparisons against the float64 threshold.
+        """
+        threshold = np.array([0.1, 0.5, 1 / 3, np.float32(0.7), -0.2])
+        rounded = CompiledForest.round_down(threshold)
+        self.assertTrue((rounded <= threshold).all())
+        for x in [np.float32(0.1), np.float32(1 / 3), np.nextafter(np.float32(1 / 3), np.float32(1)),
+                  np.float32(0.7), np.float32(-0.2)]:
+            np.testing.assert_array_equal(x <= rounded, x.astype(np.float64) <= threshold)
+
+    def test_predictor(self):
+        """
+        The RandomForestPredictor should use the compiled forest once compiled and discard it when refit.
+        """
+        X = pd.DataFrame(self.X, columns=["a", "b", "c", "d"])
+        y = pd.Series(self.y, name="label")
+        predictor = RandomForestPredictor({"n_estimators": 10, "random_state": 0})
+        predictor.fit(X, y)
+        expected = predictor.predict(X)
+        compiled = predictor.compile_forest()
+        self.assertIs(predictor.inference_model, compiled)
+        pd.testing.assert_frame_equal(predictor.predict(X), expected)
+
+        predictor.fit(X, y)
+        self.assertIsNone(predictor.inference_model)
@@ -0,0 +1,160 @@
+"""
+Unit tests for fitting the LinearRegressionPredictor from mergeable sufficient statistics.
+"""
+import shutil
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from prsdk.data.chunked import ChunkSource
+from prsdk.persistence.serializers.sklearn_serializer import SKLearnSerializer
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+from prsdk.predictors.sklearn_predictors.linear_statistics import LinearStatistics
+
+
+class TestLinearStatistics(unittest.TestCase):
+    """
+    Tests that regressions solved from statistics match sklearn's batch fit.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        # Large feature means make naively accumulated XᵀX lose precision
+        self.X = pd.DataFrame(rng.random((1000, 4)) + [0, 1e4, -50, 3], columns=["a", "b", "c", "d"])
+        self.y = pd.Series(self.X @ [1, -2, 0.5, 3] + rng.normal(0, 0.1, 1000) + 7, name="label")
+        self.temp_path = Path("tests/temp")
+
+    def assert_matches_batch(self, model: LinearRegression, X: pd.DataFrame, y: pd.Series, fit_intercept=True):
+        """
+        Checks a model's coefficients against sklearn's batch fit on the same data.
+        """
+        expected = LinearRegression(fit_intercept=fit_intercept).fit(X.to_numpy(), y.to_numpy())
+        np.testing.assert_allclose(model.coef_, expected.coef_, rtol=1e-7, atol=1e-9)
+        np.testing.assert_allclose(model.intercept_, expected.intercept_, rtol=1e-7, atol=1e-7)
+        self.assertEqual(model.rank_, expected.rank_)
+        # Solving from XᵀX squares the singular values, so zero ones are only zero to about sqrt(eps) of the largest
+        np.testing.assert_allclose(model.singular_, expected.singular_, rtol=1e-6, atol=1e-7 * expected.singular_[0])
+
+    def test_merge(self):
+        """
+        Merging the statistics of uneven splits of the data should give the statistics of all of it, in any order.
+        """
+        X, y = self.X.to_numpy(), self.y.to_numpy()
+        full = LinearStatistics.from_data(X, y)
+        splits = [(0, 1), (1, 400), (400, 1000)]
+        parts = [LinearStatistics.from_data(X[start:end], y[start:end]) for start, end in splits]
+        for merged in [parts[0].merge(parts[1]).merge(parts[2]), parts[2].merge(parts[0].merge(parts[1]))]:
+            self.assertEqual(merged.n_samples, full.n_samples)
+            np.testing.assert_allclose(merged.x_mean, full.x_mean)
+            np.testing.assert_allclose(merged.y_mean, full.y_mean)
+            np.testing.assert_allclose(merged.xx, full.xx, rtol=1e-9, atol=1e-9)
+            np.testing.assert_allclose(merged.xy, full.xy, rtol=1e-9, atol=1e-9)
+
+        empty = LinearStatistics.from_data(X[:0], y[:0])
+        self.assertEqual(empty.merge(full).n_samples, full.n_samples)
+        np.testing.assert_allclose(empty.merge(full).xx, full.xx)
+
+    def test_fit(self):
+        """
+        Fitting in incremental mode should match sklearn, with and without an intercept and with collinear features.
+        """
+        X = self.X.assign(e=self.X["a"] * 2)
+        for fit_intercept in [True, False]:
+            with self.subTest(fit_intercept=fit_intercept):
+                predictor = LinearRegressionPredictor({"incremental": True, "fit_intercept": fit_intercept})
+                predictor.fit(X, self.y)
+                self.assertIsInstance(predictor.model.stats_, LinearStatistics)
+                self.assert_matches_batch(predictor.model, X, self.y, fit_intercept)
+
+        with self.assertRaises(ValueError):
+            LinearRegressionPredictor({"incremental": True, "positive": True}).fit(self.X, self.y)
+
+    def test_fit_stream_and_refresh(self):
+        """
+        Streaming chunks, refreshing with partial_fit and merging statistics from elsewhere should all match a batch
+        fit on all of the data seen.
+        """
+        df = self.X.assign(label=self.y)
+        source = ChunkSource(lambda: (df.iloc[start:start + 300] for start in range(0, 600, 300)))
+        predictor = LinearRegressionPredictor({"incremental": True})
+        predictor.fit_stream(source, "label")
+        self.assertEqual(predictor.config["features"], ["a", "b", "c", "d"])
+        self.assert_matches_batch(predictor.model, self.X[:600], self.y[:600])
+
+        predictor.partial_fit(self.X[600:800], self.y[600:800])
+        self.assert_matches_batch(predictor.model, self.X[:800], self.y[:800])
+
+        predictor.merge(LinearStatistics.from_data(predictor.ingest(self.X[800:]), self.y[800:].to_numpy()))
+        self.assert_matches_batch(predictor.model, self.X, self.y)
+
+        batch = LinearRegressionPredictor({})
+        batch.fit(self.X, self.y)
+        with self.assertRaises(ValueError):
+            batch.partial_fit(self.X, self.y)
+
+    def test_batch_refit_drops_statistics(self):
+        """
+        A batch refit should discard the statistics of an earlier incremental fit, so that refreshing afterwards can't
+        merge into statistics from before the refit.
+        """
+        predictor = LinearRegressionPredictor({"incremental": True})
+        predictor.partial_fit(self.X[:500], self.y[:500])
+        predictor.config["incremental"] = False
+        predictor.fit(self.X[500:], self.y[500:])
+        self.assertFalse(hasattr(predictor.model, "stats_"))
+        self.assert_matches_batch(predictor.model, self.X[500:], self.y[500:])
+        with self.assertRaises(ValueError):
+            predictor.partial_fit(self.X[:5], self.y[:5])
+
+        # Even if switched back to incremental mode the batch fit has no statistics to merge into
+        predictor.config["incremental"] = True
+        with self.assertRaises(ValueError):
+            predictor.partial_fit(self.X[:5], self.y[:5])
+        self.assert_matches_batch(predictor.model, self.X[500:], self.y[500:])
+
+        unfit = LinearRegressionPredictor({})
+        with self.assertRaises(ValueError):
+            unfit.partial_fit(self.X, self.y)
+
+    def test_serialization(self):
+        """
+        The statistics should be saved with the model so that a loaded model can still be refreshed.
+        """
+        predictor = LinearRegressionPredictor({"incremental": True})
+        predictor.fit(self.X[:500], self.y[:500])
+        output = predictor.predict(self.X)
+        SKLearnSerializer().save(predictor, self.temp_path)
+        loaded = SKLearnSerializer().load(self.temp_path)
+        self.assertTrue(output.equals(loaded.predict(self.X)))
+
+        new_stats = LinearStatistics.from_data(loaded.ingest(self.X[500:]), self.y[500:].to_numpy())
+        loaded.model.stats_.merge(new_stats).apply(loaded.model)
+        self.assert_matches_batch(loaded.model, self.X, self.y)
+
+    def test_serialization_partial_fit(self):
+        """
+        A saved incremental predictor should load as a LinearRegressionPredictor that can keep being refreshed with
+        partial_fit.
+        """
+        predictor = LinearRegressionPredictor({"incremental": True})
+        predictor.fit(self.X[:500], self.y[:500])
+        SKLearnSerializer().save(predictor, self.temp_path)
+        loaded = SKLearnSerializer().load(self.temp_path)
+        self.assertIsInstance(loaded, LinearRegressionPredictor)
+        self.assertTrue(loaded.incremental)
+        self.assertNotIn("predictor_class", loaded.config)
+
+        loaded.partial_fit(self.X[500:], self.y[500:])
+        self.assert_matches_batch(loaded.model, self.X, self.y)
+        SKLearnSerializer().save(loaded, self.temp_path)
+        reloaded = SKLearnSerializer().load(self.temp_path)
+        self.assertTrue(loaded.predict(self.X).equals(reloaded.predict(self.X)))
+
+    def tearDown(self):
+        """
+        Removes the temp directory if it exists.
+        """
+        if self.temp_path.exists():
+            shutil.rmtree(self.temp_path)
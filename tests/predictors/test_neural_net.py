@@ -1,13 +1,43 @@
 """
 Unit tests for the NeuralNetPredictor class.
 """
+import tempfile
 import unittest
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import torch
 
+from prsdk.predictors.neural_network.callbacks import Callback, TensorBoardCallback, TimingCallback
 from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
 
 
+class RecordingCallback(Callback):
+    """
+    Records the events it receives.
+    """
+    batch_hooks = True
+
+    def __init__(self):
+        self.events = []
+
+    def on_train_begin(self, predictor):
+        self.events.append("train_begin")
+
+    def on_epoch_begin(self, epoch: int):
+        self.events.append(f"epoch_begin {epoch}")
+
+    def on_batch_end(self, step: int, loss: torch.Tensor):
+        self.events.append(f"batch {step}")
+
+    def on_epoch_end(self, epoch: int, logs: dict):
+        self.events.append(f"epoch_end {epoch} {sorted(logs)}")
+
+    def on_train_end(self, results: dict):
+        self.events.append("train_end")
+
+
 class TestNeuralNet(unittest.TestCase):
     """
     Specifically tests the neural net predictor
@@ -50,3 +80,198 @@ class TestNeuralNet(unittest.TestCase):
         predictor.fit(train_data[['a', 'b', 'c']], train_data['label'])
         out = predictor.predict(test_data)
         self.assertEqual(out.shape, (2, 1))
+
+    def test_chunked_predict(self):
+        """
+        Tests that predictions are the same regardless of how many chunks the input is split into.
+        """
+        predictor = NeuralNetPredictor({"hidden_sizes": [4], "epochs": 1, "batch_size": 3, "device": "cpu"})
+
+        train_data = pd.DataFrame({"a": [1, 2, 3], "b": [2, 3, 4], "c": [3, 4, 5], "label": [4, 5, 6]})
+        test_data = pd.DataFrame({"a": range(10), "b": range(10, 20), "c": range(20, 30)}, index=range(5, 15))
+
+        predictor.fit(train_data[['a', 'b', 'c']], train_data['label'])
+        chunked = predictor.predict(test_data)
+        predictor.batch_size = len(test_data)
+        single = predictor.predict(test_data)
+        self.assertTrue(chunked.index.equals(test_data.index))
+        self.assertEqual(list(chunked.columns), ["label"])
+        self.assertTrue(np.allclose(chunked.values, single.values))
+
+    def test_multi_label(self):
+        """
+        Tests that a DataFrame of labels trains a single network with one output column per label.
+        """
+        predictor = NeuralNetPredictor({"hidden_sizes": [4], "epochs": 1, "batch_size": 2, "device": "cpu"})
+
+        train_data = pd.DataFrame({"a": [1, 2, 3], "b": [2, 3, 4], "c": [3, 4, 5],
+                                   "cost": [4, 5, 6], "emissions": [1, 0, 1]})
+        test_data = pd.DataFrame({"a": [4, 5], "b": [5, 6], "c": [6, 7]}, index=[3, 7])
+
+        results = predictor.fit(train_data[['a', 'b', 'c']], train_data[['cost', 'emissions']],
+                                X_test=train_data[['a', 'b', 'c']], y_test=train_data[['cost', 'emissions']])
+        out = predictor.predict(test_data)
+        self.assertEqual(predictor.model.linear.out_features, 2)
+        self.assertEqual(list(out.columns), ["cost", "emissions"])
+        self.assertTrue(out.index.equals(test_data.index))
+        self.assertIn("test_loss", results)
+
+    def test_fused_scaler(self):
+        """
+        Tests that folding the scaler into the network gives the same predictions as scaling the input.
+        """
+        train_data = pd.DataFrame({"a": [1, 2, 3, 4], "b": [20, 30, 40, 30], "c": [-3, 4, 50, 6]})
+        test_data = pd.DataFrame({"a": [4, 5, 0], "b": [5, 6, 100], "c": [6, 7, -10]})
+        configs = [
+            {"hidden_sizes": [8], "linear_skip": True},
+            {"hidden_sizes": [8, 4], "linear_skip": False},
+            {"hidden_sizes": [], "linear_skip": True}
+        ]
+        for config in configs:
+            with self.subTest(config=config):
+                predictor = NeuralNetPredictor({**config, "epochs": 1, "batch_size": 2, "device": "cpu"})
+                predictor.fit(train_data, pd.Series([4, 5, 6, 7], name="label"))
+                unfused = predictor.predict(test_data)
+                predictor.fuse_scaler()
+                fused = predictor.predict(test_data)
+                self.assertTrue(predictor.fused)
+                self.assertTrue(np.allclose(unfused.values, fused.values, rtol=1e-4, atol=1e-5))
+
+    def test_compiled_model(self):
+        """
+        Tests that traced and scripted models predict the same as the eager model, including when fused.
+        """
+        train_data = pd.DataFrame({"a": [1, 2, 3, 4], "b": [20, 30, 40, 30], "c": [-3, 4, 50, 6]})
+        test_data = pd.DataFrame({"a": [4, 5, 0], "b": [5, 6, 100], "c": [6, 7, -10]})
+        for method, fuse in [("trace", False), ("script", False), ("trace", True)]:
+            with self.subTest(method=method, fuse=fuse):
+                predictor = NeuralNetPredictor({"hidden_sizes": [8], "epochs": 1, "batch_size": 2, "device": "cpu"})
+                predictor.fit(train_data, pd.Series([4, 5, 6, 7], name="label"))
+                eager = predictor.predict(test_data)
+                if fuse:
+                    predictor.fuse_scaler()
+                predictor.compile_model(method)
+                compiled = predictor.predict(test_data)
+                self.assertTrue(np.allclose(eager.values, compiled.values, rtol=1e-4, atol=1e-5))
+
+    def test_quantize(self):
+        """
+        Tests that the quantized model reports its drift and stays close to the float model.
+        """
+        train_data = pd.DataFrame(np.random.rand(64, 3), columns=["a", "b", "c"])
+        label = pd.Series(train_data.sum(axis=1), name="label")
+        predictor = NeuralNetPredictor({"hidden_sizes": [16], "epochs": 1, "batch_size": 8, "device": "cpu"})
+        predictor.fit(train_data, label)
+        float_pred = predictor.predict(train_data)
+
+        drift = predictor.quantize(train_data, label)
+        quant_pred = predictor.predict(train_data)
+        self.assertEqual(set(drift.keys()), {"max_abs_diff", "mean_abs_diff", "float_mae", "quantized_mae"})
+        self.assertAlmostEqual(drift["max_abs_diff"], np.abs(quant_pred.values - float_pred.values).max())
+        self.assertLess(drift["max_abs_diff"], 0.1)
+        self.assertIsInstance(predictor.inference_model.linear, torch.ao.nn.quantized.dynamic.Linear)
+
+    def test_early_stopping(self):
+        """
+        Tests that training stops once the validation loss stops improving and the best weights are restored.
+        """
+        train_data = pd.DataFrame(np.random.rand(32, 3), columns=["a", "b", "c"])
+        label = pd.Series(train_data.sum(axis=1), name="label")
+
+        # With a learning rate of 0 the validation loss never improves after the first epoch
+        predictor = NeuralNetPredictor({"hidden_sizes": [4], "epochs": 10, "batch_size": 8, "device": "cpu",
+                                        "optim_params": {"lr": 0}, "patience": 2})
+        results = predictor.fit(train_data, label, X_val=train_data, y_val=label)
+        self.assertEqual(results["best_epoch"], 0)
+        self.assertEqual(results["stopped_epoch"], 2)
+
+        predictor = NeuralNetPredictor({"hidden_sizes": [4], "epochs": 5, "batch_size": 8, "device": "cpu",
+                                        "optim_params": {"lr": 0.5}, "step_lr_params": None})
+        results = predictor.fit(train_data, label, X_val=train_data, y_val=label)
+        self.assertNotIn("stopped_epoch", results)
+        val_mae = np.mean(np.abs(predictor.predict(train_data)["label"] - label))
+        self.assertAlmostEqual(val_mae, results["best_loss"], places=4)
+
+    def test_data_parallel(self):
+        """
+        Tests that training across multiple processes returns a single fitted model and the usual results, and that
+        the callbacks in this process receive the first worker's events.
+        """
+        train_data = pd.DataFrame(np.random.rand(64, 3), columns=["a", "b", "c"])
+        label = pd.Series(train_data.sum(axis=1), name="label")
+        predictor = NeuralNetPredictor({"hidden_sizes": [8], "epochs": 2, "batch_size": 8, "device": "cpu",
+                                        "data_parallel_workers": 2})
+        recorder = RecordingCallback()
+        timing = TimingCallback()
+        results = predictor.fit(train_data, label, X_val=train_data, y_val=label, X_test=train_data, y_test=label,
+                                callbacks=[recorder, timing])
+        self.assertEqual(set(results.keys()), {"best_epoch", "best_loss", "time", "test_loss"})
+        out = predictor.predict(train_data)
+        self.assertAlmostEqual(np.mean(np.abs(out["label"] - label)), results["test_loss"], places=4)
+
+        # Each worker takes half of each batch, so an epoch is 8 steps like in a single process
+        epoch_keys = ["samples_per_s", "step", "timings", "val_loss"]
+        batches = [[f"batch {step}" for step in range(start, start + 8)] for start in [0, 8]]
+        self.assertEqual(recorder.events, ["train_begin",
+                                           "epoch_begin 0", *batches[0], f"epoch_end 0 {epoch_keys}",
+                                           "epoch_begin 1", *batches[1], f"epoch_end 1 {epoch_keys}",
+                                           "train_end"])
+        self.assertEqual(len(timing.history), 2)
+
+    def test_bfloat16(self):
+        """
+        Tests that bfloat16 autocast keeps float32 weights and outputs close to running the same weights in float32.
+        """
+        train_data = pd.DataFrame(np.random.rand(64, 3), columns=["a", "b", "c"])
+        label = pd.Series(train_data.sum(axis=1), name="label")
+        predictor = NeuralNetPredictor({"hidden_sizes": [16], "epochs": 1, "batch_size": 8, "device": "cpu",
+                                        "precision": "bfloat16"})
+        predictor.fit(train_data, label)
+        self.assertTrue(all(param.dtype == torch.float32 for param in predictor.model.parameters()))
+
+        bf16_pred = predictor.predict(train_data)
+        self.assertEqual(bf16_pred["label"].dtype, np.float32)
+        predictor.precision = "float32"
+        fp32_pred = predictor.predict(train_data)
+        self.assertFalse(bf16_pred.equals(fp32_pred))
+        self.assertTrue(np.allclose(bf16_pred.values, fp32_pred.values, rtol=0.05, atol=0.05))
+
+        with self.assertRaises(ValueError):
+            NeuralNetPredictor({"precision": "float16"})
+
+    def test_callbacks(self):
+        """
+        Tests that callbacks receive every event in order and that timed callbacks get the phase timings.
+        """
+        train_data = pd.DataFrame(np.random.rand(16, 3), columns=["a", "b", "c"])
+        label = pd.Series(train_data.sum(axis=1), name="label")
+        predictor = NeuralNetPredictor({"hidden_sizes": [4], "epochs": 2, "batch_size": 8, "device": "cpu"})
+        recorder = RecordingCallback()
+        timing = TimingCallback()
+        predictor.fit(train_data, label, X_val=train_data, y_val=label, callbacks=[recorder, timing])
+
+        epoch_keys = ["samples_per_s", "step", "timings", "val_loss"]
+        self.assertEqual(recorder.events, ["train_begin",
+                                           "epoch_begin 0", "batch 0", "batch 1", f"epoch_end 0 {epoch_keys}",
+                                           "epoch_begin 1", "batch 2", "batch 3", f"epoch_end 1 {epoch_keys}",
+                                           "train_end"])
+        self.assertEqual(len(timing.history), 2)
+        self.assertEqual(set(timing.history[0]), {"data", "copy", "forward", "backward", "step", "samples_per_s"})
+        self.assertGreater(timing.history[0]["samples_per_s"], 0)
+
+        # Without timed callbacks the loop shouldn't time anything
+        recorder = RecordingCallback()
+        predictor.fit(train_data, label, callbacks=[recorder])
+        self.assertEqual(recorder.events[4], "epoch_end 0 ['step']")
+
+    def test_tensorboard_callback(self):
+        """
+        Tests that the tensorboard callback writes logs.
+        """
+        train_data = pd.DataFrame(np.random.rand(16, 3), columns=["a", "b", "c"])
+        label = pd.Series(train_data.sum(axis=1), name="label")
+        predictor = NeuralNetPredictor({"hidden_sizes": [4], "epochs": 1, "batch_size": 4, "device": "cpu"})
+        with tempfile.TemporaryDirectory() as log_dir:
+            predictor.fit(train_data, label, X_val=train_data, y_val=label,
+                          callbacks=[TensorBoardCallback(log_dir, log_steps=2), TimingCallback()])
+            self.assertTrue(any(Path(log_dir).iterdir()))
@@ -0,0 +1,84 @@
+"""
+Unit tests for the parallel hyperparameter sweep.
+"""
+import pickle
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+from prsdk.predictors.sklearn_predictors.random_forest_predictor import RandomForestPredictor
+from prsdk.predictors.sweep import SharedFrame, run_sweep
+
+
+class TestSweep(unittest.TestCase):
+    """
+    Tests sharing data with the workers and running sweeps.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.X = pd.DataFrame(rng.random((200, 3)), columns=["a", "b", "c"])
+        self.y = pd.Series(self.X.sum(axis=1), name="label")
+
+    def test_shared_frame(self):
+        """
+        A SharedFrame should pickle without its data and attach to the same read-only values.
+        """
+        shared = SharedFrame(self.X)
+        try:
+            pickled = pickle.dumps(shared)
+            self.assertLess(len(pickled), self.X.values.nbytes)
+            attached = pickle.loads(pickled).attach()
+            pd.testing.assert_frame_equal(attached, self.X)
+            self.assertFalse(attached.values.flags.writeable)
+        finally:
+            shared.unlink()
+
+        shared = SharedFrame(self.y)
+        try:
+            pd.testing.assert_series_equal(shared.attach(), self.y)
+        finally:
+            shared.unlink()
+
+    def test_shared_frame_metadata(self):
+        """
+        A SharedFrame should keep the index, column names and dtype, and reject non-numeric data.
+        """
+        frames = [self.X[150:], pd.Series(np.arange(5), index=list("vwxyz")),
+                  pd.DataFrame({"a": [1, 2], "b": [0.5, 1.5]}, index=pd.Index([3, 7], name="id"))]
+        for df in frames:
+            shared = SharedFrame(df)
+            try:
+                attached = pickle.loads(pickle.dumps(shared)).attach()
+                if isinstance(df, pd.Series):
+                    pd.testing.assert_series_equal(attached, df)
+                else:
+                    pd.testing.assert_frame_equal(attached, df.astype(np.float64))
+            finally:
+                shared.unlink()
+
+        with self.assertRaises(ValueError):
+            SharedFrame(pd.DataFrame({"a": [1.0, 2.0], "b": ["x", "y"]}))
+
+    def test_run_sweep(self):
+        """
+        Each config should get a row with its metrics, in the order the configs were given.
+        """
+        configs = [{"n_estimators": 5, "max_depth": depth} for depth in [1, 2, 4]]
+        results = run_sweep(RandomForestPredictor, configs, self.X[:150], self.y[:150], self.X[150:], self.y[150:],
+                            n_workers=2)
+        self.assertEqual(results["config"].tolist(), configs)
+        self.assertTrue((results["fit_time"] > 0).all())
+        self.assertTrue((results["val_mae"] >= 0).all())
+        self.assertLess(results["val_mae"].iloc[2], results["val_mae"].iloc[0])
+
+    def test_run_sweep_neural_net(self):
+        """
+        Neural net predictors should be fit with the validation set and report their results.
+        """
+        configs = [{"hidden_sizes": [size], "epochs": 2, "batch_size": 32} for size in [4, 8]]
+        results = run_sweep(NeuralNetPredictor, configs, self.X[:150], self.y[:150], self.X[150:], self.y[150:],
+                            n_workers=2)
+        self.assertEqual(len(results), 2)
+        self.assertTrue({"best_epoch", "best_loss", "time", "fit_time", "val_mae"}.issubset(results.columns))
@@ -0,0 +1,55 @@
+"""
+Unit tests for the neural network prescriptor and the batched population evaluator.
+"""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from prsdk.predictors.neural_network.neural_net_predictor import NeuralNetPredictor
+from prsdk.predictors.sklearn_predictors.linear_regression_predictor import LinearRegressionPredictor
+from prsdk.prescriptors.neural_network.neural_net_prescriptor import NeuralNetPrescriptor
+from prsdk.prescriptors.population_evaluator import PopulationEvaluator
+
+
+class TestPopulationEvaluator(unittest.TestCase):
+    """
+    Tests that evaluating a population at once matches evaluating each candidate on its own.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.context = ["c1", "c2"]
+        self.actions = ["a1", "a2"]
+        self.context_df = pd.DataFrame(rng.random((50, 2)), columns=self.context)
+        train_df = pd.DataFrame(rng.random((200, 4)), columns=self.context + self.actions)
+        linear = LinearRegressionPredictor({})
+        linear.fit(train_df, pd.Series(train_df.sum(axis=1), name="total"))
+        neural_net = NeuralNetPredictor({"hidden_sizes": [8], "epochs": 1, "batch_size": 32, "device": "cpu"})
+        neural_net.fit(train_df, pd.Series(train_df["a1"] - train_df["c1"], name="diff"))
+        self.predictors = [linear, neural_net]
+        self.population = [NeuralNetPrescriptor(self.context, self.actions, hidden_size=8) for _ in range(5)]
+
+    def test_prescribe(self):
+        """
+        The prescriptor should append actions in [0, 1] to the context.
+        """
+        context_actions_df = self.population[0].prescribe(self.context_df)
+        self.assertEqual(list(context_actions_df.columns), self.context + self.actions)
+        pd.testing.assert_frame_equal(context_actions_df[self.context], self.context_df)
+        self.assertTrue(((context_actions_df[self.actions] >= 0) & (context_actions_df[self.actions] <= 1)).all().all())
+
+    def test_matches_sequential(self):
+        """
+        The batched actions and evaluation should match prescribing and predicting one candidate at a time.
+        """
+        evaluator = PopulationEvaluator(self.context, self.actions, self.predictors)
+        actions = evaluator.prescribe_population(self.population, self.context_df)
+        self.assertEqual(actions.shape, (5, 50, 2))
+
+        results = evaluator.evaluate(self.population, self.context_df)
+        self.assertEqual(list(results.columns), ["total", "diff"])
+        for i, candidate in enumerate(self.population):
+            np.testing.assert_allclose(actions[i], candidate.prescribe_actions(self.context_df), rtol=1e-5, atol=1e-6)
+            context_actions_df = candidate.prescribe(self.context_df)
+            expected = [predictor.predict(context_actions_df).mean().iloc[0] for predictor in self.predictors]
+            np.testing.assert_allclose(results.loc[i].values, expected, rtol=1e-4, atol=1e-5)
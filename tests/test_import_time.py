@@ -0,0 +1,47 @@
+"""
+Import-time regression tests for the main entry modules. Each module is imported in a fresh interpreter with
+python -X importtime and must not pull in heavy dependencies it only needs lazily.
+"""
+import subprocess
+import sys
+import unittest
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Imports a module in a fresh interpreter and parses the output of -X importtime.
+    :return: dictionary of every module imported to its cumulative import time in microseconds.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    """
+    Checks which heavy dependencies each entry module imports.
+    """
+    # Entry module -> top-level packages it must not import
+    FORBIDDEN = {
+        "prsdk.persistence.serializers.sklearn_serializer": ["torch", "tensorboard", "huggingface_hub"],
+        "prsdk.persistence.persistors.hf_persistor": ["torch", "tensorboard", "sklearn"],
+        "prsdk.persistence.serializers.neural_network_serializer": ["tensorboard", "sklearn"],
+        "prsdk.predictors.neural_network.neural_net_predictor": ["tensorboard", "sklearn"],
+    }
+
+    def test_lazy_imports(self):
+        """
+        Heavy dependencies should only be imported on first use.
+        """
+        for module, forbidden in self.FORBIDDEN.items():
+            with self.subTest(module=module):
+                times = import_times(module)
+                self.assertIn(module, times)
+                imported = sorted({name.split(".")[0] for name in times} & set(forbidden))
+                self.assertEqual(imported, [], f"{module} took {times[module] / 1e6:.2f}s to import")